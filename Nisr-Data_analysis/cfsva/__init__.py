@@ -0,0 +1,24 @@
+"""
+Shared helpers for the Rwanda CFSVA 2021 analysis scripts.
+
+Scripts in `child_nutrition/`, `village/` and `scripts/` put the
+`Nisr-Data_analysis` folder on `sys.path` and import from here.
+"""
+
+from .loader import (
+    CHILD_FILE,
+    DATA_DIR,
+    HH_FILE,
+    VILLAGE_FILE,
+    clear_cache,
+    load_survey,
+)
+
+__all__ = [
+    'CHILD_FILE',
+    'DATA_DIR',
+    'HH_FILE',
+    'VILLAGE_FILE',
+    'clear_cache',
+    'load_survey',
+]
@@ -0,0 +1,167 @@
+"""
+Precomputed malnutrition cube: indicator x one- and two-way disaggregations.
+
+`build_cube()` computes, for the national total, every dimension and every
+pair of dimensions, the weighted number of children, and per indicator the
+weighted measured (denominator) and affected (moderate + severe) counts. Each
+cuboid is one np.bincount over mixed-radix cell codes, stored as dense
+arrays in dimension-label order, so any slice is an index into an array:
+
+    cube = build_cube(df)
+    cube.lookup('Stunting', S0_C_Prov='Northern', UrbanRural='Rural')
+    cube.rates('Stunting', 'ageCat')          # Series, one rate per age group
+
+`Cube.to_dict()` is the JSON layout read by the frontend
+(nisr-frontend/src/components/cube.js): dimension labels plus flat
+row-major arrays per cuboid, keyed by the dimension names joined with '|'.
+Rows missing a dimension are left out of the cuboids that use it.
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from .estimators import encode, row_weights
+from .malnutrition import INDICATORS, indicator_flags
+
+CUBE_VERSION = 1
+# Disaggregations of the child file (column -> description)
+CUBE_DIMENSIONS = {
+    'S0_C_Prov': 'Province',
+    'UrbanRural': 'Urban / rural',
+    'ageCat': 'Age group',
+    'S13_01_5': 'Sex',
+    'FS_final': 'Household food security',
+    'WI_cat': 'Wealth index',
+    'minimumDietaryDiversity': 'Minimum dietary diversity',
+    'S13_11': 'Diarrhoea (last 2 weeks)',
+}
+KEY_SEPARATOR = '|'
+
+
+def cuboid_key(dims):
+    return KEY_SEPARATOR.join(dims)
+
+
+class Cube:
+    """Dense cuboids of counts, indexed by dimension label."""
+
+    def __init__(self, indicators, dimensions, cuboids, weighted=False):
+        self.indicators = list(indicators)
+        self.dimensions = {name: list(labels) for name, labels in dimensions.items()}
+        self.cuboids = cuboids          # key -> {'total', 'measured', 'affected'[, 'n']}
+        self.weighted = weighted
+        self._positions = {name: {label: i for i, label in enumerate(labels)}
+                           for name, labels in self.dimensions.items()}
+
+    def _cell(self, filters):
+        dims = [d for d in self.dimensions if d in filters]
+        unknown = set(filters) - set(dims)
+        if unknown:
+            raise KeyError(f"Unknown cube dimension(s): {', '.join(sorted(unknown))}")
+        key = cuboid_key(dims)
+        if key not in self.cuboids:
+            raise KeyError(f"No cuboid for {dims}: the cube holds at most two-way slices")
+        return self.cuboids[key], tuple(self._positions[d][filters[d]] for d in dims)
+
+    def lookup(self, indicator, **filters):
+        """
+        Counts and rate of one cell: {'total', 'measured', 'affected', 'rate'}
+        ('n', the unweighted measured count, as well for a weighted cube).
+        `filters` maps dimension columns to labels; none gives the national cell.
+        """
+        cuboid, idx = self._cell(filters)
+        j = self.indicators.index(indicator)
+        measured = float(cuboid['measured'][idx + (j,)])
+        affected = float(cuboid['affected'][idx + (j,)])
+        out = {'total': float(cuboid['total'][idx]), 'measured': measured, 'affected': affected,
+               'rate': affected / measured * 100 if measured > 0 else np.nan}
+        if 'n' in cuboid:
+            out['n'] = int(cuboid['n'][idx + (j,)])
+        return out
+
+    def rates(self, indicator, *dims):
+        """% affected for every cell of a one- or two-way cuboid (empty cells dropped)."""
+        dims = [d for d in self.dimensions if d in dims]
+        cuboid = self.cuboids[cuboid_key(dims)]
+        j = self.indicators.index(indicator)
+        measured = cuboid['measured'][..., j].ravel()
+        affected = cuboid['affected'][..., j].ravel()
+        if len(dims) == 1:
+            index = pd.Index(self.dimensions[dims[0]], name=dims[0])
+        else:
+            index = pd.MultiIndex.from_product([self.dimensions[d] for d in dims], names=dims)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = pd.Series(affected / measured * 100, index=index, name=indicator)
+        return rate[measured > 0]
+
+    def to_dict(self):
+        cuboids = {}
+        for key, cuboid in self.cuboids.items():
+            entry = {'shape': list(cuboid['affected'].shape)}
+            for name, values in cuboid.items():
+                values = values.ravel()
+                entry[name] = values.astype(int).tolist() if not self.weighted or name == 'n' \
+                    else np.round(values, 4).tolist()
+            cuboids[key] = entry
+        return {'version': CUBE_VERSION, 'indicators': self.indicators, 'weighted': self.weighted,
+                'dimensions': self.dimensions, 'cuboids': cuboids}
+
+    @classmethod
+    def from_dict(cls, data):
+        cuboids = {}
+        for key, entry in data['cuboids'].items():
+            shape = tuple(entry['shape'])
+            cuboids[key] = {name: np.asarray(entry[name], dtype=float).reshape(
+                                shape[:-1] if name == 'total' else shape)
+                            for name in ('total', 'measured', 'affected', 'n') if name in entry}
+        return cls(data['indicators'], data['dimensions'], cuboids, data.get('weighted', False))
+
+
+def build_cube(df, dimensions=CUBE_DIMENSIONS, weight=None, max_way=2):
+    """
+    Cube of every indicator over all cuboids of up to `max_way` dimensions.
+
+    `dimensions` is an iterable of column names (columns missing from `df`
+    are skipped). Categorical columns keep every category, observed or not.
+    """
+    dims = [d for d in dimensions if d in df.columns]
+    codes, labels = {}, {}
+    for d in dims:
+        c, lab = encode(df[d])
+        codes[d], labels[d] = c, [str(v) for v in lab]
+
+    w = row_weights(df, weight)
+    flags = indicator_flags(df)
+    measured = np.column_stack([flags[f'{ind}_Measured'].to_numpy() for ind in INDICATORS])
+    affected = np.column_stack([(flags[f'{p}_Moderate'] + flags[f'{p}_Severe']).to_numpy()
+                                for p, _, _ in INDICATORS.values()])
+    k = len(INDICATORS)
+    # columns: total, then measured and affected per indicator
+    values = np.column_stack([np.ones(len(df)), measured, affected]) * w[:, None]
+    if weight is not None:
+        values = np.column_stack([values, measured])
+
+    cuboids = {}
+    for way in range(max_way + 1):
+        for combo in combinations(dims, way):
+            shape = tuple(len(labels[d]) for d in combo)
+            cell = np.zeros(len(df), dtype=np.int64)
+            valid = np.ones(len(df), dtype=bool)
+            for d in combo:
+                cell = cell * len(labels[d]) + codes[d]
+                valid &= codes[d] >= 0
+            size = int(np.prod(shape, dtype=np.int64))
+            m = values.shape[1]
+            flat = (cell[valid][:, None] * m + np.arange(m)).ravel()
+            sums = np.bincount(flat, weights=values[valid].ravel(), minlength=size * m).reshape(size, m)
+            cuboid = {
+                'total': sums[:, 0].reshape(shape),
+                'measured': sums[:, 1:1 + k].reshape(shape + (k,)),
+                'affected': sums[:, 1 + k:1 + 2 * k].reshape(shape + (k,)),
+            }
+            if weight is not None:
+                cuboid['n'] = sums[:, 1 + 2 * k:].reshape(shape + (k,))
+            cuboids[cuboid_key(combo)] = cuboid
+    return Cube(list(INDICATORS), {d: labels[d] for d in dims}, cuboids, weighted=weight is not None)
@@ -0,0 +1,140 @@
+"""
+Enriched village dataset: the village survey plus the derived columns used
+by the village analyses and figures.
+
+`advanced_village_analytics.py` writes it with `write_enriched_village()`;
+downstream scripts call `load_enriched_village()`, which reads the artifact
+and only rebuilds it when the village .dta or the factor definitions
+changed (or it is missing).
+
+The artifact lives in `data/derived/` (Parquet, or pickle without pyarrow)
+with a `.meta.json` recording the source file and a fingerprint of the
+definitions.
+"""
+
+import hashlib
+import json
+
+import pandas as pd
+
+from .loader import (
+    CACHE_FORMAT,
+    DATA_DIR,
+    VILLAGE_FILE,
+    file_sha256,
+    load_survey,
+    mixed_categoricals,
+    read_meta,
+    write_atomic,
+    write_meta,
+    write_parquet,
+)
+from .vulnerability import VULNERABILITY_FACTORS, factor_indicator, vulnerability_index
+
+DERIVED_DIR = DATA_DIR / 'derived'
+
+# name -> (column, op, value) on the labelled survey columns
+VILLAGE_INDICATORS = {
+    'has_school': ('S3_02', '==', 'Yes'),
+    'has_health': ('S3_03', '==', 'Yes'),
+    'has_market': ('S4_01', '==', 'Yes'),
+    'good_roads': ('S4_02_4', '==', 'Yes'),
+    'is_urban': ('UrbanRural', '==', 'Urban'),
+}
+
+ENRICHED_COLUMNS = ['vulnerability_score', 'vulnerability_level'] + list(VILLAGE_INDICATORS)
+
+
+def enriched_paths(source=VILLAGE_FILE, fmt=CACHE_FORMAT):
+    """Return (data_path, meta_path) of the enriched artifact for a survey file."""
+    stem = f'{source.stem}_enriched'
+    suffix = '.parquet' if fmt == 'parquet' else '.pkl'
+    return DERIVED_DIR / f'{stem}{suffix}', DERIVED_DIR / f'{stem}.meta.json'
+
+
+def definitions_fingerprint():
+    """Hash of the factor and indicator definitions the artifact was built with."""
+    spec = json.dumps([VULNERABILITY_FACTORS, VILLAGE_INDICATORS], sort_keys=True, default=str)
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+
+def village_indicators(df):
+    """0/1 int columns of VILLAGE_INDICATORS, aligned with `df`."""
+    return pd.DataFrame({name: factor_indicator(df[col], op, value).astype(int)
+                         for name, (col, op, value) in VILLAGE_INDICATORS.items()},
+                        index=df.index)
+
+
+def enrich_village(df):
+    """Attach the vulnerability index and indicator columns to `df` in place."""
+    vuln = vulnerability_index(df)
+    df['vulnerability_score'] = vuln['vulnerability_score']
+    df['vulnerability_level'] = vuln['vulnerability_level']
+    for name, values in village_indicators(df).items():
+        df[name] = values
+    return df
+
+
+def write_enriched_village(df, source=VILLAGE_FILE):
+    """Write an enriched village frame and its metadata to data/derived/."""
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    mixed = mixed_categoricals(df)
+    fmt = CACHE_FORMAT
+    data_path, meta_path = enriched_paths(source, fmt)
+    if fmt == 'parquet':
+        try:
+            write_parquet(df, data_path, mixed)
+        except (TypeError, ValueError):
+            fmt = 'pickle'
+            data_path = enriched_paths(source, fmt)[0]
+    if fmt == 'pickle':
+        write_atomic(data_path, lambda p: df.to_pickle(p))
+
+    st = source.stat()
+    write_meta(meta_path, {
+        'source': source.name,
+        'format': fmt,
+        'file': data_path.name,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': file_sha256(source),
+        'definitions': definitions_fingerprint(),
+        'rows': int(len(df)),
+        'columns': [str(c) for c in df.columns],
+        'mixed_categories': mixed if fmt == 'parquet' else {},
+    })
+    return data_path
+
+
+def _fresh(meta, source):
+    if not meta or meta.get('definitions') != definitions_fingerprint():
+        return False
+    if not (DERIVED_DIR / meta.get('file', '')).is_file():
+        return False
+    st = source.stat()
+    if meta.get('size') != st.st_size:
+        return False
+    return meta.get('mtime_ns') == st.st_mtime_ns or meta.get('sha256') == file_sha256(source)
+
+
+def load_enriched_village(columns=None, rebuild=False, source=VILLAGE_FILE):
+    """
+    Load the enriched village frame, rebuilding the artifact if it is stale.
+
+    `columns` limits the variables read (survey or derived columns).
+    """
+    meta = read_meta(enriched_paths(source)[1])
+    if rebuild or not _fresh(meta, source):
+        df = enrich_village(load_survey(source))
+        write_enriched_village(df, source)
+        return df if columns is None else df[list(columns)]
+
+    data_path = DERIVED_DIR / meta['file']
+    if meta['format'] != 'parquet':
+        df = pd.read_pickle(data_path)
+        return df if columns is None else df[list(columns)]
+    df = pd.read_parquet(data_path, columns=list(columns) if columns is not None else None)
+    for col, cats in meta.get('mixed_categories', {}).items():
+        if col in df.columns:
+            df[col] = df[col].cat.rename_categories(cats)
+    return df
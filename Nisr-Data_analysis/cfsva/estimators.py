@@ -0,0 +1,144 @@
+"""
+Vectorised (weighted) survey estimators.
+
+Every variable is integer-coded once and all cells of all requested tables
+are accumulated with a single `np.bincount` call, instead of one groupby or
+pivot_table per variable. Missing values are masked once per variable.
+
+`weight` is a column name, an array, or None (unweighted: every row counts
+1). Rows with a missing weight count as 0, like `groupby(...).sum()` does.
+`by` is a column name, an array/Series aligned with the frame, or None for
+national figures.
+
+Label order follows the in-memory pandas helpers: category order for
+categoricals, sorted order otherwise, observed labels only.
+"""
+
+import numpy as np
+import pandas as pd
+
+NATIONAL = 'All'
+
+
+def encode(values):
+    """Integer codes (-1 for missing) and labels of a Series or array."""
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(dtype=np.int64), s.cat.categories
+    codes, labels = pd.factorize(s, sort=True)
+    return codes.astype(np.int64), labels
+
+
+def row_weights(df, weight):
+    """Per-row weights as floats (1 when `weight` is None, 0 where missing)."""
+    if weight is None:
+        return np.ones(len(df))
+    w = df[weight] if isinstance(weight, str) else weight
+    w = pd.to_numeric(pd.Series(np.asarray(w)), errors='coerce').to_numpy(dtype=float)
+    return np.nan_to_num(w, nan=0.0)
+
+
+def _groups(df, by):
+    """Group codes, labels and name; a single 'All' group when `by` is None."""
+    if by is None:
+        return np.zeros(len(df), dtype=np.int64), pd.Index([NATIONAL]), None
+    s = df[by] if isinstance(by, str) else by
+    name = by if isinstance(by, str) else getattr(by, 'name', None)
+    codes, labels = encode(s)
+    return codes, labels, name
+
+
+def weighted_counts(df, variables, by=None, weight=None):
+    """
+    Weighted counts of every label of every variable, in one bincount.
+
+    Returns {variable: DataFrame} with groups as rows and labels as columns
+    (a single 'All' row when `by` is None). Unobserved groups and labels are
+    dropped.
+    """
+    variables = [variables] if isinstance(variables, str) else list(variables)
+    g_codes, g_labels, g_name = _groups(df, by)
+    w = row_weights(df, weight)
+    n_groups = len(g_labels)
+
+    encoded = [encode(df[v]) for v in variables]
+    offsets = np.cumsum([0] + [len(labels) for _, labels in encoded])
+    n_cells = int(offsets[-1])
+
+    # One flat cell index per (row, variable): group * n_cells + offset + label code
+    valid_g = g_codes >= 0
+    idx, wts, ones = [], [], []
+    for (codes, _), offset in zip(encoded, offsets[:-1]):
+        valid = valid_g & (codes >= 0)
+        idx.append(g_codes[valid] * n_cells + offset + codes[valid])
+        wts.append(w[valid])
+    idx = np.concatenate(idx) if idx else np.empty(0, dtype=np.int64)
+    size = n_groups * n_cells
+    sums = np.bincount(idx, weights=np.concatenate(wts) if wts else None, minlength=size)
+    hits = np.bincount(idx, minlength=size)
+    sums = sums.reshape(n_groups, n_cells)
+    hits = hits.reshape(n_groups, n_cells)
+
+    observed_groups = hits.sum(axis=1) > 0
+    out = {}
+    for v, (_, labels), start, stop in zip(variables, encoded, offsets[:-1], offsets[1:]):
+        block = sums[:, start:stop]
+        seen = hits[:, start:stop].sum(axis=0) > 0
+        table = pd.DataFrame(block[observed_groups][:, seen],
+                             index=pd.Index(g_labels[observed_groups], name=g_name),
+                             columns=pd.Index(labels[seen], name=v))
+        out[v] = table
+    return out
+
+
+def weighted_proportions(df, variables, by=None, weight=None):
+    """
+    Weighted percentage distribution (0-100) of each variable.
+
+    Returns {variable: Series} when `by` is None, otherwise
+    {variable: DataFrame} with one row of percentages per group.
+    """
+    counts = weighted_counts(df, variables, by=by, weight=weight)
+    out = {}
+    for v, table in counts.items():
+        pct = table.div(table.sum(axis=1), axis=0) * 100
+        out[v] = pct.iloc[0].rename(None) if by is None else pct
+    return out
+
+
+def weighted_means(df, variables, by=None, weight=None):
+    """
+    Weighted means of numeric variables, ignoring missing values per variable.
+
+    Returns a Series (variable -> mean) when `by` is None, otherwise a
+    DataFrame with groups as rows and variables as columns.
+    """
+    variables = [variables] if isinstance(variables, str) else list(variables)
+    g_codes, g_labels, g_name = _groups(df, by)
+    w = row_weights(df, weight)
+    n_groups, k = len(g_labels), len(variables)
+
+    x = np.column_stack([pd.to_numeric(df[v], errors='coerce').to_numpy(dtype=float) for v in variables]) \
+        if k else np.empty((len(df), 0))
+    mask = ~np.isnan(x) & (g_codes >= 0)[:, None]
+    wx = np.where(mask, x * w[:, None], 0.0)
+    wm = np.where(mask, w[:, None], 0.0)
+
+    # Flat (group, variable) cells: one bincount for numerators, one for denominators
+    cell = (np.clip(g_codes, 0, None)[:, None] * k + np.arange(k)).ravel()
+    num = np.bincount(cell, weights=wx.ravel(), minlength=n_groups * k).reshape(n_groups, k)
+    den = np.bincount(cell, weights=wm.ravel(), minlength=n_groups * k).reshape(n_groups, k)
+    hits = np.bincount(cell, weights=mask.ravel().astype(float), minlength=n_groups * k).reshape(n_groups, k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = num / den
+
+    if by is None:
+        return pd.Series(means[0], index=variables)
+    observed = hits.sum(axis=1) > 0
+    return pd.DataFrame(means[observed], index=pd.Index(g_labels[observed], name=g_name),
+                        columns=variables)
+
+
+def weighted_crosstab(df, row_var, col_var, weight=None):
+    """Row-normalised weighted crosstab (percentages), like create_crosstab()."""
+    return weighted_proportions(df, [col_var], by=row_var, weight=weight)[col_var]
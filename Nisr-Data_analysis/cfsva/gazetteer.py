@@ -0,0 +1,284 @@
+"""
+Gazetteer of Rwandan administrative units for joining names across sources.
+
+Survey labels (`S0_C_Prov`, `S0_D_Dist`), GADM boundary names (`NAME_1`,
+`NAME_2`) and hand-typed names rarely agree character for character. The
+gazetteer holds one entry per unit with a canonical id (the NISR code:
+province 1-5, district 11-57), its parent, codes from other sources (GADM
+`GID_2`, HASC) and every known spelling. Lookups are a dict hit on the
+normalised name; names that miss fall back to fuzzy matching on character
+trigrams + edit distance and return a confidence score. A typo in a short
+name ('Rusisi') scores low on trigrams, so a name within MAX_EDITS edits of
+exactly one unit also matches.
+
+`load_gazetteer()` builds the index once from the survey value labels, the
+district boundaries and ALIASES and keeps it in `data/derived/gazetteer.json`;
+later runs read that file unless a source changed. Lower admin levels
+(sector, cell) can be added with `Gazetteer.add()` and are resolved within
+their parent, since their names repeat across districts.
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from collections import namedtuple
+from pathlib import Path
+
+from .loader import DATA_DIR, VILLAGE_FILE, file_sha256, read_meta, write_meta
+from .stata import read_dta_header
+
+GAZETTEER_VERSION = 1
+GAZETTEER_FILE = DATA_DIR / 'derived' / 'gazetteer.json'
+BOUNDARIES_FILE = (Path(__file__).resolve().parents[2] / 'nisr-frontend' / 'src' / 'components'
+                   / 'rwanda_districts.json')
+
+LEVELS = ('province', 'district', 'sector', 'cell', 'village')
+# Minimum confidence for a fuzzy match
+FUZZY_THRESHOLD = 0.8
+# Below the threshold, a name still matches the one unit it is nearest to, if
+# within this many edits: 1 for names of up to SHORT_NAME letters, else 2
+SHORT_NAME = 5
+MAX_EDITS = (1, 2)
+# Unit-type words dropped from a name that has no exact match ('Gicumbi District')
+TYPE_SUFFIXES = ('province', 'district', 'sector', 'cell', 'village', 'akarere', 'umurenge')
+
+# Other names in use: Kinyarwanda province names (as in GADM) and the former
+# prefecture / town names still found in older datasets.
+ALIASES = {
+    'province': {
+        'Kigali city': ['Umujyi wa Kigali', 'City of Kigali', 'Kigali'],
+        'Northern': ['Amajyaruguru', 'North', 'Northern Province'],
+        'Southern': ['Amajyepfo', 'South', 'Southern Province'],
+        'Eastern': ['Iburasirazuba', 'East', 'Eastern Province'],
+        'Western': ['Iburengerazuba', 'West', 'Western Province'],
+    },
+    'district': {
+        'Huye': ['Butare'],
+        'Musanze': ['Ruhengeri'],
+        'Rubavu': ['Gisenyi'],
+        'Rusizi': ['Cyangugu', 'Rusisi'],
+        'Nyamagabe': ['Gikongoro'],
+        'Muhanga': ['Gitarama'],
+        'Karongi': ['Kibuye'],
+        'Gicumbi': ['Byumba'],
+        'Burera': ['Bulera'],
+        'Ngoma': ['Kibungo'],
+    },
+}
+
+Match = namedtuple('Match', ['id', 'name', 'score', 'method'])
+
+
+def normalize(name):
+    """Casefolded ASCII letters and digits only ('Kigali City' -> 'kigalicity')."""
+    if name is None:
+        return ''
+    n = unicodedata.normalize('NFKD', str(name))
+    n = n.encode('ascii', 'ignore').decode('ascii').casefold()
+    return re.sub(r'[^0-9a-z]+', '', n)
+
+
+def _trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def similarity(a, b):
+    """Mean of trigram Dice overlap and normalised edit similarity of two keys."""
+    if not a or not b:
+        return 0.0
+    ta, tb = _trigrams(a), _trigrams(b)
+    dice = 2 * len(ta & tb) / (len(ta) + len(tb))
+    edit = 1 - _edit_distance(a, b) / max(len(a), len(b))
+    return (dice + edit) / 2
+
+
+class Gazetteer:
+    """Admin units with an exact-name index and a fuzzy fallback."""
+
+    def __init__(self, units=None):
+        self.units = {}
+        self._index = {}      # (level, parent, key) -> id; parent None = national scope
+        self._ambiguous = set()
+        self._trigram = {}    # (level, trigram) -> {key}
+        self._memo = {}
+        for unit in units or []:
+            self.add(**unit)
+
+    def add(self, level, id, name, parent=None, aliases=(), codes=None):
+        """Register a unit (or extra spellings / codes of an existing one)."""
+        if level not in LEVELS:
+            raise ValueError(f"Unknown admin level {level!r}")
+        id = str(id)
+        unit = self.units.setdefault(id, {'id': id, 'level': level, 'name': name,
+                                          'parent': None if parent is None else str(parent),
+                                          'aliases': [], 'codes': {}})
+        for alias in aliases:
+            if alias != unit['name'] and alias not in unit['aliases']:
+                unit['aliases'].append(alias)
+        unit['codes'].update(codes or {})
+        for spelling in [unit['name']] + unit['aliases']:
+            self._index_key(unit, normalize(spelling))
+        self._memo.clear()
+        return unit
+
+    def _index_key(self, unit, key):
+        if not key:
+            return
+        level, parent = unit['level'], unit['parent']
+        self._index[(level, parent, key)] = unit['id']
+        national = (level, None, key)
+        if national in self._index and self._index[national] != unit['id']:
+            self._ambiguous.add(national)
+        elif national not in self._ambiguous:
+            self._index[national] = unit['id']
+        for gram in _trigrams(key):
+            self._trigram.setdefault((level, gram), set()).add(key)
+
+    def lookup(self, name, level='district', parent=None):
+        """
+        Best Match for `name` at `level`, or None.
+
+        Exact and alias hits score 1.0; otherwise the most similar known
+        spelling is returned when its similarity reaches FUZZY_THRESHOLD.
+        `parent` (an id) restricts the search to units under that parent.
+        """
+        key = normalize(name)
+        parent = None if parent is None else str(parent)
+        memo_key = (key, level, parent)
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        match = None
+        keys = [key] + [key[:-len(w)] for w in TYPE_SUFFIXES if key.endswith(w) and len(key) > len(w)]
+        for k in keys:
+            scope = (level, parent, k)
+            if scope in self._index and scope not in self._ambiguous:
+                unit = self.units[self._index[scope]]
+                method = 'exact' if normalize(unit['name']) == k else 'alias'
+                match = Match(unit['id'], unit['name'], 1.0, method)
+                break
+        if match is None and key:
+            match = self._fuzzy(keys[-1], level, parent)
+        self._memo[memo_key] = match
+        return match
+
+    def _fuzzy(self, key, level, parent):
+        candidates = set()
+        for gram in _trigrams(key):
+            candidates |= self._trigram.get((level, gram), set())
+        best = None
+        for cand in candidates:
+            index_key = (level, parent, cand)
+            if index_key not in self._index or index_key in self._ambiguous:
+                continue
+            score = similarity(key, cand)
+            if best is None or score > best[0]:
+                best = (score, self._index[index_key])
+        if best is None or best[0] < FUZZY_THRESHOLD:
+            best = self._nearest_within_edits(key, level, parent)
+        if best is None:
+            return None
+        unit = self.units[best[1]]
+        return Match(unit['id'], unit['name'], round(best[0], 3), 'fuzzy')
+
+    def _nearest_within_edits(self, key, level, parent):
+        """(similarity, id) of the only unit nearest to `key` within MAX_EDITS, else None."""
+        limit = MAX_EDITS[len(key) > SHORT_NAME]
+        nearest = {}        # id -> (edits, similarity) of its closest spelling
+        for index_key, uid in self._index.items():
+            lvl, par, cand = index_key
+            if lvl != level or par != parent or index_key in self._ambiguous or abs(len(cand) - len(key)) > limit:
+                continue
+            edits = _edit_distance(key, cand)
+            if edits <= limit and (uid not in nearest or edits < nearest[uid][0]):
+                nearest[uid] = (edits, similarity(key, cand))
+        if not nearest:
+            return None
+        edits = min(e for e, _ in nearest.values())
+        ties = [uid for uid, (e, _) in nearest.items() if e == edits]
+        if len(ties) > 1:
+            return None
+        return nearest[ties[0]][1], ties[0]
+
+    def resolve(self, names, level='district', parent=None):
+        """{name: Match or None} for an iterable of names (each distinct name resolved once)."""
+        return {name: self.lookup(name, level, parent) for name in dict.fromkeys(names)}
+
+    def to_dict(self):
+        return {'version': GAZETTEER_VERSION, 'units': list(self.units.values())}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['units'])
+
+
+def _survey_labels(survey):
+    """S0_C_Prov / S0_D_Dist value labels, read from the .dta header only."""
+    labels = read_dta_header(survey)['value_labels']
+    return labels['S0_C_Prov'], labels['S0_D_Dist']
+
+
+def _sources_fingerprint(survey, boundaries):
+    spec = json.dumps([GAZETTEER_VERSION, ALIASES, LEVELS, _survey_labels(survey)], sort_keys=True)
+    digest = hashlib.sha256(spec.encode('utf-8'))
+    if boundaries is not None and Path(boundaries).exists():
+        digest.update(file_sha256(boundaries).encode('ascii'))
+    return digest.hexdigest()
+
+
+def build_gazetteer(survey=VILLAGE_FILE, boundaries=BOUNDARIES_FILE):
+    """
+    Build the province/district gazetteer.
+
+    Provinces and districts come from the survey's S0_C_Prov / S0_D_Dist
+    value labels (a district's province is the first digit of its code),
+    spellings from ALIASES and the GADM boundary names, and the GADM / HASC
+    codes from the boundary file.
+    """
+    gaz = Gazetteer()
+    provinces, districts = _survey_labels(survey)
+    for code, name in sorted(provinces.items()):
+        gaz.add('province', code, name, aliases=ALIASES['province'].get(name, []))
+    for code, name in sorted(districts.items()):
+        gaz.add('district', code, name, parent=code // 10, aliases=ALIASES['district'].get(name, []))
+
+    if boundaries is not None and Path(boundaries).exists():
+        with open(boundaries, 'r', encoding='utf-8') as f:
+            features = json.load(f).get('features', [])
+        for feat in features:
+            props = feat.get('properties', {})
+            match = gaz.lookup(props.get('NAME_2'), 'district')
+            if match is None:
+                continue
+            unit = gaz.units[match.id]
+            gaz.add('district', unit['id'], unit['name'], parent=unit['parent'],
+                    aliases=[props['NAME_2']], codes={'gadm': props.get('GID_2'), 'hasc': props.get('HASC_2')})
+            province = gaz.lookup(props.get('NAME_1'), 'province')
+            if province is not None and province.id == unit['parent']:
+                gaz.add('province', province.id, province.name, aliases=[props['NAME_1']],
+                        codes={'gadm': props.get('GID_1')})
+    return gaz
+
+
+def load_gazetteer(rebuild=False, survey=VILLAGE_FILE, boundaries=BOUNDARIES_FILE, path=GAZETTEER_FILE):
+    """The gazetteer, read from `path` or rebuilt (and saved) when its sources changed."""
+    fingerprint = _sources_fingerprint(survey, boundaries)
+    data = None if rebuild else read_meta(path)
+    if data and data.get('fingerprint') == fingerprint:
+        return Gazetteer.from_dict(data)
+    gaz = build_gazetteer(survey, boundaries)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_meta(path, {'fingerprint': fingerprint, **gaz.to_dict()})
+    return gaz
@@ -0,0 +1,348 @@
+"""
+Shared loader for the CFSVA 2021 Stata files.
+
+Decoding a .dta file (value labels -> categoricals) is the slowest part of
+every analysis script, so each file is converted once into a columnar cache
+next to the source (`data/.cache/`). Later loads read the cache instead.
+
+The cache is keyed by the source file's size, mtime and SHA-256:
+ - size + mtime unchanged  -> cache is used without hashing the source
+ - mtime changed, same hash -> cache is reused and the new mtime recorded
+ - anything else           -> the .dta is decoded again and the cache rebuilt
+
+Parquet (pyarrow) is used when available; otherwise the cache falls back to
+pandas pickles, which also preserve categoricals.
+
+`load_survey(path, columns=[...], filters=[...])` reads only the requested
+columns and rows. On a Parquet cache both are pushed down to the reader; with
+`use_cache=False` the .dta is streamed in chunks so only the selected slice is
+ever held in memory.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+VILLAGE_FILE = DATA_DIR / 'CFSVA_2021_VILLAGE.dta'
+CHILD_FILE = DATA_DIR / 'CFSVAHH2021_UNDER_5_ChildWithMother.dta'
+HH_FILE = DATA_DIR / 'CFSVA_HH_2021_MASTER_DATASET.dta'
+
+CACHE_DIRNAME = '.cache'
+# Rows decoded per chunk when streaming a .dta without the cache
+STATA_CHUNKSIZE = 10_000
+# Bump when the cached representation changes so old caches are rebuilt
+CACHE_VERSION = 1
+
+
+def file_sha256(path, block_size=1 << 20):
+    """SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_dir(path, cache_dir=None):
+    return Path(cache_dir) if cache_dir else path.parent / CACHE_DIRNAME
+
+
+def cache_paths(path, cache_dir=None, fmt=CACHE_FORMAT):
+    """Return (data_path, meta_path) of the cache entry for a .dta file."""
+    path = Path(path).resolve()
+    cache_dir = _cache_dir(path, cache_dir)
+    suffix = '.parquet' if fmt == 'parquet' else '.pkl'
+    return cache_dir / f'{path.stem}{suffix}', cache_dir / f'{path.stem}.meta.json'
+
+
+def read_meta(meta_path):
+    """Parsed JSON sidecar, or None if it is missing or unreadable."""
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(path, writer):
+    """
+    Call writer(tmp_path), then move the result over `path` in one step.
+
+    Each call writes its own temp file in the target directory, so parallel
+    writers of the same entry never move each other's half-written files.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+    os.close(fd)
+    tmp = Path(tmp)
+    try:
+        writer(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_meta(meta_path, meta):
+    """Write a JSON sidecar atomically."""
+    write_atomic(meta_path, lambda p: p.write_text(json.dumps(meta, indent=2), encoding='utf-8'))
+
+
+def fresh_meta(path, meta_path):
+    """
+    Return the cache metadata if the entry still matches the source file,
+    refreshing the recorded mtime when only that moved. Otherwise None.
+    """
+    meta = read_meta(meta_path)
+    if not meta or meta.get('version') != CACHE_VERSION:
+        return None
+    if not (meta_path.parent / meta.get('file', '')).is_file():
+        return None
+
+    st = path.stat()
+    if meta.get('size') != st.st_size:
+        return None
+    if meta.get('mtime_ns') == st.st_mtime_ns:
+        return meta
+
+    # Touched or re-checked-out file: only trust the cache if the content is identical
+    if meta.get('sha256') != file_sha256(path):
+        return None
+    meta['mtime_ns'] = st.st_mtime_ns
+    write_meta(meta_path, meta)
+    return meta
+
+
+def mixed_categoricals(df):
+    """
+    Categorical columns whose categories mix labels and raw codes (Stata
+    values without a value label), e.g. ['No', 'Yes', 2.0, 77.0].
+
+    Arrow cannot store those, so they are written with string categories and
+    the original categories are restored on read.
+    """
+    mixed = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and dtype.categories.dtype == object:
+            cats = list(dtype.categories)
+            if len({type(c) for c in cats}) > 1:
+                mixed[col] = cats
+    return mixed
+
+
+def write_parquet(df, data_path, mixed):
+    """Write `df` to Parquet, storing the `mixed_categoricals` as strings."""
+    if mixed:
+        df = df.copy(deep=False)
+        for col, cats in mixed.items():
+            df[col] = df[col].cat.rename_categories([str(c) for c in cats])
+    write_atomic(data_path, lambda p: df.to_parquet(p, index=False))
+
+
+def _write_cache(df, path, meta_path, cache_dir=None):
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    mixed = mixed_categoricals(df)
+    fmt = CACHE_FORMAT
+    if fmt == 'parquet':
+        data_path = cache_paths(path, cache_dir, 'parquet')[0]
+        try:
+            write_parquet(df, data_path, mixed)
+        except (TypeError, ValueError) as e:
+            # Anything Arrow still cannot represent goes to a pickle instead
+            print(f"Note: caching {path.name} as pickle ({e})")
+            fmt = 'pickle'
+    if fmt == 'pickle':
+        data_path = cache_paths(path, cache_dir, 'pickle')[0]
+        write_atomic(data_path, lambda p: df.to_pickle(p))
+
+    st = path.stat()
+    meta = {
+        'source': path.name,
+        'version': CACHE_VERSION,
+        'format': fmt,
+        'file': data_path.name,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': file_sha256(path),
+        'rows': int(len(df)),
+        'columns': [str(c) for c in df.columns],
+        'mixed_categories': mixed if fmt == 'parquet' else {},
+    }
+    write_meta(meta_path, meta)
+
+
+FILTER_OPS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+
+def _check_filters(filters):
+    filters = list(filters or [])
+    for f in filters:
+        if len(f) != 3 or f[1] not in FILTER_OPS:
+            raise ValueError(f"Invalid filter {f!r}: expected (column, op, value) with op in {FILTER_OPS}")
+    return filters
+
+
+def filter_mask(df, filters):
+    """
+    Boolean mask for (column, op, value) filters, ANDed together.
+
+    Same semantics as pyarrow filters: missing values never match.
+    """
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        s = df[col]
+        if op == '==':
+            m = s == value
+        elif op == '!=':
+            m = s != value
+        elif op == '<':
+            m = s < value
+        elif op == '<=':
+            m = s <= value
+        elif op == '>':
+            m = s > value
+        elif op == '>=':
+            m = s >= value
+        elif op == 'in':
+            m = s.isin(list(value))
+        else:
+            m = ~s.isin(list(value))
+        mask &= m.fillna(False).astype(bool) & s.notna()
+    return mask
+
+
+def _select(df, columns, filters):
+    if filters:
+        df = df.loc[filter_mask(df, filters)].reset_index(drop=True)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def _check_columns(available, wanted):
+    missing = [c for c in wanted if c not in set(available)]
+    if missing:
+        raise KeyError(f"Columns not in survey: {missing}")
+
+
+def _read_cache(meta, meta_path, columns=None, filters=None):
+    data_path = meta_path.parent / meta['file']
+    filters = filters or []
+    _check_columns(meta['columns'], list(columns or []) + [f[0] for f in filters])
+
+    if meta['format'] != 'parquet':
+        # Pickles have no pushdown: load, then slice
+        return _select(pd.read_pickle(data_path), columns, filters)
+
+    mixed = meta.get('mixed_categories', {})
+    pa_filters = None
+    if filters:
+        # Mixed categoricals are stored with stringified categories
+        pa_filters = []
+        for col, op, value in filters:
+            if col in mixed:
+                value = [str(v) for v in value] if op in ('in', 'not in') else str(value)
+            pa_filters.append((col, op, value))
+    df = pd.read_parquet(data_path, columns=columns, filters=pa_filters)
+    for col, cats in mixed.items():
+        if col in df.columns:
+            df[col] = df[col].cat.rename_categories(cats)
+    return df
+
+
+def _read_stata_sliced(path, columns, filters, chunksize=STATA_CHUNKSIZE):
+    """Stream a .dta in chunks, keeping only the requested columns and rows."""
+    read_cols = None
+    if columns is not None:
+        read_cols = list(dict.fromkeys(columns + [f[0] for f in filters]))
+
+    parts = []
+    with warnings.catch_warnings():
+        # Partially labelled variables get per-chunk categories; unified below
+        warnings.simplefilter('ignore', pd.errors.CategoricalConversionWarning)
+        with pd.read_stata(path, columns=read_cols, chunksize=chunksize) as reader:
+            for chunk in reader:
+                if filters:
+                    chunk = chunk.loc[filter_mask(chunk, filters)]
+                if columns is not None:
+                    chunk = chunk[columns]
+                parts.append(chunk)
+    return concat_chunks(parts)
+
+
+def concat_chunks(parts):
+    """Concatenate .dta chunks, unifying categoricals whose categories differ per chunk."""
+    if len(parts) == 1:
+        return parts[0].reset_index(drop=True)
+    unified = {}
+    for col in parts[0].columns:
+        if isinstance(parts[0][col].dtype, pd.CategoricalDtype):
+            dtypes = {str(p[col].dtype.categories.tolist()) for p in parts}
+            if len(dtypes) > 1:
+                unified[col] = union_categoricals([p[col] for p in parts], ignore_order=True)
+    df = pd.concat(parts, ignore_index=True)
+    for col, values in unified.items():
+        df[col] = pd.Categorical(values)
+    return df
+
+
+def load_survey(path, columns=None, filters=None, use_cache=True, cache_dir=None):
+    """
+    Load a CFSVA .dta file as a DataFrame, going through the columnar cache.
+
+    Returns the same frame as `pd.read_stata(path)` (categoricals decoded,
+    RangeIndex). `columns` limits the variables read and `filters` is a list
+    of (column, op, value) tuples, e.g. [('S0_C_Prov', '==', 'Eastern')],
+    with op one of ==, !=, <, <=, >, >=, in, not in. Filter columns do not
+    need to be in `columns`.
+
+    Pass `use_cache=False` to bypass the cache and stream the Stata file.
+    """
+    path = Path(path).resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"Missing file: {path}")
+    columns = list(columns) if columns is not None else None
+    filters = _check_filters(filters)
+
+    if not use_cache:
+        if columns is None and not filters:
+            return pd.read_stata(path)
+        return _read_stata_sliced(path, columns, filters)
+
+    meta_path = cache_paths(path, cache_dir)[1]
+    meta = fresh_meta(path, meta_path)
+    if meta:
+        return _read_cache(meta, meta_path, columns, filters)
+
+    df = pd.read_stata(path)
+    try:
+        _write_cache(df, path, meta_path, cache_dir)
+    except OSError as e:
+        # A read-only checkout should still be able to run the analysis
+        print(f"Warning: could not write cache for {path.name}: {e}")
+        return _select(df, columns, filters)
+    if columns is None and not filters:
+        return df
+    # Slice through the cache so cold and warm loads return the same frame
+    return _read_cache(read_meta(meta_path), meta_path, columns, filters)
+
+
+def clear_cache(path, cache_dir=None):
+    """Remove the cache entry for a .dta file, if any."""
+    for fmt in ('parquet', 'pickle'):
+        for p in cache_paths(path, cache_dir, fmt):
+            if p.exists():
+                p.unlink()
@@ -0,0 +1,90 @@
+"""
+Grouped child malnutrition rates (stunting, wasting, underweight).
+
+`malnutrition_rates()` computes every moderate/severe count, measured
+denominator, rate and the modal province for all groups in one grouped pass
+over the child file. The default grouping reproduces the schema of
+`child_nutrition/district_malnutrition_rates.csv`; any other admin column
+(sector, cell, village) can be passed as `by`.
+"""
+
+import numpy as np
+import pandas as pd
+
+# indicator column -> (count column prefix, moderate label, severe label)
+INDICATORS = {
+    'Stunting': ('Stunted', 'Moderately stunted', 'Severely stunted'),
+    'Wasting': ('Wasted', 'Moderately wasted', 'Severely wasted'),
+    'Underweight': ('Underweight', 'Moderately underweight', 'Severely underweight'),
+}
+
+RATE_COLUMNS = [f'{ind}_Rate' for ind in INDICATORS]
+
+
+def indicator_flags(df):
+    """
+    0/1 matrix of moderate, severe and measured flags for every indicator.
+
+    Columns are named '<prefix>_Moderate', '<prefix>_Severe' and
+    '<Indicator>_Measured'. Computed once and shared by the rate, variance
+    and cube code.
+    """
+    flags = {}
+    for indicator, (prefix, moderate, severe) in INDICATORS.items():
+        s = df[indicator]
+        flags[f'{prefix}_Moderate'] = (s == moderate).to_numpy(dtype=np.int64)
+        flags[f'{prefix}_Severe'] = (s == severe).to_numpy(dtype=np.int64)
+        flags[f'{indicator}_Measured'] = s.notna().to_numpy(dtype=np.int64)
+    return pd.DataFrame(flags, index=df.index)
+
+
+def modal_value(keys, values):
+    """
+    Most frequent non-missing `values` per group of `keys`.
+
+    Ties resolve like Series.mode()[0]: the first value in category (or
+    sorted) order. Groups with no value get NaN.
+    """
+    counts = pd.crosstab(keys, values)
+    modal = counts.idxmax(axis=1)
+    return modal.where(counts.sum(axis=1) > 0)
+
+
+def malnutrition_rates(df, by='S0_D_Dist', label='District', province_col='S0_C_Prov'):
+    """
+    Malnutrition counts and rates for every value of `by`, in one pass.
+
+    Returns one row per group (sorted by group name) with the columns of
+    district_malnutrition_rates.csv: label, Province, Total_Children,
+    Measured, then for each indicator the total, rate (%), moderate and
+    severe counts. Rates use the indicator's own measured denominator and
+    are 0 when nothing was measured.
+    """
+    keys = df[by]
+    valid = keys.notna().to_numpy()
+    keys = keys[valid].astype(str)
+
+    flags = indicator_flags(df.loc[valid])
+    flags['Total_Children'] = 1
+    sums = flags.groupby(keys.to_numpy(), sort=True).sum()
+
+    out = pd.DataFrame({label: sums.index})
+    if province_col and province_col in df.columns:
+        province = modal_value(keys, df.loc[valid, province_col])
+        out['Province'] = province.reindex(sums.index).fillna('Unknown').to_numpy()
+    out['Total_Children'] = sums['Total_Children'].to_numpy()
+    out['Measured'] = sums['Stunting_Measured'].to_numpy()
+
+    for indicator, (prefix, _, _) in INDICATORS.items():
+        moderate = sums[f'{prefix}_Moderate'].to_numpy()
+        severe = sums[f'{prefix}_Severe'].to_numpy()
+        measured = sums[f'{indicator}_Measured'].to_numpy()
+        total = moderate + severe
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(measured > 0, total / measured * 100, 0.0)
+        out[prefix] = total
+        out[f'{indicator}_Rate'] = rate
+        out[f'{prefix}_Moderate'] = moderate
+        out[f'{prefix}_Severe'] = severe
+
+    return out
@@ -0,0 +1,162 @@
+"""
+Small-area estimates of the malnutrition rates (Fay-Herriot model).
+
+Direct rates of small units are noisy. The area-level Fay-Herriot model
+treats each unit's direct rate y_i as its true rate plus sampling error
+(variance D_i), and the true rate as a regression on unit covariates plus a
+random effect (variance A):
+
+    y_i = x_i' beta + v_i + e_i,   v_i ~ N(0, A),   e_i ~ N(0, D_i)
+
+The EBLUP gamma_i * y_i + (1 - gamma_i) * x_i' beta, gamma_i = A / (A + D_i),
+shrinks noisy units towards the regression prediction and leaves precise
+ones close to their direct rate. MSEs use the Prasad-Rao / Datta-Lahiri
+approximation for REML (g1 + g2 + 2 g3).
+
+Covariates are unit means of the village file's 0/1 deficit indicators
+(cfsva.vulnerability): road access, cereal availability, cereal prices and
+wages. `fay_herriot()` fits all indicators together: REML Fisher scoring on
+(units x indicators) arrays, with the traces of the projection matrix
+expanded so no (units x units) matrix is formed.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .admin import unit_keys
+from .malnutrition import INDICATORS
+from .vulnerability import VULNERABILITY_FACTORS, indicator_matrix
+
+# Village deficit indicators (VULNERABILITY_FACTORS names) averaged per unit
+SAE_COVARIATES = ('poor_roads', 'low_cereals', 'high_cereal_prices', 'low_wage')
+# Levels with fewer units are not modelled (too few areas to fit beta and A)
+MIN_AREAS = 10
+
+
+def sae_levels(child_columns, village_columns):
+    """Admin levels present in both files, below province."""
+    return [level for level in child_columns
+            if level in village_columns and level != 'province']
+
+
+def area_covariates(village, columns, level, covariates=SAE_COVARIATES):
+    """Share of villages with each covariate deficit, one row per unit key."""
+    factors = {name: VULNERABILITY_FACTORS[name] for name in covariates}
+    matrix, _, names = indicator_matrix(village, factors)
+    keys = unit_keys(village, columns, level)
+    table = pd.DataFrame(matrix, columns=names, index=village.index)[keys.notna().to_numpy()]
+    return table.groupby(keys.dropna().to_numpy()).mean().rename_axis('Key')
+
+
+def smoothed_variances(rate, measured, se):
+    """
+    Sampling variances from a generalised variance function.
+
+    Direct SEs of small units are themselves unstable (a unit with no case
+    has SE 0), so D_i = deff * p (100 - p) / n_i, with p the overall rate
+    and deff the median design effect of units with 0 < rate < 100.
+    Arrays are (units x indicators), rates in %.
+    """
+    rate, n, se = (np.asarray(a, dtype=float) for a in (rate, measured, se))
+    n = np.broadcast_to(n.reshape(len(n), -1), rate.shape)
+    p = (rate * n).sum(axis=0) / n.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deff = se ** 2 / (rate * (100 - rate) / n)
+    deff = np.where((rate > 0) & (rate < 100) & np.isfinite(deff), deff, np.nan)
+    deff = np.nan_to_num(np.nanmedian(deff, axis=0), nan=1.0)
+    return deff * p * (100 - p) / n
+
+
+def fay_herriot(y, D, X, max_iter=100, tol=1e-8):
+    """
+    REML Fay-Herriot fit of every column of y (units x indicators).
+
+    `D` holds the sampling variances (same shape as y) and `X` the design
+    matrix (units x covariates, intercept included). Returns a dict of
+    (units x indicators) arrays 'estimate', 'mse', 'gamma', 'synthetic' and
+    per-indicator 'A' (random-effect variance) and 'beta' (indicators x
+    covariates).
+    """
+    y = np.asarray(y, dtype=float)
+    D = np.asarray(D, dtype=float)
+    X = np.asarray(X, dtype=float)
+    m, k = y.shape
+
+    # start from the OLS residual variance net of the mean sampling variance
+    coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+    A = np.maximum((y - X @ coef).var(axis=0) - D.mean(axis=0), D.mean(axis=0) * 0.1)
+
+    def gls(A):
+        W = 1.0 / (A + D)
+        XtWX = np.einsum('ip,ik,iq->kpq', X, W, X)
+        Q = np.linalg.inv(XtWX)
+        beta = np.einsum('kpq,iq,ik,ik->kp', Q, X, W, y)
+        return W, Q, beta
+
+    for _ in range(max_iter):
+        W, Q, beta = gls(A)
+        Py = W * (y - X @ beta.T)
+        XtW2X = np.einsum('ip,ik,iq->kpq', X, W ** 2, X)
+        XtW3X = np.einsum('ip,ik,iq->kpq', X, W ** 3, X)
+        QB = np.einsum('kpq,kqr->kpr', Q, XtW2X)
+        tr_p = W.sum(axis=0) - np.einsum('kpp->k', QB)
+        tr_pp = ((W ** 2).sum(axis=0) - 2 * np.einsum('kpq,kqp->k', Q, XtW3X)
+                 + np.einsum('kpq,kqp->k', QB, QB))
+        score = 0.5 * ((Py ** 2).sum(axis=0) - tr_p)
+        step = score / (0.5 * tr_pp)
+        A_new = np.maximum(A + step, 0.0)
+        done = np.all(np.abs(A_new - A) <= tol * np.maximum(1.0, A))
+        A = A_new
+        if done:
+            break
+
+    W, Q, beta = gls(A)
+    synthetic = X @ beta.T
+    gamma = A / (A + D)
+    estimate = gamma * y + (1 - gamma) * synthetic
+
+    g1 = gamma * D
+    g2 = (1 - gamma) ** 2 * np.einsum('ip,kpq,iq->ik', X, Q, X)
+    var_A = 2.0 / (W ** 2).sum(axis=0)
+    g3 = D ** 2 * W ** 3 * var_A
+    return {'estimate': estimate, 'mse': g1 + g2 + 2 * g3, 'gamma': gamma,
+            'synthetic': synthetic, 'A': A, 'beta': beta}
+
+
+def small_area_estimates(rates, covariates):
+    """
+    Fay-Herriot rates for a level_rates() table.
+
+    `covariates` is area_covariates() of the same level. Units without
+    covariates or measured children are left out of the fit and get NaN.
+    Returns one row per unit of `rates`: 'Key', 'Measured', then for each
+    indicator the direct rate, '<Indicator>_Rate_SAE', '_SAE_SE', '_SAE_MSE'
+    and '_Shrinkage' (1 - gamma: weight on the regression prediction).
+    """
+    rate_cols = [f'{ind}_Rate' for ind in INDICATORS]
+    X_all = covariates.reindex(rates['Key'].astype(str)).to_numpy(dtype=float)
+    fit = np.isfinite(X_all).all(axis=1) & (rates['Measured'].to_numpy() > 0)
+    # drop covariates that do not vary across the fitted units
+    varying = X_all[fit].std(axis=0) > 0
+    X = np.column_stack([np.ones(fit.sum()), X_all[fit][:, varying]])
+
+    y = rates.loc[fit, rate_cols].to_numpy(dtype=float)
+    D = smoothed_variances(y, rates.loc[fit, 'Measured'].to_numpy(),
+                           rates.loc[fit, [f'{c}_SE' for c in rate_cols]].to_numpy(dtype=float))
+    res = fay_herriot(y, D, X)
+
+    out = rates[['Key'] + [c for c in rates.columns[1:rates.columns.get_loc('Total_Children')]]
+                + ['Measured']].copy()
+    for j, (indicator, col) in enumerate(zip(INDICATORS, rate_cols)):
+        est = np.full(len(rates), np.nan)
+        mse = np.full(len(rates), np.nan)
+        shrink = np.full(len(rates), np.nan)
+        est[fit] = np.clip(res['estimate'][:, j], 0, 100)
+        mse[fit] = res['mse'][:, j]
+        shrink[fit] = 1 - res['gamma'][:, j]
+        out[col] = rates[col].to_numpy()
+        out[f'{col}_SAE'] = est
+        out[f'{col}_SAE_SE'] = np.sqrt(mse)
+        out[f'{col}_SAE_MSE'] = mse
+        out[f'{indicator}_Shrinkage'] = shrink
+    return out
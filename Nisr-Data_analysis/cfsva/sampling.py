@@ -0,0 +1,103 @@
+"""
+Stratified, reproducible row samples of the surveys for the frontend.
+
+Rows are drawn without replacement within each district (nested in its
+province) with a fixed seed. Allocation is proportional to stratum size,
+with at least one row per stratum when the sample is large enough, so every
+district shows up in the preview. Only the strata columns are decoded for
+the whole file; the remaining columns are read for the sampled rows only
+(see cfsva.stata).
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from .stata import read_dta_header, read_dta_rows
+from .vulnerability import VULNERABILITY_FACTORS
+
+SAMPLE_SIZE = 200
+SAMPLE_SEED = 2021
+STRATA = ('S0_C_Prov', 'S0_D_Dist')
+
+# Columns each frontend sample keeps, by survey file stem. The child sample
+# feeds the analytics page (clinic-visit heatmap and province indicator
+# matrix); the village sample keeps location plus the vulnerability factors.
+FRONTEND_COLUMNS = {
+    'CFSVAHH2021_UNDER_5_ChildWithMother': [
+        'S0_B_DATE', 'S0_C_Prov', 'S0_D_Dist', 'UrbanRural', 'S13_12',
+        'minimumDietaryDiversity', 'minimumMealFrequency', 'FCG', 'FCS', 'FS_final',
+    ],
+    'CFSVA_2021_VILLAGE': [
+        'S0_B_DATE', 'S0_C_Prov', 'S0_D_Dist', 'UrbanRural',
+    ] + list(dict.fromkeys(col for col, *_ in VULNERABILITY_FACTORS.values())),
+}
+
+
+def allocate(counts, size):
+    """
+    Rows to draw from each stratum (proportional, largest remainder).
+
+    Every non-empty stratum gets one row first when `size` allows it; no
+    stratum gets more rows than it has.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    size = min(int(size), int(counts.sum()))
+    alloc = np.zeros_like(counts)
+    if (counts > 0).sum() <= size:
+        alloc = (counts > 0).astype(np.int64)
+    while alloc.sum() < size:
+        room = counts - alloc
+        quota = room / room.sum() * (size - alloc.sum())
+        extra = np.minimum(np.floor(quota).astype(np.int64), room)
+        if extra.sum() == 0:
+            # hand out the rest by largest remainder
+            order = np.argsort(-(quota - np.floor(quota)), kind='stable')
+            order = order[room[order] > 0][:size - alloc.sum()]
+            extra[order] = 1
+        alloc += extra
+    return alloc
+
+
+def stratified_rows(strata, size, seed=SAMPLE_SEED):
+    """
+    Sorted row positions of a stratified random sample.
+
+    `strata` holds one integer stratum id per row.
+    """
+    strata = np.asarray(strata)
+    _, inverse, counts = np.unique(strata, return_inverse=True, return_counts=True)
+    alloc = allocate(counts, size)
+    # shuffle within strata: order rows by (stratum, random key), then keep
+    # the first alloc[stratum] of each
+    keys = np.random.default_rng(seed).random(len(strata))
+    order = np.lexsort((keys, inverse))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(len(strata)) - starts[inverse[order]]
+    return np.sort(order[rank < alloc[inverse[order]]])
+
+
+def stratified_sample(path, size=SAMPLE_SIZE, seed=SAMPLE_SEED, strata=STRATA, columns=None):
+    """
+    Stratified sample of a .dta file, decoding only what is needed.
+
+    `columns` defaults to FRONTEND_COLUMNS for the file (all variables for
+    unknown files); columns absent from the file are skipped.
+    """
+    path = Path(path)
+    header = read_dta_header(path)
+    names = [v['name'] for v in header['variables']]
+    if columns is None:
+        columns = FRONTEND_COLUMNS.get(path.stem, names)
+    columns = [c for c in columns if c in names]
+
+    strata = [c for c in strata if c in names]
+    if strata:
+        codes = read_dta_rows(path, np.arange(header['rows']), columns=strata, header=header,
+                              convert_categoricals=False)
+        codes = codes.fillna(-1).to_numpy(dtype=np.int64)
+        ids = np.unique(codes, axis=0, return_inverse=True)[1].ravel()
+    else:
+        ids = np.zeros(header['rows'], dtype=np.int64)
+    rows = stratified_rows(ids, size, seed)
+    return read_dta_rows(path, rows, columns=columns, header=header)
@@ -0,0 +1,467 @@
+"""
+Header-only access to Stata .dta files (formats 117, 118 and 119).
+
+`read_dta_header()` reads the row count, variable names, storage types,
+formats, variable labels and value-label tables by seeking through the
+file's <map> section. The data section is never decoded, so the cost does
+not depend on the number of rows.
+
+`read_dta_rows()` decodes only the requested rows: rows have a fixed width,
+so each one is located by offset in a memory map. Values are returned like
+`pd.read_stata()` would: value labels applied (as categoricals), Stata
+missing values as NaN, strings decoded.
+
+`dta_metadata()` combines both into the per-column summary written to the
+frontend `*_meta.json` files.
+
+Older releases (113-115, e.g. pandas' own to_stata() default 114) are read
+through pandas' StataReader instead: the header and value labels from
+`pd.read_stata(iterator=True)`, and the requested rows by streaming the data
+in chunks. Same results, without the header-only speed-up.
+"""
+
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SUPPORTED_RELEASES = (117, 118, 119)
+# Rows decoded per chunk when a release is read through pandas
+FALLBACK_CHUNKSIZE = 10_000
+
+# Stata storage type code -> (name, numpy dtype char, missing threshold)
+NUMERIC_TYPES = {
+    65530: ('byte', 'i1', 100),
+    65529: ('int', 'i2', 32740),
+    65528: ('long', 'i4', 2147483620),
+    65527: ('float', 'f4', struct.unpack('<f', b'\xff\xff\xff\x7e')[0]),
+    65526: ('double', 'f8', struct.unpack('<d', b'\xff\xff\xff\xff\xff\xff\xdf\x7f')[0]),
+}
+STRL_TYPE = 32768
+
+# Offsets of the sections listed in <map>, in file order
+MAP_SECTIONS = ('stata_data', 'map', 'variable_types', 'varnames', 'sortlist', 'formats',
+                'value_label_names', 'variable_labels', 'characteristics', 'data', 'strls',
+                'value_labels', 'stata_data_close', 'eof')
+
+
+class StataFormatError(ValueError):
+    """The file is not a .dta in a supported format."""
+
+
+class _UnsupportedRelease(StataFormatError):
+    """A .dta release this module does not parse itself."""
+
+
+def _layout(release):
+    """Field widths that differ between format releases."""
+    if release == 117:
+        return {'nvar': 2, 'nobs': 4, 'label_len': 1, 'name': 33, 'format': 49,
+                'varlabel': 81, 'encoding': 'latin-1'}
+    return {'nvar': 4 if release == 119 else 2, 'nobs': 8, 'label_len': 2, 'name': 129,
+            'format': 57, 'varlabel': 321, 'encoding': 'utf-8'}
+
+
+class _Reader:
+    def __init__(self, f):
+        self.f = f
+        self.order = '<'
+
+    def expect(self, tag):
+        got = self.f.read(len(tag))
+        if got != tag:
+            raise StataFormatError(f"Expected {tag!r}, found {got!r}")
+
+    def until(self, tag):
+        """Bytes up to the next `tag` (consumed)."""
+        buf = b''
+        while not buf.endswith(tag):
+            ch = self.f.read(1)
+            if not ch:
+                raise StataFormatError(f"Missing {tag!r}")
+            buf += ch
+        return buf[:-len(tag)]
+
+    def uint(self, size):
+        fmt = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}[size]
+        return struct.unpack(self.order + fmt, self.f.read(size))[0]
+
+    def cstrings(self, count, width, encoding):
+        raw = self.f.read(count * width)
+        return [raw[i * width:(i + 1) * width].split(b'\0', 1)[0].decode(encoding, errors='replace')
+                for i in range(count)]
+
+
+def _read_value_labels(r, offset, end, layout):
+    """Parse every <lbl> table between `offset` and `end`."""
+    r.f.seek(offset)
+    r.expect(b'<value_labels>')
+    tables = {}
+    while r.f.tell() < end:
+        tag = r.f.read(5)
+        if tag != b'<lbl>':
+            break
+        r.uint(4)  # table length
+        name = r.cstrings(1, layout['name'], layout['encoding'])[0]
+        r.f.read(3)  # padding
+        n = r.uint(4)
+        txt_len = r.uint(4)
+        offsets = np.frombuffer(r.f.read(4 * n), dtype=r.order + 'u4')
+        values = np.frombuffer(r.f.read(4 * n), dtype=r.order + 'i4')
+        txt = r.f.read(txt_len)
+        labels = {}
+        for value, start in zip(values.tolist(), offsets.tolist()):
+            labels[value] = txt[start:txt.index(b'\0', start)].decode(layout['encoding'], errors='replace')
+        tables[name] = labels
+        r.expect(b'</lbl>')
+    return tables
+
+
+def read_dta_header(path, value_labels=True):
+    """
+    Header, variable dictionary and value labels of a .dta file.
+
+    Returns a dict with 'release', 'byteorder', 'rows', 'data_label',
+    'timestamp', 'variables' (list of {name, type, format, value_label,
+    label}), 'value_labels' ({table: {code: label}}) and the internal
+    'offsets' / 'row_width' used by read_dta_rows().
+    """
+    path = Path(path)
+    try:
+        return _read_header(path, value_labels)
+    except _UnsupportedRelease:
+        return _header_via_pandas(path)
+
+
+def _read_header(path, value_labels):
+    with open(path, 'rb') as f:
+        r = _Reader(f)
+        if f.read(len(b'<stata_dta>')) != b'<stata_dta>':
+            # releases up to 115 start with a binary header
+            raise _UnsupportedRelease(f"{path.name}: not an XML-style .dta")
+        r.expect(b'<header><release>')
+        try:
+            release = int(r.until(b'</release>'))
+        except ValueError:
+            raise StataFormatError(f"{path.name}: unreadable release") from None
+        if release not in SUPPORTED_RELEASES:
+            raise _UnsupportedRelease(f"{path.name}: .dta release {release} not supported "
+                                      f"(expected one of {SUPPORTED_RELEASES})")
+        layout = _layout(release)
+        r.expect(b'<byteorder>')
+        byteorder = r.until(b'</byteorder>').decode()
+        r.order = '<' if byteorder == 'LSF' else '>'
+        r.expect(b'<K>')
+        nvar = r.uint(layout['nvar'])
+        r.expect(b'</K><N>')
+        nobs = r.uint(layout['nobs'])
+        r.expect(b'</N><label>')
+        data_label = r.f.read(r.uint(layout['label_len'])).decode(layout['encoding'], errors='replace')
+        r.expect(b'</label><timestamp>')
+        timestamp = r.f.read(r.uint(1)).decode(layout['encoding'], errors='replace')
+        r.expect(b'</timestamp></header><map>')
+        offsets = dict(zip(MAP_SECTIONS, (r.uint(8) for _ in MAP_SECTIONS)))
+
+        f.seek(offsets['variable_types'] + len(b'<variable_types>'))
+        types = [r.uint(2) for _ in range(nvar)]
+        f.seek(offsets['varnames'] + len(b'<varnames>'))
+        names = r.cstrings(nvar, layout['name'], layout['encoding'])
+        f.seek(offsets['formats'] + len(b'<formats>'))
+        formats = r.cstrings(nvar, layout['format'], layout['encoding'])
+        f.seek(offsets['value_label_names'] + len(b'<value_label_names>'))
+        label_names = r.cstrings(nvar, layout['name'], layout['encoding'])
+        f.seek(offsets['variable_labels'] + len(b'<variable_labels>'))
+        var_labels = r.cstrings(nvar, layout['varlabel'], layout['encoding'])
+
+        tables = {}
+        if value_labels:
+            tables = _read_value_labels(r, offsets['value_labels'], offsets['stata_data_close'], layout)
+
+    variables = []
+    for name, code, fmt, lbl, label in zip(names, types, formats, label_names, var_labels):
+        if code in NUMERIC_TYPES:
+            type_name = NUMERIC_TYPES[code][0]
+        elif code == STRL_TYPE:
+            type_name = 'strL'
+        else:
+            type_name = f'str{code}'
+        variables.append({'name': name, 'type': type_name, 'code': code, 'format': fmt,
+                          'value_label': lbl or None, 'label': label})
+
+    return {
+        'release': release,
+        'byteorder': byteorder,
+        'rows': nobs,
+        'data_label': data_label,
+        'timestamp': timestamp,
+        'variables': variables,
+        'value_labels': tables,
+        'offsets': offsets,
+        'row_width': sum(_width(v['code'], layout) for v in variables),
+    }
+
+
+# StataReader type codes of numeric variables -> NUMERIC_TYPES codes
+_PANDAS_NUMERIC = {'b': 65530, 'h': 65529, 'l': 65528, 'f': 65527, 'd': 65526}
+
+
+def _header_via_pandas(path):
+    """read_dta_header() result for releases parsed by pandas' StataReader."""
+    try:
+        with pd.read_stata(path, iterator=True) as reader:
+            var_labels = reader.variable_labels()
+            tables = reader.value_labels()
+            data_label, timestamp = reader.data_label, reader.time_stamp
+            # StataReader has no public accessors for these; they are filled
+            # in by the header read above
+            release = reader._format_version
+            byteorder = 'LSF' if reader._byteorder == '<' else 'MSF'
+            nobs = reader._nobs
+            types, formats, label_names = reader._typlist, reader._fmtlist, reader._lbllist
+    except (ValueError, AttributeError) as e:
+        raise StataFormatError(f"{path.name}: {e}") from None
+
+    variables = []
+    for (name, label), typ, fmt, lbl in zip(var_labels.items(), types, formats, label_names):
+        code = _PANDAS_NUMERIC.get(typ, typ)  # strings: the width, as in release 117+
+        type_name = NUMERIC_TYPES[code][0] if code in NUMERIC_TYPES else f'str{code}'
+        variables.append({'name': name, 'type': type_name, 'code': code, 'format': fmt,
+                          'value_label': lbl or None, 'label': label})
+    return {
+        'release': release,
+        'byteorder': byteorder,
+        'rows': nobs,
+        'data_label': data_label,
+        'timestamp': timestamp,
+        'variables': variables,
+        'value_labels': tables,
+        'offsets': None,        # no header-only access: read_dta_rows() streams through pandas
+        'row_width': None,
+    }
+
+
+def _read_rows_via_pandas(path, rows, columns):
+    """Raw values (no value labels, missing as NaN) of `rows`, streamed in chunks."""
+    wanted = np.unique(rows)
+    parts = []
+    start = 0
+    with pd.read_stata(path, iterator=True, chunksize=FALLBACK_CHUNKSIZE, columns=columns,
+                       convert_categoricals=False, convert_dates=False) as reader:
+        for chunk in reader:
+            stop = start + len(chunk)
+            parts.append(chunk.iloc[wanted[(wanted >= start) & (wanted < stop)] - start])
+            start = stop
+            if not wanted.size or start > wanted[-1]:
+                break
+    frame = pd.concat(parts, ignore_index=True)
+    return frame.iloc[np.searchsorted(wanted, rows)].reset_index(drop=True)
+
+
+def _width(code, layout):
+    if code in NUMERIC_TYPES:
+        return np.dtype(NUMERIC_TYPES[code][1]).itemsize
+    if code == STRL_TYPE:
+        return 8  # (v, o) reference
+    return code
+
+
+def _row_dtype(header):
+    layout = _layout(header['release'])
+    order = '<' if header['byteorder'] == 'LSF' else '>'
+    fields = []
+    for v in header['variables']:
+        code = v['code']
+        if code in NUMERIC_TYPES:
+            fields.append((v['name'], order + NUMERIC_TYPES[code][1]))
+        else:
+            fields.append((v['name'], f'S{_width(code, layout)}'))
+    return np.dtype(fields)
+
+
+def _strls(path, header):
+    """(v, o) -> string for every strL in the file (read only when needed)."""
+    layout = _layout(header['release'])
+    offsets = header['offsets']
+    out = {}
+    with open(path, 'rb') as f:
+        r = _Reader(f)
+        r.order = '<' if header['byteorder'] == 'LSF' else '>'
+        f.seek(offsets['strls'] + len(b'<strls>'))
+        while f.tell() < offsets['value_labels'] and f.read(3) == b'GSO':
+            v = r.uint(4)
+            o = r.uint(8 if header['release'] >= 118 else 4)
+            binary = r.uint(1) == 129
+            data = f.read(r.uint(4))
+            out[(v, o)] = data if binary else data.rstrip(b'\0').decode(layout['encoding'], errors='replace')
+    return out
+
+
+def _strl_keys(raw, header):
+    """Decode packed (v, o) strL references."""
+    order = '<' if header['byteorder'] == 'LSF' else '>'
+    if header['release'] == 117:
+        refs = np.frombuffer(raw.tobytes(), dtype=order + 'u4').reshape(-1, 2)
+        return [tuple(x) for x in refs.tolist()]
+    # 118: v is 2 bytes and o 6; 119: v is 3 bytes and o 5
+    split = 2 if header['release'] == 118 else 3
+    endian = 'little' if order == '<' else 'big'
+    return [(int.from_bytes(b[:split], endian), int.from_bytes(b[split:8], endian))
+            for b in (x.ljust(8, b'\0') for x in raw.tolist())]
+
+
+def read_dta_rows(path, rows, columns=None, header=None, convert_categoricals=True):
+    """
+    Decode only `rows` (0-based positions) of a .dta file.
+
+    `columns` limits the variables returned. Labelled variables become
+    categoricals of the codes present among the rows read, renamed through
+    the value-label table, as read_stata() does for the same rows.
+    """
+    path = Path(path)
+    header = header or read_dta_header(path)
+    rows = np.asarray(rows, dtype=np.int64)
+    if rows.size and (rows.min() < 0 or rows.max() >= header['rows']):
+        raise IndexError(f"Row positions must be in [0, {header['rows']})")
+    by_name = {v['name']: v for v in header['variables']}
+    columns = list(columns) if columns is not None else list(by_name)
+    missing = [c for c in columns if c not in by_name]
+    if missing:
+        raise KeyError(f"Columns not in {path.name}: {missing}")
+    if header['offsets'] is None:
+        out = _read_rows_via_pandas(path, rows, columns)
+        if convert_categoricals:
+            for name in columns:
+                labels = header['value_labels'].get(by_name[name]['value_label'] or '')
+                if labels:
+                    out[name] = _labelled(out[name], labels)
+        return out
+    layout = _layout(header['release'])
+
+    start = header['offsets']['data'] + len(b'<data>')
+    table = np.memmap(path, dtype=_row_dtype(header), mode='r', offset=start, shape=(header['rows'],))
+    picked = np.array(table[rows])  # only these rows are paged in
+    del table
+
+    strls = None
+    out = {}
+    for name in columns:
+        v = by_name[name]
+        raw = picked[name]
+        if v['code'] in NUMERIC_TYPES:
+            threshold = NUMERIC_TYPES[v['code']][2]
+            values = raw.astype(raw.dtype.newbyteorder('='))
+            is_missing = values > threshold
+            if is_missing.any():
+                values = values.astype('f8')
+                values[is_missing] = np.nan
+            s = pd.Series(values, name=name)
+            labels = header['value_labels'].get(v['value_label']) if v['value_label'] else None
+            if convert_categoricals and labels:
+                s = _labelled(s, labels)
+        elif v['code'] == STRL_TYPE:
+            strls = _strls(path, header) if strls is None else strls
+            s = pd.Series([strls.get(k, '') for k in _strl_keys(raw, header)], name=name, dtype=object)
+        else:
+            s = pd.Series([b.split(b'\0', 1)[0].decode(layout['encoding'], errors='replace')
+                           for b in raw.tolist()], name=name, dtype=object)
+        out[name] = s
+    return pd.DataFrame(out, index=pd.RangeIndex(len(rows)))
+
+
+def _labelled(s, labels):
+    """Apply a value-label table like read_stata(convert_categoricals=True)."""
+    # categories are the codes present, in code order; unlabelled codes keep their value
+    cat = pd.Categorical(s, ordered=True)
+    return pd.Series(cat.rename_categories([labels.get(c, c) for c in cat.categories]), name=s.name)
+
+
+def sample_rows(n_rows, size, seed=2021):
+    """Sorted, reproducible random row positions (all rows if size >= n_rows)."""
+    if size >= n_rows:
+        return np.arange(n_rows)
+    return np.sort(np.random.default_rng(seed).choice(n_rows, size=size, replace=False))
+
+
+def pandas_dtype(variable, labelled=True):
+    """The dtype read_stata() gives a variable (before promoting ints with missing values)."""
+    if labelled and variable['value_label']:
+        return 'category'
+    code = variable['code']
+    if code in NUMERIC_TYPES:
+        return {'byte': 'int8', 'int': 'int16', 'long': 'int32',
+                'float': 'float32', 'double': 'float64'}[NUMERIC_TYPES[code][0]]
+    return 'object'
+
+
+def _cached_null_counts(path):
+    """Exact per-column null counts from a fresh Parquet cache, without reading data pages."""
+    from .loader import cache_paths, fresh_meta
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    meta_path = cache_paths(path)[1]
+    meta = fresh_meta(Path(path).resolve(), meta_path) if meta_path.exists() else None
+    if not meta or meta.get('format') != 'parquet':
+        return None
+    md = pq.ParquetFile(meta_path.parent / meta['file']).metadata
+    counts = {}
+    for j in range(md.num_columns):
+        name = md.schema.column(j).name
+        total = 0
+        for i in range(md.num_row_groups):
+            stats = md.row_group(i).column(j).statistics
+            if stats is None or not stats.has_null_count:
+                return None
+            total += stats.null_count
+        counts[name] = total
+    return counts
+
+
+def dta_metadata(path, sample_size=2000, seed=2021):
+    """
+    Column dictionary of a .dta for the frontend meta export.
+
+    Per variable: Stata type, pandas dtype, format, label, value-label set and
+    missing share. Missingness is exact when a fresh Parquet cache of the
+    file exists (read from its column statistics) or the file has at most
+    `sample_size` rows, otherwise estimated from a fixed-size random sample
+    of rows; 'missing_basis' says which.
+    """
+    path = Path(path)
+    header = read_dta_header(path)
+    n = header['rows']
+    nulls = _cached_null_counts(path)
+    if nulls is not None:
+        basis, denom = 'exact', n
+    else:
+        rows = sample_rows(n, sample_size, seed)
+        sample = read_dta_rows(path, rows, header=header, convert_categoricals=False)
+        nulls = {c: int(sample[c].isna().sum()) for c in sample.columns}
+        basis = 'exact' if len(rows) == n else f'sample of {len(rows)} rows'
+        denom = len(rows)
+
+    variables = []
+    for v in header['variables']:
+        table = header['value_labels'].get(v['value_label']) if v['value_label'] else None
+        variables.append({
+            'name': v['name'],
+            'label': v['label'],
+            'stata_type': v['type'],
+            'dtype': pandas_dtype(v, labelled=bool(table)),
+            'format': v['format'],
+            'value_label': v['value_label'],
+            'labels': {str(k): lbl for k, lbl in table.items()} if table else None,
+            'missing_pct': round(nulls.get(v['name'], 0) / denom * 100, 2) if denom else None,
+        })
+
+    return {
+        'file': path.name,
+        'rows': int(n),
+        'columns': [v['name'] for v in header['variables']],
+        'release': header['release'],
+        'data_label': header['data_label'],
+        'missing_basis': basis,
+        'variables': variables,
+    }
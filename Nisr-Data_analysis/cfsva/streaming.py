@@ -0,0 +1,132 @@
+"""
+Bounded-memory weighted tables over large .dta files.
+
+The household master dataset is read with `read_stata(chunksize=...)` and
+only per-group weighted sums and counts are kept between chunks, so memory
+depends on the number of groups, not on the number of households. Results
+match the in-memory helpers of `food_security_analysis_starter.py`:
+
+ - weighted_mean(df, var)               -> result['mean'][var]
+ - weighted_percentage(df, var)         -> result['percentage'][var]
+ - create_crosstab(df, row_var, col_var) -> result['crosstab'][(row_var, col_var)]
+
+All requested tables are filled in a single pass over the file.
+"""
+
+import warnings
+
+import pandas as pd
+
+from .loader import STATA_CHUNKSIZE
+
+
+def iter_chunks(path, columns=None, chunksize=STATA_CHUNKSIZE):
+    """Yield DataFrame chunks of a .dta file (value labels decoded)."""
+    with warnings.catch_warnings():
+        # Per-chunk categories are fine here: grouping is done on the labels
+        warnings.simplefilter('ignore', pd.errors.CategoricalConversionWarning)
+        with pd.read_stata(path, columns=columns, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield chunk
+
+
+def _add(total, part):
+    return part if total is None else total.add(part, fill_value=0)
+
+
+def _label_order(seen, labels):
+    """Order labels like the in-memory groupby: category order if categorical, else sorted."""
+    ordered = [c for c in seen if c in set(labels)]
+    rest = sorted(set(labels) - set(ordered), key=str)
+    return ordered + rest
+
+
+def _remember_categories(seen, series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        known = set(seen)
+        seen.extend(c for c in series.cat.categories if c not in known)
+
+
+def stream_tables(path, percentages=(), means=(), crosstabs=(),
+                  weight_col='FinalWeight', chunksize=STATA_CHUNKSIZE):
+    """
+    Compute weighted percentages, means and crosstabs in one chunked pass.
+
+    percentages: variable names
+    means:       numeric variable names
+    crosstabs:   (row_var, col_var) pairs
+
+    Returns {'rows': int, 'percentage': {var: Series},
+             'mean': {var: float}, 'crosstab': {(row, col): DataFrame}}.
+    """
+    percentages, means, crosstabs = list(percentages), list(means), [tuple(c) for c in crosstabs]
+    columns = [weight_col] + percentages + means + [v for pair in crosstabs for v in pair]
+    columns = list(dict.fromkeys(columns))
+
+    pct_sums = {v: None for v in percentages}
+    mean_sums = {v: [0.0, 0.0] for v in means}
+    tab_sums = {pair: None for pair in crosstabs}
+    seen = {v: [] for v in columns}
+    rows = 0
+
+    for chunk in iter_chunks(path, columns, chunksize):
+        rows += len(chunk)
+        w = chunk[weight_col]
+        for v in columns[1:]:
+            _remember_categories(seen[v], chunk[v])
+
+        for v in percentages:
+            part = w.groupby(chunk[v], observed=True).sum()
+            pct_sums[v] = _add(pct_sums[v], part)
+
+        for v in means:
+            x = pd.to_numeric(chunk[v], errors='coerce')
+            valid = x.notna()
+            mean_sums[v][0] += float((x[valid] * w[valid]).sum())
+            mean_sums[v][1] += float(w[valid].sum())
+
+        for row_var, col_var in crosstabs:
+            part = w.groupby([chunk[row_var], chunk[col_var]], observed=True).sum()
+            tab_sums[(row_var, col_var)] = _add(tab_sums[(row_var, col_var)], part)
+
+    result = {'rows': rows, 'percentage': {}, 'mean': {}, 'crosstab': {}}
+
+    for v, sums in pct_sums.items():
+        if sums is None:
+            sums = pd.Series(dtype=float)
+        sums = sums.reindex(_label_order(seen[v], sums.index))
+        sums.index.name = v
+        sums.name = weight_col
+        result['percentage'][v] = (sums / sums.sum() * 100).round(2)
+
+    for v, (wx, wsum) in mean_sums.items():
+        result['mean'][v] = wx / wsum if wsum else float('nan')
+
+    for (row_var, col_var), sums in tab_sums.items():
+        if sums is None:
+            result['crosstab'][(row_var, col_var)] = pd.DataFrame()
+            continue
+        table = sums.unstack(fill_value=0)
+        table = table.reindex(index=_label_order(seen[row_var], table.index),
+                              columns=_label_order(seen[col_var], table.columns))
+        table.index.name, table.columns.name = row_var, col_var
+        result['crosstab'][(row_var, col_var)] = table.div(table.sum(axis=1), axis=0) * 100
+
+    return result
+
+
+def streaming_weighted_mean(path, variable, weight_col='FinalWeight', chunksize=STATA_CHUNKSIZE):
+    """Chunked equivalent of weighted_mean()."""
+    return stream_tables(path, means=[variable], weight_col=weight_col, chunksize=chunksize)['mean'][variable]
+
+
+def streaming_weighted_percentage(path, variable, weight_col='FinalWeight', chunksize=STATA_CHUNKSIZE):
+    """Chunked equivalent of weighted_percentage()."""
+    return stream_tables(path, percentages=[variable], weight_col=weight_col,
+                         chunksize=chunksize)['percentage'][variable]
+
+
+def streaming_crosstab(path, row_var, col_var, weight_col='FinalWeight', chunksize=STATA_CHUNKSIZE):
+    """Chunked equivalent of create_crosstab()."""
+    return stream_tables(path, crosstabs=[(row_var, col_var)], weight_col=weight_col,
+                         chunksize=chunksize)['crosstab'][(row_var, col_var)]
@@ -0,0 +1,245 @@
+"""
+Design-based standard errors and 95% confidence intervals for grouped rates.
+
+A rate is a ratio estimator R_d = sum(w * y) / sum(w * x) per group d, where
+y is the "affected" flag and x the "measured" flag of an indicator. All
+groups and all indicators are handled together:
+
+ - method='taylor' (default): Taylor linearisation with stratified,
+   clustered (with-replacement PSU) variance. Linearised values are
+   totalled per PSU and per stratum with np.bincount, so the whole table is
+   one vectorised pass.
+ - method='jackknife': delete-one-PSU (JKn) replicate weights.
+ - method='bootstrap': Rao-Wu rescaling bootstrap replicate weights.
+
+Replicates are evaluated in chunks, spread over a process pool when
+`n_jobs` > 1. `strata` / `cluster` default to None: one stratum, and every
+row its own PSU. For the child file the natural design is district strata
+with households (`index`) as clusters; the file has no village id or survey
+weight.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .estimators import encode
+from .malnutrition import INDICATORS, indicator_flags
+
+Z_95 = 1.959963984540054
+METHODS = ('taylor', 'jackknife', 'bootstrap')
+# Replicates evaluated per task; bounds the (rows x replicates) weight matrix
+REPLICATE_CHUNK = 200
+
+
+def _codes(df, col):
+    """Integer codes of a design column; None -> one code per row or a single code."""
+    if col is None:
+        return None
+    codes, _ = encode(df[col] if isinstance(col, str) else col)
+    if (codes < 0).any():
+        raise ValueError(f"Design column {col!r} has missing values")
+    return codes
+
+
+def _design(df, strata, cluster):
+    """
+    PSU code per row, stratum code per PSU and PSU count per stratum.
+
+    PSUs are nested in strata: the same cluster id in two strata is two PSUs.
+    """
+    n = len(df)
+    h_rows = _codes(df, strata)
+    h_rows = np.zeros(n, dtype=np.int64) if h_rows is None else h_rows
+    c_rows = _codes(df, cluster)
+    c_rows = np.arange(n, dtype=np.int64) if c_rows is None else c_rows
+
+    psu, first = np.unique(np.column_stack([h_rows, c_rows]), axis=0, return_inverse=True)[:2]
+    psu_rows = first.ravel()
+    psu_stratum = psu[:, 0]
+    n_h = np.bincount(psu_stratum)
+    return psu_rows, psu_stratum, n_h, h_rows
+
+
+def _ratio_inputs(df, by, weight):
+    """Group codes/labels, weights and the y (affected) / x (measured) matrices."""
+    g_codes, g_labels = encode(df[by] if isinstance(by, str) else by)
+    if weight is None:
+        w = np.ones(len(df))
+    else:
+        w = pd.to_numeric(df[weight] if isinstance(weight, str) else pd.Series(weight),
+                          errors='coerce').fillna(0).to_numpy(dtype=float)
+    flags = indicator_flags(df)
+    y = np.column_stack([(flags[f'{p}_Moderate'] + flags[f'{p}_Severe']).to_numpy(dtype=float)
+                         for p, _, _ in INDICATORS.values()])
+    x = np.column_stack([flags[f'{ind}_Measured'].to_numpy(dtype=float) for ind in INDICATORS])
+    return g_codes, g_labels, w, y, x
+
+
+def _ratios(g_codes, n_groups, w, y, x):
+    """Ratio estimates (groups x indicators) for one weight vector."""
+    valid = g_codes >= 0
+    k = y.shape[1]
+    cell = (g_codes[valid][:, None] * k + np.arange(k)).ravel()
+    wv = w[valid][:, None]
+    num = np.bincount(cell, weights=(wv * y[valid]).ravel(), minlength=n_groups * k)
+    den = np.bincount(cell, weights=(wv * x[valid]).ravel(), minlength=n_groups * k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (num / den).reshape(n_groups, k), den.reshape(n_groups, k)
+
+
+def taylor_variance(g_codes, n_groups, w, y, x, psu_rows, psu_stratum, n_h):
+    """
+    Linearised variance of every group x indicator ratio.
+
+    z_i = w_i (y_i - R_d x_i) / X_d for rows of group d; the with-replacement
+    variance is sum_h n_h/(n_h-1) * sum_j (z_hj - mean_h z)^2 over PSU totals
+    z_hj, expanded as sum z^2 - (sum z)^2 / n_h so PSUs outside a group (z=0)
+    need not be materialised. Single-PSU strata contribute nothing.
+    """
+    R, X = _ratios(g_codes, n_groups, w, y, x)
+    valid = g_codes >= 0
+    g = g_codes[valid]
+    k = y.shape[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = w[valid][:, None] * (y[valid] - np.nan_to_num(R[g]) * x[valid]) / X[g]
+    z = np.nan_to_num(z)
+
+    # PSU totals per (group, PSU, indicator): compact the observed (group, PSU) pairs
+    pairs, cell = np.unique(np.column_stack([g, psu_rows[valid]]), axis=0, return_inverse=True)
+    cell = cell.ravel()
+    n_pairs = len(pairs)
+    flat = (cell[:, None] * k + np.arange(k)).ravel()
+    z_psu = np.bincount(flat, weights=z.ravel(), minlength=n_pairs * k).reshape(n_pairs, k)
+
+    # Stratum sums of z and z^2 per (group, stratum)
+    n_strata = len(n_h)
+    gh = pairs[:, 0] * n_strata + psu_stratum[pairs[:, 1]]
+    flat = (gh[:, None] * k + np.arange(k)).ravel()
+    size = n_groups * n_strata * k
+    s1 = np.bincount(flat, weights=z_psu.ravel(), minlength=size).reshape(n_groups, n_strata, k)
+    s2 = np.bincount(flat, weights=(z_psu ** 2).ravel(), minlength=size).reshape(n_groups, n_strata, k)
+
+    nh = n_h.astype(float)[None, :, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_stratum = np.where(nh > 1, nh / (nh - 1) * (s2 - s1 ** 2 / nh), 0.0)
+    var = np.clip(per_stratum.sum(axis=1), 0, None)
+    return R, np.where(X > 0, var, np.nan)
+
+
+def _jackknife_chunk(args):
+    """Replicate ratios for a slice of delete-one-PSU replicates."""
+    g_codes, n_groups, w, y, x, psu_rows, psu_stratum, n_h, h_rows, psus = args
+    out = np.empty((len(psus), n_groups, y.shape[1]))
+    for i, p in enumerate(psus):
+        h = psu_stratum[p]
+        factor = np.where(h_rows == h, n_h[h] / (n_h[h] - 1), 1.0)
+        factor[psu_rows == p] = 0.0
+        out[i] = _ratios(g_codes, n_groups, w * factor, y, x)[0]
+    return out
+
+
+def _bootstrap_chunk(args):
+    """Replicate ratios for a slice of Rao-Wu bootstrap replicates."""
+    g_codes, n_groups, w, y, x, psu_rows, psu_stratum, n_h, _, (n_reps, seed) = args
+    rng = np.random.default_rng(seed)
+    n_psu = len(psu_stratum)
+    order = np.argsort(psu_stratum, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(n_h)[:-1]])
+    out = np.empty((n_reps, n_groups, y.shape[1]))
+    for r in range(n_reps):
+        # Draw n_h - 1 PSUs with replacement in every stratum
+        multiplicity = np.zeros(n_psu)
+        for h, (start, size) in enumerate(zip(starts, n_h)):
+            if size < 2:
+                multiplicity[order[start:start + size]] = 1.0
+                continue
+            picks = order[start + rng.integers(0, size, size - 1)]
+            np.add.at(multiplicity, picks, size / (size - 1))
+        out[r] = _ratios(g_codes, n_groups, w * multiplicity[psu_rows], y, x)[0]
+    return out
+
+
+def _map(func, tasks, n_jobs):
+    if n_jobs == 1 or len(tasks) == 1:
+        return [func(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        return list(pool.map(func, tasks))
+
+
+def replicate_variance(g_codes, n_groups, w, y, x, psu_rows, psu_stratum, n_h, h_rows,
+                       method='jackknife', replicates=500, seed=2021, n_jobs=None):
+    """Replicate-weight variance of every group x indicator ratio."""
+    R, X = _ratios(g_codes, n_groups, w, y, x)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    base = (g_codes, n_groups, w, y, x, psu_rows, psu_stratum, n_h, h_rows)
+
+    if method == 'jackknife':
+        # Single-PSU strata have no delete-one replicate
+        psus = np.flatnonzero(n_h[psu_stratum] > 1)
+        chunks = [psus[i:i + REPLICATE_CHUNK] for i in range(0, len(psus), REPLICATE_CHUNK)]
+        reps = np.concatenate(_map(_jackknife_chunk, [base + (c,) for c in chunks], n_jobs)) \
+            if chunks else np.empty((0, n_groups, y.shape[1]))
+        nh = n_h[psu_stratum[psus]].astype(float)
+        coef = ((nh - 1) / nh)[:, None, None]
+        var = np.nansum(coef * (reps - R) ** 2, axis=0)
+    else:
+        sizes = [min(REPLICATE_CHUNK, replicates - i) for i in range(0, replicates, REPLICATE_CHUNK)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        tasks = [base + ((size, s),) for size, s in zip(sizes, seeds)]
+        reps = np.concatenate(_map(_bootstrap_chunk, tasks, n_jobs))
+        var = np.nanmean((reps - R) ** 2, axis=0)
+    return R, np.where(X > 0, var, np.nan)
+
+
+def rate_intervals(df, by='S0_D_Dist', strata=None, cluster=None, weight=None,
+                   method='taylor', replicates=500, seed=2021, n_jobs=None):
+    """
+    SE and 95% CI (in %) of the stunting, wasting and underweight rates.
+
+    Returns one row per observed group (index named after `by`) with
+    '<Indicator>_Rate', '<Indicator>_Rate_SE', '<Indicator>_Rate_CI_Low' and
+    '<Indicator>_Rate_CI_High' columns. Intervals are normal-approximation,
+    clipped to [0, 100]. Groups with nothing measured get NaN.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown variance method {method!r}: expected one of {METHODS}")
+    g_codes, g_labels, w, y, x = _ratio_inputs(df, by, weight)
+    n_groups = len(g_labels)
+    psu_rows, psu_stratum, n_h, h_rows = _design(df, strata, cluster)
+
+    if method == 'taylor':
+        R, var = taylor_variance(g_codes, n_groups, w, y, x, psu_rows, psu_stratum, n_h)
+    else:
+        R, var = replicate_variance(g_codes, n_groups, w, y, x, psu_rows, psu_stratum, n_h, h_rows,
+                                    method=method, replicates=replicates, seed=seed, n_jobs=n_jobs)
+
+    rate, se = R * 100, np.sqrt(var) * 100
+    out = {}
+    for j, indicator in enumerate(INDICATORS):
+        out[f'{indicator}_Rate'] = rate[:, j]
+        out[f'{indicator}_Rate_SE'] = se[:, j]
+        out[f'{indicator}_Rate_CI_Low'] = np.clip(rate[:, j] - Z_95 * se[:, j], 0, 100)
+        out[f'{indicator}_Rate_CI_High'] = np.clip(rate[:, j] + Z_95 * se[:, j], 0, 100)
+    name = by if isinstance(by, str) else getattr(by, 'name', None)
+    table = pd.DataFrame(out, index=pd.Index(g_labels, name=name))
+    observed = np.bincount(g_codes[g_codes >= 0], minlength=n_groups) > 0
+    return table[observed]
+
+
+def add_rate_intervals(rates, intervals, label='District'):
+    """
+    Insert the SE / CI columns of `intervals` right after each rate column
+    of a malnutrition_rates() table, matching rows on `label`.
+    """
+    extra = intervals.drop(columns=[f'{ind}_Rate' for ind in INDICATORS])
+    extra = extra.set_axis(extra.index.astype(str)).reindex(rates[label].astype(str))
+    out = rates.copy()
+    for indicator in reversed(list(INDICATORS)):
+        pos = out.columns.get_loc(f'{indicator}_Rate') + 1
+        for suffix in reversed(('SE', 'CI_Low', 'CI_High')):
+            col = f'{indicator}_Rate_{suffix}'
+            out.insert(pos, col, extra[col].to_numpy())
+    return out
@@ -0,0 +1,89 @@
+"""
+Composite village vulnerability index.
+
+The factors are declared once in VULNERABILITY_FACTORS. Each factor is a 0/1
+indicator on one village column, so the index is a single
+(villages x factors) indicator matrix times the weight vector. Nothing is
+added to or copied from the input frame; callers attach the returned columns
+themselves.
+
+This is the 12-point index of village/VILLAGE_ANALYSIS_REPORT.md (levels:
+Low 0-3, Medium 4-6, High 7+), except that the report compared the Yes/No
+infrastructure columns with 1, so its three infrastructure factors counted
+for every village.
+"""
+
+import numpy as np
+import pandas as pd
+
+# name -> (column, op, value, weight, description)
+# op is one of ==, !=, <, >; value 'median' compares against the column median.
+# Comparisons follow pandas: missing values are False except for '!='.
+VULNERABILITY_FACTORS = {
+    # Infrastructure deficits
+    'no_school': ('S3_02', '==', 'No', 1, 'No school'),
+    'no_health_facility': ('S3_03', '==', 'No', 1, 'No health facility'),
+    'no_market': ('S4_01', '==', 'No', 1, 'No market'),
+    # Market access
+    'poor_roads': ('S4_02_4', '==', 'No', 1, 'Poor road access'),
+    'far_from_market': ('S4_02_3', '>', 10, 1, 'Far from market'),
+    # Food availability
+    'low_cereals': ('S5_01_2', '==', 'Low (insufficient)', 1, 'Low cereal availability'),
+    'low_tubers': ('S5_02_2', '==', 'Low (insufficient)', 1, 'Low tuber availability'),
+    'low_pulses': ('S5_03_2', '==', 'Low (insufficient)', 1, 'Low pulse availability'),
+    # Food prices
+    'high_cereal_prices': ('S5_01_3', '==', 'Higher that normal', 1, 'Cereal prices above normal'),
+    'high_tuber_prices': ('S5_02_3', '==', 'Higher that normal', 1, 'Tuber prices above normal'),
+    # Wages
+    'low_wage': ('S6_01', '<', 'median', 1, 'Agricultural wage below median'),
+    'falling_wages': ('S6_01_3', '==', 'Lower than normal', 1, 'Agricultural wages below normal'),
+}
+
+VULNERABILITY_BINS = [-1, 3, 6, 100]
+VULNERABILITY_LEVELS = ['Low', 'Medium', 'High']
+
+
+def factor_indicator(s, op, value):
+    """Boolean mask of one VULNERABILITY_FACTORS test on column `s`."""
+    if value == 'median':
+        value = s.median()
+    if op == '==':
+        m = s == value
+    elif op == '!=':
+        m = s != value
+    elif op == '<':
+        m = s < value
+    elif op == '>':
+        m = s > value
+    else:
+        raise ValueError(f"Unsupported factor op {op!r}")
+    return m.fillna(op == '!=').to_numpy(dtype=np.int8)
+
+
+def indicator_matrix(df, factors=VULNERABILITY_FACTORS):
+    """
+    (villages x factors) 0/1 matrix and the matching weight vector.
+
+    Factors whose column is missing from `df` are skipped.
+    """
+    names = [name for name, (col, *_) in factors.items() if col in df.columns]
+    matrix = np.zeros((len(df), len(names)), dtype=np.int8)
+    for j, name in enumerate(names):
+        col, op, value, _, _ = factors[name]
+        matrix[:, j] = factor_indicator(df[col], op, value)
+    weights = np.array([factors[name][3] for name in names])
+    return matrix, weights, names
+
+
+def vulnerability_index(df, factors=VULNERABILITY_FACTORS, bins=VULNERABILITY_BINS,
+                        labels=VULNERABILITY_LEVELS):
+    """
+    Vulnerability score and level of every village.
+
+    Returns a DataFrame aligned with `df` holding 'vulnerability_score'
+    (indicator matrix @ weights) and 'vulnerability_level'.
+    """
+    matrix, weights, _ = indicator_matrix(df, factors)
+    score = pd.Series(matrix.astype(weights.dtype) @ weights, index=df.index)
+    level = pd.cut(score, bins=bins, labels=labels)
+    return pd.DataFrame({'vulnerability_score': score, 'vulnerability_level': level})
@@ -13,6 +13,14 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, CHILD_FILE
+from cfsva.estimators import weighted_counts, weighted_means
+from cfsva.cube import CUBE_DIMENSIONS, build_cube
+from cfsva.malnutrition import INDICATORS, indicator_flags
 warnings.filterwarnings('ignore')
 
 # Set display options
@@ -29,13 +37,50 @@ print("LOADING CHILD NUTRITION & MALNUTRITION DATA")
 print("=" * 80)
 
 # Load the child dataset
-df = pd.read_stata('../data/CFSVAHH2021_UNDER_5_ChildWithMother.dta')
+df = load_survey(CHILD_FILE)
 
 print(f"\nDataset loaded successfully!")
 print(f"  Total children: {len(df)}")
 print(f"  Total variables: {len(df.columns)}")
 print(f"  Unique households: {df['index'].nunique() if 'index' in df.columns else 'N/A'}")
 
+# The child file carries no survey weight; use one if a weighted extract is loaded
+WEIGHT = 'FinalWeight' if 'FinalWeight' in df.columns else None
+
+# Every distribution below comes from one bincount over all categorical columns
+COUNT_COLUMNS = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+COUNTS = {var: table.iloc[0] for var, table in weighted_counts(df, COUNT_COLUMNS, weight=WEIGHT).items()}
+
+
+def counts(var, sort=True):
+    """Counts of each label of `var` (largest first, or category order with sort=False)."""
+    dtype = df[var].dtype
+    table = COUNTS[var].reindex(dtype.categories, fill_value=0).rename('count')
+    table.index = pd.CategoricalIndex(table.index, dtype=dtype, name=var)
+    if WEIGHT is None:
+        table = table.astype(int)
+    return table.sort_values(ascending=False, kind='stable') if sort else table
+
+
+# Moderate + severe flag per indicator (NaN when not measured); group means give rates
+FLAGS = indicator_flags(df) if all(ind in df.columns for ind in INDICATORS) else None
+AFFECTED = None if FLAGS is None else pd.DataFrame({
+    ind: (FLAGS[f'{prefix}_Moderate'] + FLAGS[f'{prefix}_Severe']).where(FLAGS[f'{ind}_Measured'] == 1)
+    for ind, (prefix, _, _) in INDICATORS.items()
+})
+
+
+# Every indicator x one- and two-way disaggregation, precomputed once
+CUBE = None if FLAGS is None else build_cube(df, CUBE_DIMENSIONS, weight=WEIGHT)
+
+
+def affected_rates(by, indicator):
+    """% of measured children moderately or severely affected, per value of `by`."""
+    if CUBE is not None and by in CUBE.dimensions:
+        return CUBE.rates(indicator, by)
+    rates = weighted_means(AFFECTED, [indicator], by=df[by], weight=WEIGHT)[indicator] * 100
+    return rates.dropna()
+
 # ============================================================================
 # SECTION 1: DEMOGRAPHIC PROFILE
 # ============================================================================
@@ -54,21 +99,21 @@ if 'S13_01_4' in df.columns:
     # Age categories
     if 'ageCat' in df.columns:
         print("\nAge Categories:")
-        age_cat_dist = df['ageCat'].value_counts().sort_index()
+        age_cat_dist = counts('ageCat', sort=False)
         for cat, count in age_cat_dist.items():
             pct = (count / len(df)) * 100
             print(f"  {cat}: {count} children ({pct:.1f}%)")
 
 print("\nSEX DISTRIBUTION:")
 if 'S13_01_5' in df.columns:
-    sex_dist = df['S13_01_5'].value_counts()
+    sex_dist = counts('S13_01_5')
     for sex, count in sex_dist.items():
         pct = (count / len(df)) * 100
         print(f"  {sex}: {count} children ({pct:.1f}%)")
 
 print("\nGEOGRAPHIC DISTRIBUTION:")
 if 'S0_C_Prov' in df.columns:
-    prov_dist = df['S0_C_Prov'].value_counts()
+    prov_dist = counts('S0_C_Prov')
     print("  By Province:")
     for prov, count in prov_dist.items():
         pct = (count / len(df)) * 100
@@ -76,7 +121,7 @@ if 'S0_C_Prov' in df.columns:
 
 if 'UrbanRural' in df.columns:
     print("\n  By Location:")
-    ur_dist = df['UrbanRural'].value_counts()
+    ur_dist = counts('UrbanRural')
     for loc, count in ur_dist.items():
         pct = (count / len(df)) * 100
         print(f"    {loc}: {count} children ({pct:.1f}%)")
@@ -90,8 +135,8 @@ print("=" * 80)
 
 print("\nSTUNTING (Height-for-Age):")
 if 'Stunting' in df.columns:
-    stunting = df['Stunting'].value_counts()
-    total_measured = df['Stunting'].notna().sum()
+    stunting = counts('Stunting')
+    total_measured = counts('Stunting').sum()
     print(f"  Total children measured: {total_measured}")
     for status, count in stunting.items():
         pct = (count / total_measured) * 100
@@ -106,8 +151,8 @@ if 'Stunting' in df.columns:
 
 print("\nWASTING (Weight-for-Height):")
 if 'Wasting' in df.columns:
-    wasting = df['Wasting'].value_counts()
-    total_measured = df['Wasting'].notna().sum()
+    wasting = counts('Wasting')
+    total_measured = counts('Wasting').sum()
     print(f"  Total children measured: {total_measured}")
     for status, count in wasting.items():
         pct = (count / total_measured) * 100
@@ -122,8 +167,8 @@ if 'Wasting' in df.columns:
 
 print("\nUNDERWEIGHT (Weight-for-Age):")
 if 'Underweight' in df.columns:
-    underweight = df['Underweight'].value_counts()
-    total_measured = df['Underweight'].notna().sum()
+    underweight = counts('Underweight')
+    total_measured = counts('Underweight').sum()
     print(f"  Total children measured: {total_measured}")
     for status, count in underweight.items():
         pct = (count / total_measured) * 100
@@ -138,8 +183,8 @@ if 'Underweight' in df.columns:
 
 print("\nEDEMA (Nutritional):")
 if 'oedema' in df.columns:
-    edema = df['oedema'].value_counts()
-    total_checked = df['oedema'].notna().sum()
+    edema = counts('oedema')
+    total_checked = counts('oedema').sum()
     print(f"  Total children checked: {total_checked}")
     for status, count in edema.items():
         pct = (count / total_checked) * 100
@@ -167,29 +212,13 @@ print("=" * 80)
 # By Province
 print("\nSTUNTING BY PROVINCE:")
 if 'Stunting' in df.columns and 'S0_C_Prov' in df.columns:
-    stunting_prov = pd.crosstab(df['S0_C_Prov'], df['Stunting'], normalize='index') * 100
-    # Calculate total stunting (moderate + severe)
-    stunted_total = pd.Series(0.0, index=stunting_prov.index)
-    if 'Moderately stunted' in stunting_prov.columns:
-        stunted_total += stunting_prov['Moderately stunted']
-    if 'Severely stunted' in stunting_prov.columns:
-        stunted_total += stunting_prov['Severely stunted']
-    
-    stunting_rates = stunted_total.sort_values(ascending=False)
+    stunting_rates = affected_rates('S0_C_Prov', 'Stunting').sort_values(ascending=False)
     for prov, rate in stunting_rates.items():
         print(f"  {prov}: {rate:.1f}% stunted")
 
 print("\nWASTING BY PROVINCE:")
 if 'Wasting' in df.columns and 'S0_C_Prov' in df.columns:
-    wasting_prov = pd.crosstab(df['S0_C_Prov'], df['Wasting'], normalize='index') * 100
-    # Calculate total wasting (moderate + severe)
-    wasted_total = pd.Series(0.0, index=wasting_prov.index)
-    if 'Moderately wasted' in wasting_prov.columns:
-        wasted_total += wasting_prov['Moderately wasted']
-    if 'Severely wasted' in wasting_prov.columns:
-        wasted_total += wasting_prov['Severely wasted']
-    
-    wasting_rates = wasted_total.sort_values(ascending=False)
+    wasting_rates = affected_rates('S0_C_Prov', 'Wasting').sort_values(ascending=False)
     for prov, rate in wasting_rates.items():
         print(f"  {prov}: {rate:.1f}% wasted")
 
@@ -199,27 +228,7 @@ if 'UrbanRural' in df.columns:
     for indicator in ['Stunting', 'Wasting', 'Underweight']:
         if indicator in df.columns:
             print(f"\n  {indicator}:")
-            malnut_ur = pd.crosstab(df['UrbanRural'], df[indicator], normalize='index') * 100
-            
-            # Calculate totals for affected children
-            affected_total = pd.Series(0.0, index=malnut_ur.index)
-            if indicator == 'Stunting':
-                if 'Moderately stunted' in malnut_ur.columns:
-                    affected_total += malnut_ur['Moderately stunted']
-                if 'Severely stunted' in malnut_ur.columns:
-                    affected_total += malnut_ur['Severely stunted']
-            elif indicator == 'Wasting':
-                if 'Moderately wasted' in malnut_ur.columns:
-                    affected_total += malnut_ur['Moderately wasted']
-                if 'Severely wasted' in malnut_ur.columns:
-                    affected_total += malnut_ur['Severely wasted']
-            elif indicator == 'Underweight':
-                if 'Moderately underweight' in malnut_ur.columns:
-                    affected_total += malnut_ur['Moderately underweight']
-                if 'Severely underweight' in malnut_ur.columns:
-                    affected_total += malnut_ur['Severely underweight']
-            
-            for loc, rate in affected_total.items():
+            for loc, rate in affected_rates('UrbanRural', indicator).items():
                 print(f"    {loc}: {rate:.1f}%")
 
 # By Age
@@ -228,27 +237,7 @@ if 'ageCat' in df.columns:
     for indicator in ['Stunting', 'Wasting', 'Underweight']:
         if indicator in df.columns:
             print(f"\n  {indicator}:")
-            malnut_age = pd.crosstab(df['ageCat'], df[indicator], normalize='index') * 100
-            
-            # Calculate totals for affected children
-            affected_total = pd.Series(0.0, index=malnut_age.index)
-            if indicator == 'Stunting':
-                if 'Moderately stunted' in malnut_age.columns:
-                    affected_total += malnut_age['Moderately stunted']
-                if 'Severely stunted' in malnut_age.columns:
-                    affected_total += malnut_age['Severely stunted']
-            elif indicator == 'Wasting':
-                if 'Moderately wasted' in malnut_age.columns:
-                    affected_total += malnut_age['Moderately wasted']
-                if 'Severely wasted' in malnut_age.columns:
-                    affected_total += malnut_age['Severely wasted']
-            elif indicator == 'Underweight':
-                if 'Moderately underweight' in malnut_age.columns:
-                    affected_total += malnut_age['Moderately underweight']
-                if 'Severely underweight' in malnut_age.columns:
-                    affected_total += malnut_age['Severely underweight']
-            
-            for age, rate in affected_total.sort_index().items():
+            for age, rate in affected_rates('ageCat', indicator).items():
                 print(f"    {age}: {rate:.1f}%")
 
 # By Sex
@@ -257,27 +246,7 @@ if 'S13_01_5' in df.columns:
     for indicator in ['Stunting', 'Wasting', 'Underweight']:
         if indicator in df.columns:
             print(f"\n  {indicator}:")
-            malnut_sex = pd.crosstab(df['S13_01_5'], df[indicator], normalize='index') * 100
-            
-            # Calculate totals for affected children
-            affected_total = pd.Series(0.0, index=malnut_sex.index)
-            if indicator == 'Stunting':
-                if 'Moderately stunted' in malnut_sex.columns:
-                    affected_total += malnut_sex['Moderately stunted']
-                if 'Severely stunted' in malnut_sex.columns:
-                    affected_total += malnut_sex['Severely stunted']
-            elif indicator == 'Wasting':
-                if 'Moderately wasted' in malnut_sex.columns:
-                    affected_total += malnut_sex['Moderately wasted']
-                if 'Severely wasted' in malnut_sex.columns:
-                    affected_total += malnut_sex['Severely wasted']
-            elif indicator == 'Underweight':
-                if 'Moderately underweight' in malnut_sex.columns:
-                    affected_total += malnut_sex['Moderately underweight']
-                if 'Severely underweight' in malnut_sex.columns:
-                    affected_total += malnut_sex['Severely underweight']
-            
-            for sex, rate in affected_total.items():
+            for sex, rate in affected_rates('S13_01_5', indicator).items():
                 print(f"    {sex}: {rate:.1f}%")
 
 # ============================================================================
@@ -289,32 +258,32 @@ print("=" * 80)
 
 print("\nMINIMUM DIETARY DIVERSITY (MDD):")
 if 'minimumDietaryDiversity' in df.columns:
-    mdd = df['minimumDietaryDiversity'].value_counts()
-    total = df['minimumDietaryDiversity'].notna().sum()
+    mdd = counts('minimumDietaryDiversity')
+    total = counts('minimumDietaryDiversity').sum()
     for status, count in mdd.items():
         pct = (count / total) * 100
         print(f"  {status}: {count} children ({pct:.1f}%)")
 
 print("\nMINIMUM MEAL FREQUENCY (MMF):")
 if 'minimumMealFrequency' in df.columns:
-    mmf = df['minimumMealFrequency'].value_counts()
-    total = df['minimumMealFrequency'].notna().sum()
+    mmf = counts('minimumMealFrequency')
+    total = counts('minimumMealFrequency').sum()
     for status, count in mmf.items():
         pct = (count / total) * 100
         print(f"  {status}: {count} children ({pct:.1f}%)")
 
 print("\nMINIMUM ACCEPTABLE DIET (MAD):")
 if 'minimumAcceptableDiet' in df.columns:
-    mad = df['minimumAcceptableDiet'].value_counts()
-    total = df['minimumAcceptableDiet'].notna().sum()
+    mad = counts('minimumAcceptableDiet')
+    total = counts('minimumAcceptableDiet').sum()
     for status, count in mad.items():
         pct = (count / total) * 100
         print(f"  {status}: {count} children ({pct:.1f}%)")
 
 print("\nMEAL FREQUENCY:")
 if 'S13_17' in df.columns:
-    meal_freq = df['S13_17'].value_counts()
-    total = df['S13_17'].notna().sum()
+    meal_freq = counts('S13_17')
+    total = counts('S13_17').sum()
     print(f"  Meal frequency distribution:")
     for freq, count in meal_freq.sort_index().items():
         pct = (count / total) * 100
@@ -322,16 +291,16 @@ if 'S13_17' in df.columns:
 
 print("\nBREASTFEEDING:")
 if 'AS13_15' in df.columns:
-    bf = df['AS13_15'].value_counts()
-    total = df['AS13_15'].notna().sum()
+    bf = counts('AS13_15')
+    total = counts('AS13_15').sum()
     print(f"  Currently breastfeeding:")
     for status, count in bf.items():
         pct = (count / total) * 100
         print(f"    {status}: {count} children ({pct:.1f}%)")
 
 if 'AS13_15_2' in df.columns:
-    ever_bf = df['AS13_15_2'].value_counts()
-    total = df['AS13_15_2'].notna().sum()
+    ever_bf = counts('AS13_15_2')
+    total = counts('AS13_15_2').sum()
     print(f"\n  Ever breastfed:")
     for status, count in ever_bf.items():
         pct = (count / total) * 100
@@ -390,8 +359,8 @@ for col, illness in illness_vars.items():
 
 print("\nHEALTHCARE ACCESS:")
 if 'S13_12' in df.columns:
-    healthcare = df['S13_12'].value_counts()
-    total = df['S13_12'].notna().sum()
+    healthcare = counts('S13_12')
+    total = counts('S13_12').sum()
     print(f"  Saw healthcare provider when sick:")
     for status, count in healthcare.items():
         pct = (count / total) * 100
@@ -431,32 +400,32 @@ print("=" * 80)
 
 print("\nMOTHER'S EDUCATION:")
 if 'mother_education' in df.columns:
-    edu = df['mother_education'].value_counts()
-    total = df['mother_education'].notna().sum()
+    edu = counts('mother_education')
+    total = counts('mother_education').sum()
     for level, count in edu.items():
         pct = (count / total) * 100
         print(f"  {level}: {count} ({pct:.1f}%)")
 
 print("\nMOTHER'S LITERACY:")
 if 'mother_read_and_write' in df.columns:
-    literacy = df['mother_read_and_write'].value_counts()
-    total = df['mother_read_and_write'].notna().sum()
+    literacy = counts('mother_read_and_write')
+    total = counts('mother_read_and_write').sum()
     for status, count in literacy.items():
         pct = (count / total) * 100
         print(f"  {status}: {count} ({pct:.1f}%)")
 
 print("\nMOTHER'S MARITAL STATUS:")
 if 'mother_marital_status' in df.columns:
-    marital = df['mother_marital_status'].value_counts()
-    total = df['mother_marital_status'].notna().sum()
+    marital = counts('mother_marital_status')
+    total = counts('mother_marital_status').sum()
     for status, count in marital.items():
         pct = (count / total) * 100
         print(f"  {status}: {count} ({pct:.1f}%)")
 
 print("\nMOTHER'S DISABILITY:")
 if 'mother_disability' in df.columns:
-    disability = df['mother_disability'].value_counts()
-    total = df['mother_disability'].notna().sum()
+    disability = counts('mother_disability')
+    total = counts('mother_disability').sum()
     for status, count in disability.items():
         pct = (count / total) * 100
         print(f"  {status}: {count} ({pct:.1f}%)")
@@ -470,24 +439,24 @@ print("=" * 80)
 
 print("\nFOOD SECURITY STATUS:")
 if 'FS_final' in df.columns:
-    fs = df['FS_final'].value_counts()
-    total = df['FS_final'].notna().sum()
+    fs = counts('FS_final')
+    total = counts('FS_final').sum()
     for status, count in fs.items():
         pct = (count / total) * 100
         print(f"  {status}: {count} households ({pct:.1f}%)")
 
 print("\nWEALTH INDEX:")
 if 'WI_cat' in df.columns:
-    wi = df['WI_cat'].value_counts()
-    total = df['WI_cat'].notna().sum()
+    wi = counts('WI_cat')
+    total = counts('WI_cat').sum()
     for category, count in wi.items():
         pct = (count / total) * 100
         print(f"  {category}: {count} households ({pct:.1f}%)")
 
 print("\nINCOME QUINTILE:")
 if 'Income_Quintile' in df.columns:
-    inc = df['Income_Quintile'].value_counts().sort_index()
-    total = df['Income_Quintile'].notna().sum()
+    inc = counts('Income_Quintile', sort=False)
+    total = counts('Income_Quintile').sum()
     for quintile, count in inc.items():
         pct = (count / total) * 100
         print(f"  {quintile}: {count} households ({pct:.1f}%)")
@@ -501,8 +470,8 @@ if 'FCS' in df.columns:
 
 if 'FCG' in df.columns:
     print("\n  Food Consumption Groups:")
-    fcg = df['FCG'].value_counts()
-    total = df['FCG'].notna().sum()
+    fcg = counts('FCG')
+    total = counts('FCG').sum()
     for group, count in fcg.items():
         pct = (count / total) * 100
         print(f"    {group}: {count} households ({pct:.1f}%)")
@@ -516,54 +485,22 @@ print("=" * 80)
 
 print("\nSTUNTING BY HOUSEHOLD FOOD SECURITY:")
 if 'Stunting' in df.columns and 'FS_final' in df.columns:
-    stunting_fs = pd.crosstab(df['FS_final'], df['Stunting'], normalize='index') * 100
-    # Calculate total stunting
-    stunted_total = pd.Series(0.0, index=stunting_fs.index)
-    if 'Moderately stunted' in stunting_fs.columns:
-        stunted_total += stunting_fs['Moderately stunted']
-    if 'Severely stunted' in stunting_fs.columns:
-        stunted_total += stunting_fs['Severely stunted']
-    
-    for fs_status, rate in stunted_total.items():
+    for fs_status, rate in affected_rates('FS_final', 'Stunting').items():
         print(f"  {fs_status}: {rate:.1f}% stunted")
 
 print("\nSTUNTING BY WEALTH INDEX:")
 if 'Stunting' in df.columns and 'WI_cat' in df.columns:
-    stunting_wi = pd.crosstab(df['WI_cat'], df['Stunting'], normalize='index') * 100
-    # Calculate total stunting
-    stunted_total = pd.Series(0.0, index=stunting_wi.index)
-    if 'Moderately stunted' in stunting_wi.columns:
-        stunted_total += stunting_wi['Moderately stunted']
-    if 'Severely stunted' in stunting_wi.columns:
-        stunted_total += stunting_wi['Severely stunted']
-    
-    for wi_cat, rate in stunted_total.items():
+    for wi_cat, rate in affected_rates('WI_cat', 'Stunting').items():
         print(f"  {wi_cat}: {rate:.1f}% stunted")
 
 print("\nSTUNTING BY DIETARY DIVERSITY:")
 if 'Stunting' in df.columns and 'minimumDietaryDiversity' in df.columns:
-    stunting_mdd = pd.crosstab(df['minimumDietaryDiversity'], df['Stunting'], normalize='index') * 100
-    # Calculate total stunting
-    stunted_total = pd.Series(0.0, index=stunting_mdd.index)
-    if 'Moderately stunted' in stunting_mdd.columns:
-        stunted_total += stunting_mdd['Moderately stunted']
-    if 'Severely stunted' in stunting_mdd.columns:
-        stunted_total += stunting_mdd['Severely stunted']
-    
-    for mdd_status, rate in stunted_total.items():
+    for mdd_status, rate in affected_rates('minimumDietaryDiversity', 'Stunting').items():
         print(f"  {mdd_status}: {rate:.1f}% stunted")
 
 print("\nWASTING BY RECENT ILLNESS:")
 if 'Wasting' in df.columns and 'S13_11' in df.columns:
-    wasting_illness = pd.crosstab(df['S13_11'], df['Wasting'], normalize='index') * 100
-    # Calculate total wasting
-    wasted_total = pd.Series(0.0, index=wasting_illness.index)
-    if 'Moderately wasted' in wasting_illness.columns:
-        wasted_total += wasting_illness['Moderately wasted']
-    if 'Severely wasted' in wasting_illness.columns:
-        wasted_total += wasting_illness['Severely wasted']
-    
-    for illness_status, rate in wasted_total.items():
+    for illness_status, rate in affected_rates('S13_11', 'Wasting').items():
         print(f"  Had diarrhea={illness_status}: {rate:.1f}% wasted")
 
 print("\n" + "=" * 80)
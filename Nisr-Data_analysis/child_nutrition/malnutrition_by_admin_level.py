@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rwanda CFSVA 2021 - Child Malnutrition Rates at Every Admin Level
+Stunting, wasting and underweight rates (with SEs / 95% CIs) for each admin
+level present in the child file: province and district in the 2021 release,
+plus sector / cell / village when those ids are available.
+
+Writes admin_levels/<level>_malnutrition_rates.csv, one row per unit.
+"""
+
+import os
+import sys
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, CHILD_FILE
+from cfsva.admin import admin_columns, level_rates
+warnings.filterwarnings('ignore')
+
+OUT_DIR = Path('admin_levels')
+# Variance method for the rate SEs/CIs: taylor (default), jackknife or bootstrap
+VARIANCE_METHOD = os.environ.get('CFSVA_VARIANCE', 'taylor')
+# Units with fewer measured children than this are flagged in the summary
+MIN_MEASURED = 10
+
+print("="*80)
+print("CHILD MALNUTRITION RATES BY ADMIN LEVEL - RWANDA CFSVA 2021")
+print("="*80)
+
+columns = admin_columns(CHILD_FILE)
+print(f"\nAdmin levels in {CHILD_FILE.name}: "
+      + ', '.join(f'{level} ({col})' for level, col in columns.items()))
+
+df = load_survey(CHILD_FILE, columns=['index', 'Stunting', 'Wasting', 'Underweight'] + list(columns.values()))
+
+# Districts are the sampling strata and children are clustered in households
+strata = columns.get('district')
+
+OUT_DIR.mkdir(exist_ok=True)
+for level in columns:
+    rates = level_rates(df, level, columns, strata=strata, cluster='index', method=VARIANCE_METHOD)
+    rates = rates.sort_values('Stunting_Rate', ascending=False, kind='stable')
+    out_path = OUT_DIR / f'{level}_malnutrition_rates.csv'
+    rates.to_csv(out_path, index=False)
+
+    small = int((rates['Measured'] < MIN_MEASURED).sum())
+    print(f"\n{level.title()}: {len(rates)} units -> {out_path}"
+          + (f" ({small} with fewer than {MIN_MEASURED} measured children)" if small else ''))
+    top = rates.head(5)[['Key', 'Measured', 'Stunting_Rate', 'Stunting_Rate_CI_Low', 'Stunting_Rate_CI_High']]
+    print(top.round(1).to_string(index=False))
+
+print("\n" + "="*80)
+print("ANALYSIS COMPLETE!")
+print("="*80)
@@ -4,17 +4,26 @@ Rwanda CFSVA 2021 - Child Malnutrition Rates by District
 Analysis of stunting, wasting, and underweight prevalence across 30 districts
 """
 
-import pandas as pd
-import numpy as np
 import warnings
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, CHILD_FILE
+from cfsva.malnutrition import malnutrition_rates
+from cfsva.variance import add_rate_intervals, rate_intervals
 warnings.filterwarnings('ignore')
 
+# Variance method for the rate SEs/CIs: taylor (default), jackknife or bootstrap
+VARIANCE_METHOD = os.environ.get('CFSVA_VARIANCE', 'taylor')
+
 print("="*80)
 print("CHILD MALNUTRITION RATES BY DISTRICT - RWANDA CFSVA 2021")
 print("="*80)
 
-# Load child nutrition data
-df = pd.read_stata('../data/CFSVAHH2021_UNDER_5_ChildWithMother.dta')
+# Load child nutrition data (only the variables this report uses)
+df = load_survey(CHILD_FILE, columns=['index', 'S0_C_Prov', 'S0_D_Dist', 'Stunting', 'Wasting', 'Underweight'])
 
 print(f"\nDataset Overview:")
 print(f"  Total children: {len(df)}")
@@ -62,61 +71,17 @@ print("\n" + "="*80)
 print("2. STUNTING RATES BY DISTRICT")
 print("="*80)
 
-# Calculate stunting by district
-district_malnutrition = []
+# Counts, denominators, rates and modal province for every district in one grouped pass
+district_malnutrition_df = malnutrition_rates(df, by='S0_D_Dist', label='District')
 
-for district in sorted(df['S0_D_Dist'].dropna().unique()):
-    district_df = df[df['S0_D_Dist'] == district]
-    
-    # Sample size
-    n_total = len(district_df)
-    n_measured = district_df['Stunting'].notna().sum()
-    
-    # Stunting
-    stunted_mod = (district_df['Stunting'] == 'Moderately stunted').sum()
-    stunted_sev = (district_df['Stunting'] == 'Severely stunted').sum()
-    stunted_total = stunted_mod + stunted_sev
-    stunting_pct = (stunted_total / n_measured * 100) if n_measured > 0 else 0
-    
-    # Wasting
-    wasted_mod = (district_df['Wasting'] == 'Moderately wasted').sum()
-    wasted_sev = (district_df['Wasting'] == 'Severely wasted').sum()
-    wasted_total = wasted_mod + wasted_sev
-    wasting_pct = (wasted_total / district_df['Wasting'].notna().sum() * 100) if district_df['Wasting'].notna().sum() > 0 else 0
-    
-    # Underweight
-    underweight_mod = (district_df['Underweight'] == 'Moderately underweight').sum()
-    underweight_sev = (district_df['Underweight'] == 'Severely underweight').sum()
-    underweight_total = underweight_mod + underweight_sev
-    underweight_pct = (underweight_total / district_df['Underweight'].notna().sum() * 100) if district_df['Underweight'].notna().sum() > 0 else 0
-    
-    # Province
-    province = district_df['S0_C_Prov'].mode()[0] if len(district_df['S0_C_Prov'].mode()) > 0 else 'Unknown'
-    
-    district_malnutrition.append({
-        'District': district,
-        'Province': province,
-        'Total_Children': n_total,
-        'Measured': n_measured,
-        'Stunted': stunted_total,
-        'Stunting_Rate': stunting_pct,
-        'Stunted_Moderate': stunted_mod,
-        'Stunted_Severe': stunted_sev,
-        'Wasted': wasted_total,
-        'Wasting_Rate': wasting_pct,
-        'Wasted_Moderate': wasted_mod,
-        'Wasted_Severe': wasted_sev,
-        'Underweight': underweight_total,
-        'Underweight_Rate': underweight_pct,
-        'Underweight_Moderate': underweight_mod,
-        'Underweight_Severe': underweight_sev
-    })
-
-# Create dataframe
-district_malnutrition_df = pd.DataFrame(district_malnutrition)
+# Design-based SEs and 95% CIs: districts are the sampling strata and children
+# are clustered in households ('index')
+intervals = rate_intervals(df, by='S0_D_Dist', strata='S0_D_Dist', cluster='index',
+                           method=VARIANCE_METHOD)
+district_malnutrition_df = add_rate_intervals(district_malnutrition_df, intervals, label='District')
 
 # Sort by stunting rate (highest to lowest)
-district_malnutrition_df_sorted = district_malnutrition_df.sort_values('Stunting_Rate', ascending=False)
+district_malnutrition_df_sorted = district_malnutrition_df.sort_values('Stunting_Rate', ascending=False, kind='stable')
 
 print("\nStunting Rates by District (Ranked Highest to Lowest):")
 print("-" * 80)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Rwanda CFSVA 2021 - Small-Area Estimates of Child Malnutrition
+Fay-Herriot (EBLUP) stunting, wasting and underweight rates for every admin
+level below province, borrowing strength from village covariates (road
+access, cereal availability and prices, wages) in CFSVA_2021_VILLAGE.dta.
+
+Reads admin_levels/<level>_malnutrition_rates.csv (malnutrition_by_admin_level.py)
+and writes admin_levels/<level>_sae_rates.csv.
+"""
+
+import sys
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, CHILD_FILE, VILLAGE_FILE
+from cfsva.admin import admin_columns
+from cfsva.malnutrition import INDICATORS
+from cfsva.sae import MIN_AREAS, SAE_COVARIATES, area_covariates, sae_levels, small_area_estimates
+from cfsva.vulnerability import VULNERABILITY_FACTORS
+warnings.filterwarnings('ignore')
+
+LEVELS_DIR = Path('admin_levels')
+
+print("="*80)
+print("SMALL-AREA ESTIMATES OF CHILD MALNUTRITION - RWANDA CFSVA 2021")
+print("="*80)
+
+child_columns = admin_columns(CHILD_FILE)
+village_columns = admin_columns(VILLAGE_FILE)
+levels = sae_levels(child_columns, village_columns)
+print(f"\nLevels modelled: {', '.join(levels) or 'none'}")
+print(f"Covariates: {', '.join(VULNERABILITY_FACTORS[c][4] for c in SAE_COVARIATES)}")
+
+covariate_cols = [VULNERABILITY_FACTORS[c][0] for c in SAE_COVARIATES]
+village = load_survey(VILLAGE_FILE, columns=list(village_columns.values()) + covariate_cols)
+
+for level in levels:
+    rates = pd.read_csv(LEVELS_DIR / f'{level}_malnutrition_rates.csv', dtype={'Key': str})
+    if len(rates) < MIN_AREAS:
+        print(f"\n{level.title()}: only {len(rates)} units, skipped")
+        continue
+    covariates = area_covariates(village, village_columns, level)
+    sae = small_area_estimates(rates, covariates)
+    out_path = LEVELS_DIR / f'{level}_sae_rates.csv'
+    sae.sort_values('Key').to_csv(out_path, index=False)
+
+    print(f"\n{level.title()}: {len(sae)} units -> {out_path}")
+    print(f"{'Indicator':<13} {'Direct SE':>10} {'SAE SE':>8} {'Shrinkage':>10}")
+    for indicator in INDICATORS:
+        direct_se = rates[f'{indicator}_Rate_SE'].median()
+        sae_se = sae[f'{indicator}_Rate_SAE_SE'].median()
+        shrink = sae[f'{indicator}_Shrinkage'].median()
+        print(f"{indicator:<13} {direct_se:>9.2f}% {sae_se:>7.2f}% {shrink:>10.2f}")
+
+    top = sae.nlargest(5, 'Stunting_Rate_SAE')
+    print(f"\nHighest stunting ({level}, small-area estimate):")
+    print(top[['Key', 'Measured', 'Stunting_Rate', 'Stunting_Rate_SAE', 'Stunting_Rate_SAE_SE']]
+          .round(1).to_string(index=False))
+
+print("\n" + "="*80)
+print("ANALYSIS COMPLETE!")
+print("="*80)
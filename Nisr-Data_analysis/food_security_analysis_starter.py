@@ -3,36 +3,52 @@ Rwanda Food Security Analysis - Starter Script
 CFSVA 2021 Data Analysis
 
 This script provides a foundation for analyzing the Rwanda food security datasets.
+
+Run with --stream (or CFSVA_STREAMING=1) to compute the household tables in
+chunks instead of loading the household master dataset into memory.
 """
 
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from cfsva import load_survey, HH_FILE, VILLAGE_FILE, CHILD_FILE
+from cfsva.estimators import weighted_means, weighted_proportions, weighted_crosstab
+from cfsva.streaming import stream_tables
+
+STREAMING = '--stream' in sys.argv or os.environ.get('CFSVA_STREAMING') == '1'
+
+# Household tables reported below
+HH_PERCENTAGES = ['S0_C_Prov', 'UrbanRural', 'FS_final', 'FCG', 'Max_coping_behaviour', 'WI_cat']
+HH_MEANS = ['FCS']
+HH_CROSSTABS = [('S0_C_Prov', 'FS_final'), ('UrbanRural', 'FS_final'), ('WI_cat', 'Max_coping_behaviour')]
+
 # Set display options
 pd.set_option('display.max_columns', 50)
 pd.set_option('display.width', 1000)
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
-# Define data paths
-DATA_DIR = Path('/home/micro/Nisr 2021 food security/Microdata')
-HH_FILE = DATA_DIR / 'CFSVA_HH_2021_MASTER_DATASET.dta'
-VILLAGE_FILE = DATA_DIR / 'CFSVA_2021_VILLAGE.dta'
-CHILD_FILE = DATA_DIR / 'CFSVAHH2021_UNDER_5_ChildWithMother.dta'
-
 print("=" * 80)
 print("Loading Rwanda Food Security Datasets...")
 print("=" * 80)
 
-# Load datasets
-df_household = pd.read_stata(HH_FILE)
-df_village = pd.read_stata(VILLAGE_FILE)
-df_child = pd.read_stata(CHILD_FILE)
-
-print(f"\n✓ Loaded {len(df_household):,} households")
+# Load datasets (decoded once, then served from data/.cache)
+if STREAMING:
+    # Household tables are accumulated chunk by chunk; the frame is never held in memory
+    df_household = None
+    hh = stream_tables(HH_FILE, percentages=HH_PERCENTAGES, means=HH_MEANS, crosstabs=HH_CROSSTABS)
+else:
+    df_household = load_survey(HH_FILE)
+df_village = load_survey(VILLAGE_FILE)
+df_child = load_survey(CHILD_FILE)
+
+n_households = hh['rows'] if STREAMING else len(df_household)
+print(f"\n✓ Loaded {n_households:,} households{' (streamed)' if STREAMING else ''}")
 print(f"✓ Loaded {len(df_village):,} villages")
 print(f"✓ Loaded {len(df_child):,} children under 5")
 
@@ -40,19 +56,29 @@ print(f"✓ Loaded {len(df_child):,} children under 5")
 # HELPER FUNCTIONS
 # ============================================================================
 
+# Thin wrappers over cfsva.estimators (NumPy bincount over integer-coded variables)
+
 def weighted_mean(df, variable, weight_col='FinalWeight'):
     """Calculate weighted mean for a variable."""
-    return np.average(df[variable].dropna(), weights=df.loc[df[variable].notna(), weight_col])
+    return weighted_means(df, [variable], weight=weight_col)[variable]
 
 def weighted_percentage(df, variable, weight_col='FinalWeight'):
     """Calculate weighted percentage distribution."""
-    grouped = df.groupby(variable)[weight_col].sum()
-    return (grouped / grouped.sum() * 100).round(2)
+    return weighted_proportions(df, [variable], weight=weight_col)[variable].round(2).rename(weight_col)
 
 def create_crosstab(df, row_var, col_var, weight_col='FinalWeight'):
     """Create weighted crosstab."""
-    pivot = df.pivot_table(values=weight_col, index=row_var, columns=col_var, aggfunc='sum', fill_value=0)
-    return pivot.div(pivot.sum(axis=1), axis=0) * 100
+    return weighted_crosstab(df, row_var, col_var, weight=weight_col)
+
+if not STREAMING:
+    # All percentage distributions and means in one pass each
+    hh = {
+        'rows': len(df_household),
+        'percentage': {v: pct.round(2).rename('FinalWeight') for v, pct in
+                       weighted_proportions(df_household, HH_PERCENTAGES, weight='FinalWeight').items()},
+        'mean': weighted_means(df_household, HH_MEANS, weight='FinalWeight').to_dict(),
+        'crosstab': {pair: create_crosstab(df_household, *pair) for pair in HH_CROSSTABS},
+    }
 
 # ============================================================================
 # BASIC DATA EXPLORATION
@@ -65,29 +91,29 @@ print("=" * 80)
 print("\n1. GEOGRAPHIC DISTRIBUTION")
 print("-" * 40)
 print("\nProvinces:")
-print(weighted_percentage(df_household, 'S0_C_Prov'))
+print(hh['percentage']['S0_C_Prov'])
 
 print("\nUrban vs Rural:")
-print(weighted_percentage(df_household, 'UrbanRural'))
+print(hh['percentage']['UrbanRural'])
 
 print("\n2. FOOD SECURITY STATUS")
 print("-" * 40)
-food_sec = weighted_percentage(df_household, 'FS_final')
+food_sec = hh['percentage']['FS_final']
 print(food_sec)
 
 print("\n3. FOOD CONSUMPTION SCORE")
 print("-" * 40)
-print(f"Weighted Mean FCS: {weighted_mean(df_household, 'FCS'):.2f}")
+print(f"Weighted Mean FCS: {hh['mean']['FCS']:.2f}")
 print("\nFood Consumption Groups:")
-print(weighted_percentage(df_household, 'FCG'))
+print(hh['percentage']['FCG'])
 
 print("\n4. COPING STRATEGIES")
 print("-" * 40)
-print(weighted_percentage(df_household, 'Max_coping_behaviour'))
+print(hh['percentage']['Max_coping_behaviour'])
 
 print("\n5. WEALTH DISTRIBUTION")
 print("-" * 40)
-print(weighted_percentage(df_household, 'WI_cat'))
+print(hh['percentage']['WI_cat'])
 
 # ============================================================================
 # CHILD NUTRITION ANALYSIS
@@ -126,7 +152,7 @@ print("EXAMPLE: FOOD SECURITY BY PROVINCE")
 print("=" * 80)
 
 # Food security by province
-fs_by_province = create_crosstab(df_household, 'S0_C_Prov', 'FS_final')
+fs_by_province = hh['crosstab'][('S0_C_Prov', 'FS_final')]
 print(fs_by_province.round(1))
 
 print("\n" + "=" * 80)
@@ -134,7 +160,7 @@ print("EXAMPLE: FOOD SECURITY BY URBAN/RURAL")
 print("=" * 80)
 
 # Food security by urban/rural
-fs_by_urban = create_crosstab(df_household, 'UrbanRural', 'FS_final')
+fs_by_urban = hh['crosstab'][('UrbanRural', 'FS_final')]
 print(fs_by_urban.round(1))
 
 print("\n" + "=" * 80)
@@ -142,7 +168,7 @@ print("EXAMPLE: COPING STRATEGIES BY WEALTH QUINTILE")
 print("=" * 80)
 
 # Coping by wealth
-coping_by_wealth = create_crosstab(df_household, 'WI_cat', 'Max_coping_behaviour')
+coping_by_wealth = hh['crosstab'][('WI_cat', 'Max_coping_behaviour')]
 print(coping_by_wealth.round(1))
 
 # ============================================================================
@@ -154,7 +180,7 @@ print("Analysis Complete!")
 print("=" * 80)
 print("\nDatasets are loaded and ready for further analysis.")
 print("\nAvailable DataFrames:")
-print("  - df_household: Main household dataset")
+print("  - df_household: Main household dataset" + (" (not loaded in --stream mode)" if STREAMING else ""))
 print("  - df_village: Village-level dataset")
 print("  - df_child: Under-5 children dataset")
 print("\nHelper functions available:")
@@ -11,6 +11,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, VILLAGE_FILE
+from cfsva.enriched import village_indicators, write_enriched_village
+from cfsva.vulnerability import vulnerability_index
 warnings.filterwarnings('ignore')
 
 # Enhanced display settings
@@ -24,7 +31,7 @@ print("LOADING & EXPLORING VILLAGE DATA")
 print("=" * 80)
 
 # Load data
-df = pd.read_stata('../data/CFSVA_2021_VILLAGE.dta')
+df = load_survey(VILLAGE_FILE)
 print(f"\n✓ Loaded {len(df)} villages with {len(df.columns)} variables")
 
 # Explore column structure
@@ -275,37 +282,12 @@ print("\n" + "=" * 80)
 print("SECTION 6: VILLAGE VULNERABILITY INDEX")
 print("=" * 80)
 
-# Create comprehensive vulnerability score
-vuln_score = pd.Series(0, index=df.index)
-
-# Factor 1: Infrastructure deficits (0-3 points)
-vuln_score += (df['S3_02'] != 1).astype(int)  # No school
-vuln_score += (df['S3_03'] != 1).astype(int)  # No health facility
-vuln_score += (df['S4_01'] != 1).astype(int)  # No market
-
-# Factor 2: Market access (0-2 points)
-vuln_score += (df['S4_02_4'] == 'No').astype(int)  # Poor road access
-vuln_score += (df['S4_02_3'] > 10).fillna(False).astype(int)  # Far from market
-
-# Factor 3: Food availability (0-3 points)
-vuln_score += (df['S5_01_2'] == 'Low (insufficient)').astype(int)  # Low cereal
-vuln_score += (df['S5_02_2'] == 'Low (insufficient)').astype(int)  # Low tubers
-vuln_score += (df['S5_03_2'] == 'Low (insufficient)').astype(int)  # Low pulses
-
-# Factor 4: Food prices (0-2 points)
-vuln_score += (df['S5_01_3'] == 'Higher that normal').astype(int)
-vuln_score += (df['S5_02_3'] == 'Higher that normal').astype(int)
-
-# Factor 5: Wages (0-2 points)
-vuln_score += (df['S6_01'] < df['S6_01'].median()).fillna(False).astype(int)
-vuln_score += (df['S6_01_3'] == 'Lower than normal').astype(int)
-
-df['vulnerability_score'] = vuln_score
-
-# Categorize
-df['vulnerability_level'] = pd.cut(vuln_score, 
-                                   bins=[-1, 3, 6, 100],
-                                   labels=['Low', 'Medium', 'High'])
+# Composite score (infrastructure, market access, food availability, prices,
+# wages) from the shared factor definitions
+vuln = vulnerability_index(df)
+df['vulnerability_score'] = vuln['vulnerability_score']
+df['vulnerability_level'] = vuln['vulnerability_level']
+vuln_score = df['vulnerability_score']
 
 print("\n📊 VULNERABILITY SCORE DISTRIBUTION:")
 print(f"  Mean score: {vuln_score.mean():.2f}")
@@ -348,12 +330,9 @@ print("\n" + "=" * 80)
 print("SECTION 7: KEY CORRELATIONS")
 print("=" * 80)
 
-# Create numerical indicators
-df['has_school'] = (df['S3_02'] == 1).astype(int)
-df['has_health'] = (df['S3_03'] == 1).astype(int)
-df['has_market'] = (df['S4_01'] == 1).astype(int)
-df['good_roads'] = (df['S4_02_4'] == 'Yes').astype(int)
-df['is_urban'] = (df['UrbanRural'] == 'Urban').astype(int)
+# Create numerical indicators (has_school, has_health, has_market, good_roads, is_urban)
+for name, values in village_indicators(df).items():
+    df[name] = values
 
 # Correlation matrix
 corr_vars = ['vulnerability_score', 'has_school', 'has_health', 'has_market', 
@@ -379,4 +358,8 @@ print("\n" + "=" * 80)
 print("✓ ANALYSIS COMPLETE!")
 print("=" * 80)
 print(f"\nDataset enriched with {len([c for c in df.columns if c.startswith('vulnerability')])} new variables")
+
+# Persist the enriched frame so the figures and exports can load it directly
+enriched_path = write_enriched_village(df)
+print(f"Saved enriched village dataset: {enriched_path}")
 print("Ready for visualization and export")
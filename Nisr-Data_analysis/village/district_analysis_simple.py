@@ -6,6 +6,12 @@ Analysis of 900 villages across 30 districts
 
 import pandas as pd
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, VILLAGE_FILE
+from cfsva.estimators import weighted_counts, weighted_crosstab
 warnings = pd.options.mode.chained_assignment = None
 
 print("="*80)
@@ -13,7 +19,7 @@ print("RWANDA CFSVA 2021 - DISTRICT-BASED VILLAGE ANALYSIS")
 print("="*80)
 
 # Load data
-df = pd.read_stata('../data/CFSVA_2021_VILLAGE.dta')
+df = load_survey(VILLAGE_FILE)
 
 print(f"\nDataset Overview:")
 print(f"  Total villages: {len(df)}")
@@ -35,7 +41,7 @@ for district, count in district_counts.items():
 
 # Urban/Rural by district
 print("\n\nUrban/Rural Distribution by District:")
-location_dist = pd.crosstab(df['S0_D_Dist'], df['UrbanRural'], normalize='index') * 100
+location_dist = weighted_crosstab(df, 'S0_D_Dist', 'UrbanRural')
 print(location_dist.round(1).to_string())
 
 # ============================================================================
@@ -112,12 +118,12 @@ print(f"\nTotal categorical variables: {len(categorical_cols)}")
 
 # Show some key categorical variables by district
 print("\nKey categorical patterns:")
-for col in categorical_cols[:10]:
-    unique_vals = df[col].nunique()
-    if 2 <= unique_vals <= 10:  # Only show manageable categories
-        print(f"\n{col} ({unique_vals} categories):")
-        crosstab = pd.crosstab(df['S0_D_Dist'], df[col])
-        print(f"  Total responses: {crosstab.sum().sum()}")
+# District x label counts for all shown variables in one pass
+pattern_cols = [col for col in categorical_cols[:10] if 2 <= df[col].nunique() <= 10]  # Only show manageable categories
+pattern_counts = weighted_counts(df, pattern_cols, by='S0_D_Dist')
+for col in pattern_cols:
+    print(f"\n{col} ({df[col].nunique()} categories):")
+    print(f"  Total responses: {int(pattern_counts[col].to_numpy().sum())}")
 
 # ============================================================================
 # 6. SAVE COMPREHENSIVE RESULTS
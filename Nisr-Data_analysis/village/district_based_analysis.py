@@ -8,6 +8,12 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, VILLAGE_FILE
+from cfsva.vulnerability import VULNERABILITY_FACTORS, vulnerability_index
 warnings.filterwarnings('ignore')
 
 print("="*80)
@@ -15,7 +21,7 @@ print("LOADING VILLAGE DATA - DISTRICT-BASED ANALYSIS")
 print("="*80)
 
 # Load data
-df = pd.read_stata('../data/CFSVA_2021_VILLAGE.dta')
+df = load_survey(VILLAGE_FILE)
 
 print(f"\nDataset loaded successfully!")
 print(f"  Total villages: {len(df)}")
@@ -108,34 +114,16 @@ print("\n" + "="*80)
 print("5. VULNERABILITY INDEX BY DISTRICT")
 print("="*80)
 
-# Create vulnerability index based on multiple factors
-vulnerability_data = df.copy()
-
-# Infrastructure access (poor access = 1, good = 0)
-vulnerability_data['infra_water'] = (df['S2Q1_Time_Water'] > df['S2Q1_Time_Water'].median()).astype(int)
-vulnerability_data['infra_market'] = (df['S2Q3_Time_Market'] > df['S2Q3_Time_Market'].median()).astype(int)
-vulnerability_data['infra_health'] = (df['S2Q2_Time_Health'] > df['S2Q2_Time_Health'].median()).astype(int)
-
-# Food prices (high prices = 1, low = 0)
-vulnerability_data['price_beans'] = (df['S3Q1a_Beans'] > df['S3Q1a_Beans'].median()).astype(int)
-vulnerability_data['price_maize'] = (df['S3Q1c_Maize'] > df['S3Q1c_Maize'].median()).astype(int)
-vulnerability_data['price_rice'] = (df['S3Q1e_Rice'] > df['S3Q1e_Rice'].median()).astype(int)
-
-# Wages (low wages = 1, high = 0)
-vulnerability_data['wage_male'] = (df['S4Q1a_Wage_AgriMale'] < df['S4Q1a_Wage_AgriMale'].median()).astype(int)
-vulnerability_data['wage_female'] = (df['S4Q1b_Wage_AgriFemale'] < df['S4Q1b_Wage_AgriFemale'].median()).astype(int)
-
-# Calculate total vulnerability score (0-8)
-vuln_cols = ['infra_water', 'infra_market', 'infra_health', 'price_beans', 
-             'price_maize', 'price_rice', 'wage_male', 'wage_female']
-vulnerability_data['vuln_score'] = vulnerability_data[vuln_cols].sum(axis=1)
+# Shared village vulnerability index (no copy of the survey frame)
+vuln = vulnerability_index(df)
+max_score = sum(weight for _, _, _, weight, _ in VULNERABILITY_FACTORS.values())
 
 # District-level vulnerability
-district_vulnerability = vulnerability_data.groupby('S0_D_Dist')['vuln_score'].agg(['mean', 'std'])
-district_vulnerability['high_vuln_pct'] = (vulnerability_data.groupby('S0_D_Dist')['vuln_score']
-                                           .apply(lambda x: (x >= 5).sum() / len(x) * 100))
+district_vulnerability = vuln['vulnerability_score'].groupby(df['S0_D_Dist'], observed=True).agg(['mean', 'std'])
+district_vulnerability['high_vuln_pct'] = (vuln['vulnerability_level'] == 'High').groupby(
+    df['S0_D_Dist'], observed=True).mean() * 100
 
-print("\nVulnerability Index by District (0-8 scale, higher = more vulnerable):")
+print(f"\nVulnerability Index by District (0-{max_score} scale, higher = more vulnerable):")
 print(district_vulnerability.sort_values('mean', ascending=False).round(2))
 
 # ============================================================================
@@ -186,14 +174,14 @@ district_profile = pd.DataFrame({
     'Rice_Price': df.groupby('S0_D_Dist')['S3Q1e_Rice'].mean(),
     'Male_Wage': df.groupby('S0_D_Dist')['S4Q1a_Wage_AgriMale'].mean(),
     'Female_Wage': df.groupby('S0_D_Dist')['S4Q1b_Wage_AgriFemale'].mean(),
-    'Vuln_Score': vulnerability_data.groupby('S0_D_Dist')['vuln_score'].mean()
+    'Vuln_Score': district_vulnerability['mean']
 })
 
 print("\n\nTOP 10 MOST VULNERABLE DISTRICTS:")
 top_vulnerable = district_profile.nlargest(10, 'Vuln_Score')
 for idx, (district, row) in enumerate(top_vulnerable.iterrows(), 1):
     print(f"\n{idx}. {district}")
-    print(f"   Vulnerability Score: {row['Vuln_Score']:.2f}/8")
+    print(f"   Vulnerability Score: {row['Vuln_Score']:.2f}/{max_score}")
     print(f"   Water access: {row['Avg_Water_Time']:.0f} min")
     print(f"   Market access: {row['Avg_Market_Time']:.0f} min")
     print(f"   Daily wages: Male {row['Male_Wage']:.0f} RWF, Female {row['Female_Wage']:.0f} RWF")
@@ -202,7 +190,7 @@ print("\n\nTOP 10 LEAST VULNERABLE DISTRICTS:")
 least_vulnerable = district_profile.nsmallest(10, 'Vuln_Score')
 for idx, (district, row) in enumerate(least_vulnerable.iterrows(), 1):
     print(f"\n{idx}. {district}")
-    print(f"   Vulnerability Score: {row['Vuln_Score']:.2f}/8")
+    print(f"   Vulnerability Score: {row['Vuln_Score']:.2f}/{max_score}")
     print(f"   Water access: {row['Avg_Water_Time']:.0f} min")
     print(f"   Market access: {row['Avg_Market_Time']:.0f} min")
     print(f"   Daily wages: Male {row['Male_Wage']:.0f} RWF, Female {row['Female_Wage']:.0f} RWF")
@@ -227,7 +215,7 @@ with open('district_analysis_detailed.txt', 'w') as f:
     f.write("-"*80 + "\n")
     vuln_ranked = district_profile.sort_values('Vuln_Score', ascending=False)
     for idx, (district, row) in enumerate(vuln_ranked.iterrows(), 1):
-        f.write(f"{idx:2d}. {district:20s} - Score: {row['Vuln_Score']:.2f}/8\n")
+        f.write(f"{idx:2d}. {district:20s} - Score: {row['Vuln_Score']:.2f}/{max_score}\n")
     
     f.write("\n\nINFRASTRUCTURE ACCESS RANKINGS\n")
     f.write("-"*80 + "\n")
@@ -13,6 +13,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, VILLAGE_FILE
 warnings.filterwarnings('ignore')
 
 # Set display options
@@ -30,7 +35,7 @@ print("LOADING & EXPLORING VILLAGE DATA")
 print("=" * 80)
 
 # Load data
-df = pd.read_stata('../data/CFSVA_2021_VILLAGE.dta')
+df = load_survey(VILLAGE_FILE)
 df_village = df  # Use consistent naming
 
 print(f"\nDataset loaded successfully!")
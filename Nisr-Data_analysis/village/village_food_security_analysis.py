@@ -13,6 +13,12 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva import load_survey, VILLAGE_FILE
+from cfsva.vulnerability import vulnerability_index
 warnings.filterwarnings('ignore')
 
 # Set display options
@@ -30,7 +36,7 @@ print("LOADING VILLAGE-LEVEL FOOD SECURITY DATA")
 print("=" * 80)
 
 # Load the village dataset
-df_village = pd.read_stata('../data/CFSVA_2021_VILLAGE.dta')
+df_village = load_survey(VILLAGE_FILE)
 
 print(f"\n✓ Dataset loaded successfully!")
 print(f"  - Total villages surveyed: {len(df_village)}")
@@ -433,42 +439,18 @@ print("\n" + "=" * 80)
 print("10. VILLAGE VULNERABILITY COMPOSITE INDEX")
 print("=" * 80)
 
-# Create vulnerability score (higher = more vulnerable)
-vulnerability_score = pd.Series(0, index=df_village.index)
-
-# Infrastructure access (lack of = +1 each)
-if 'S3_02' in df_village.columns:
-    vulnerability_score += (df_village['S3_02'] != 1).astype(int)
-if 'S3_03' in df_village.columns:
-    vulnerability_score += (df_village['S3_03'] != 1).astype(int)
-if 'S4_01' in df_village.columns:
-    vulnerability_score += (df_village['S4_01'] != 1).astype(int)
-
-# Market challenges (+1 for each major challenge)
-for col in ['S4_02_6_SMT_1', 'S4_02_6_SMT_6', 'S4_02_6_SMT_9']:
-    if col in df_village.columns:
-        vulnerability_score += (df_village[col] == 1).astype(int)
-
-# Shocks (+2 for experiencing shocks)
-if 'S8_01' in df_village.columns:
-    vulnerability_score += (df_village['S8_01'] == 1).astype(int) * 2
-
-# No safety nets (+1)
-if 'S2_03_SMT_88' in df_village.columns:
-    vulnerability_score += (df_village['S2_03_SMT_88'] == 1).astype(int)
-
+# Create vulnerability score (higher = more vulnerable), using the same
+# 12-factor index as the other village scripts
+vuln = vulnerability_index(df_village)
+vulnerability_score = vuln['vulnerability_score']
 df_village['vulnerability_score'] = vulnerability_score
+df_village['vulnerability_category'] = vuln['vulnerability_level']
 
 print("\n📊 VULNERABILITY DISTRIBUTION:")
 print(f"  Mean vulnerability score: {vulnerability_score.mean():.2f}")
 print(f"  Median vulnerability score: {vulnerability_score.median():.2f}")
 print(f"  Score range: {vulnerability_score.min():.0f} - {vulnerability_score.max():.0f}")
 
-# Categorize vulnerability
-df_village['vulnerability_category'] = pd.cut(vulnerability_score, 
-                                              bins=[0, 2, 4, 10],
-                                              labels=['Low', 'Medium', 'High'])
-
 print("\n📈 VILLAGES BY VULNERABILITY LEVEL:")
 vuln_dist = df_village['vulnerability_category'].value_counts()
 for category in ['Low', 'Medium', 'High']:
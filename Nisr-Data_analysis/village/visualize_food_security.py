@@ -10,30 +10,17 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from cfsva.enriched import load_enriched_village
 warnings.filterwarnings('ignore')
 
-# Load and prepare data
+# Load the enriched village dataset (survey + vulnerability score/level),
+# written by advanced_village_analytics.py and rebuilt here if stale
 print("Loading data and creating visualizations...")
-df = pd.read_stata('../data/CFSVA_2021_VILLAGE.dta')
-
-# Create vulnerability score
-vuln_score = pd.Series(0, index=df.index)
-vuln_score += (df['S3_02'] != 1).astype(int)
-vuln_score += (df['S3_03'] != 1).astype(int)
-vuln_score += (df['S4_01'] != 1).astype(int)
-vuln_score += (df['S4_02_4'] == 'No').astype(int)
-vuln_score += (df['S4_02_3'] > 10).fillna(False).astype(int)
-vuln_score += (df['S5_01_2'] == 'Low (insufficient)').astype(int)
-vuln_score += (df['S5_02_2'] == 'Low (insufficient)').astype(int)
-vuln_score += (df['S5_03_2'] == 'Low (insufficient)').astype(int)
-vuln_score += (df['S5_01_3'] == 'Higher that normal').astype(int)
-vuln_score += (df['S5_02_3'] == 'Higher that normal').astype(int)
-vuln_score += (df['S6_01'] < df['S6_01'].median()).fillna(False).astype(int)
-vuln_score += (df['S6_01_3'] == 'Lower than normal').astype(int)
-
-df['vulnerability_score'] = vuln_score
-df['vulnerability_level'] = pd.cut(vuln_score, bins=[-1, 3, 6, 100],
-                                   labels=['Low', 'Medium', 'High'])
+df = load_enriched_village()
 
 # Set style
 sns.set_style("whitegrid")
@@ -0,0 +1,9 @@
+"""
+Stunting-risk model of `malnutrition_model.ipynb`, packaged for serving.
+
+The notebook fits a scikit-learn Pipeline (ColumnTransformer + RandomForest)
+on engineered features and saves it with joblib. `features` rebuilds those
+features from the raw child/household fields the prediction form sends,
+`compiled` exports the pipeline to NumPy arrays with a standalone runtime,
+and `service` serves either over HTTP.
+"""
@@ -0,0 +1,171 @@
+"""
+Bulk scoring of many children with the stunting-risk pipeline.
+
+    cd ml_model
+    python -m malnutrition.batch roster.csv scored.csv --poverty-threshold 65000
+
+The input (CSV or Parquet) has one row per child with the raw fields of
+`features.INPUT_FIELDS`; the output is the input plus 'stunting_high_risk',
+'probability', 'risk_category' and 'confidence'. CSV input is read and
+scored `--chunk-size` rows at a time, so memory stays bounded whatever the
+roster size; each chunk is one pipeline call. The command line scores with
+the scikit-learn pipeline rather than the compiled .npz, which is slower on
+chunks this large (`model.BULK_ROWS`); the .npz is used only when
+scikit-learn is not installed.
+
+`MicroBatcher` is the in-process counterpart for the service: concurrent
+single predictions that arrive within a short window are scored together.
+"""
+
+import asyncio
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .features import FeatureTransformer
+
+CHUNK_SIZE = 50_000
+PREDICTION_COLUMNS = ['stunting_high_risk', 'probability', 'risk_category', 'confidence']
+
+
+def feature_frame(records, poverty_threshold):
+    """SELECTED_FEATURES frame of a DataFrame or list of raw records."""
+    return FeatureTransformer(poverty_threshold).transform(records)
+
+
+def predict_frame(model, frame, poverty_threshold):
+    """Prediction columns (DataFrame aligned with `frame`) for raw records."""
+    proba = model.predict_proba(feature_frame(frame, poverty_threshold))
+    # same as model.predict(), without scoring the forest twice
+    labels = model.classes_[proba.argmax(axis=1)].astype(bool)
+    p = proba[:, 1]
+    return pd.DataFrame({
+        'stunting_high_risk': labels,
+        'probability': p,
+        'risk_category': np.where(labels, 'High', 'Low'),
+        'confidence': np.maximum(p, 1 - p),
+    }, index=frame.index if isinstance(frame, pd.DataFrame) else None)
+
+
+def predict_records(model, records, poverty_threshold, chunk_size=CHUNK_SIZE):
+    """Prediction dicts for a list of raw records, scored `chunk_size` at a time."""
+    out = []
+    for start in range(0, len(records), chunk_size):
+        out += predict_frame(model, records[start:start + chunk_size], poverty_threshold).to_dict('records')
+    return out
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """DataFrames of at most `chunk_size` rows from a CSV or Parquet file."""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            yield from _split(pd.read_parquet(path), chunk_size)
+            return
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def _split(frame, chunk_size):
+    for start in range(0, len(frame), chunk_size):
+        yield frame.iloc[start:start + chunk_size]
+
+
+def score_file(model, poverty_threshold, src, dst, chunk_size=CHUNK_SIZE):
+    """Score every row of `src` into `dst` (CSV); returns the number of rows."""
+    rows = 0
+    for i, chunk in enumerate(iter_chunks(src, chunk_size)):
+        # a labelled roster keeps its features; its label is replaced by the prediction
+        scored = chunk.drop(columns=PREDICTION_COLUMNS, errors='ignore').join(
+            predict_frame(model, chunk, poverty_threshold))
+        scored.to_csv(dst, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+class MicroBatcher:
+    """
+    Collects concurrent predict() calls and scores them in one pipeline call.
+
+    A batch is flushed `window` seconds after its first record arrives, or as
+    soon as it holds `max_batch` records. Scoring runs in a worker thread.
+    """
+
+    def __init__(self, score_batch, window=0.005, max_batch=256):
+        self.score_batch = score_batch      # list of records -> list of results
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, record):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            records = [record for record, _ in batch]
+            try:
+                results = await asyncio.to_thread(self.score_batch, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from .model import load_model
+
+    parser = argparse.ArgumentParser(description='Score a roster of children with the stunting-risk model.')
+    parser.add_argument('input', help='CSV or Parquet file with the raw model fields')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--model', help='joblib pipeline (default: MALNUTRITION_MODEL or the notebook output)')
+    parser.add_argument('--poverty-threshold', type=float,
+                        help='default: POVERTY_THRESHOLD or the model .meta.json')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.poverty_threshold is not None:
+        import os
+        os.environ['POVERTY_THRESHOLD'] = str(args.poverty_threshold)
+    model, threshold, model_path = load_model(args.model, compiled=False)
+    start = time.perf_counter()
+    n = score_file(model, threshold, args.input, args.output, args.chunk_size)
+    seconds = time.perf_counter() - start
+    print(f'Scored {n} rows with {model_path.name} in {seconds:.1f}s ({n / max(seconds, 1e-9):,.0f} rows/s)')
+    print('Wrote', args.output)
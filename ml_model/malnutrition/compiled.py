@@ -0,0 +1,250 @@
+"""
+Compiled form of the stunting-risk pipeline: NumPy arrays and a small runtime.
+
+    cd ml_model
+    python -m malnutrition.compiled best_malnutrition_model_random_forest.pkl \
+        --check malnutrition_prediction_dataset.csv
+
+writes best_malnutrition_model_random_forest.npz next to the pickle. The .npz
+holds the imputer/scaler statistics, the one-hot categories and every tree of
+the forest flattened into node arrays; `CompiledModel` scores it with NumPy
+only, with no scikit-learn import and no per-tree Python objects.
+Predictions are identical to the pipeline's: inputs are cast to float32
+before the split comparisons and tree probabilities are summed in tree order,
+exactly as scikit-learn does.
+
+Supported pipeline: ColumnTransformer of [SimpleImputer] + [StandardScaler]
+numeric columns and [SimpleImputer] + OneHotEncoder categorical columns,
+followed by a RandomForestClassifier (or a single DecisionTreeClassifier).
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+ROW_BLOCK = 4096        # rows traversed at once, bounds the (rows x trees) path arrays
+
+
+def _compile_columns(name, steps, columns):
+    """Per-column arrays of one ColumnTransformer branch."""
+    spec = {'columns': list(columns), 'fill': None, 'mean': None, 'scale': None, 'categories': None}
+    for step in steps:
+        kind = type(step).__name__
+        if kind == 'SimpleImputer':
+            spec['fill'] = step.statistics_
+        elif kind == 'StandardScaler':
+            spec['mean'] = step.mean_ if step.with_mean else None
+            spec['scale'] = step.scale_ if step.with_std else None
+        elif kind == 'OneHotEncoder':
+            if step.handle_unknown != 'ignore' or step.drop is not None:
+                raise ValueError(f"{name}: only OneHotEncoder(handle_unknown='ignore', drop=None) is supported")
+            spec['categories'] = [np.asarray(c) for c in step.categories_]
+        else:
+            raise ValueError(f'{name}: unsupported step {kind}')
+    return spec
+
+
+def _compile_trees(estimators):
+    """Flatten fitted trees into one set of node arrays."""
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for est in estimators:
+        tree = est.tree_
+        leaf = tree.children_left == -1
+        nodes = np.arange(tree.node_count)
+        # leaves point to themselves, so traversal can run a fixed number of steps
+        left.append(np.where(leaf, nodes, tree.children_left) + offset)
+        right.append(np.where(leaf, nodes, tree.children_right) + offset)
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, 0.0, tree.threshold))
+        proba = tree.value[:, 0, :].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+        value.append(proba / normalizer)
+        roots.append(offset)
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+    return {
+        'tree_feature': np.concatenate(feature).astype(np.int32),
+        'tree_threshold': np.concatenate(threshold),
+        'tree_left': np.concatenate(left).astype(np.int32),
+        'tree_right': np.concatenate(right).astype(np.int32),
+        'tree_value': np.concatenate(value),
+        'tree_roots': np.asarray(roots, dtype=np.int32),
+        'max_depth': depth,
+    }
+
+
+def compile_pipeline(pipeline):
+    """(arrays, meta) of a fitted preprocessor + forest pipeline."""
+    steps = list(pipeline.named_steps.values())
+    if len(steps) != 2:
+        raise ValueError('expected a Pipeline of (preprocessor, model)')
+    preprocessor, forest = steps
+    branches = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop':
+            continue
+        if transformer == 'passthrough':
+            sub = []
+        else:
+            sub = list(getattr(transformer, 'named_steps', {name: transformer}).values())
+        branches.append(_compile_columns(name, sub, columns))
+    if getattr(forest, 'n_outputs_', 1) != 1:
+        raise ValueError('multi-output models are not supported')
+    estimators = getattr(forest, 'estimators_', [forest])
+
+    arrays = _compile_trees(estimators)
+    max_depth = int(arrays.pop('max_depth'))
+    meta = {'format': FORMAT_VERSION, 'max_depth': max_depth, 'branches': []}
+    for i, spec in enumerate(branches):
+        entry = {'columns': spec['columns'], 'categorical': spec['categories'] is not None}
+        for key in ('fill', 'mean', 'scale'):
+            if spec[key] is not None:
+                entry[key] = f'b{i}_{key}'
+                # the categorical fill is a string, numeric ones are float64
+                arrays[entry[key]] = np.asarray(spec[key], dtype=str if entry['categorical'] else np.float64)
+        if entry['categorical']:
+            entry['categories'] = []
+            for j, cats in enumerate(spec['categories']):
+                key = f'b{i}_cat{j}'
+                arrays[key] = cats.astype(str)
+                entry['categories'].append(key)
+        meta['branches'].append(entry)
+    arrays['classes'] = np.asarray(forest.classes_)
+    return arrays, meta
+
+
+def export(pipeline, path):
+    """Write the compiled pipeline to `path` (.npz)."""
+    arrays, meta = compile_pipeline(pipeline)
+    np.savez_compressed(path, meta=np.asarray(json.dumps(meta)), **arrays)
+    return Path(path)
+
+
+class CompiledModel:
+    """predict_proba / predict of an exported pipeline, with NumPy only."""
+
+    def __init__(self, arrays):
+        meta = json.loads(str(arrays['meta']))
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"unsupported compiled model format {meta.get('format')}")
+        self.max_depth = meta['max_depth']
+        self.classes_ = arrays['classes']
+        self.feature = arrays['tree_feature']
+        self.threshold = arrays['tree_threshold']
+        self.left = arrays['tree_left']
+        self.right = arrays['tree_right']
+        self.value = arrays['tree_value']
+        self.roots = arrays['tree_roots']
+        # children[2 * node + went_left]: one gather per step instead of two and a select
+        self.children = np.column_stack([self.right, self.left]).ravel()
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.branches = []
+        for entry in meta['branches']:
+            branch = dict(entry)
+            for key in ('fill', 'mean', 'scale'):
+                if key in entry:
+                    branch[key] = arrays[entry[key]]
+            if entry['categorical']:
+                branch['categories'] = [arrays[key] for key in entry['categories']]
+            self.branches.append(branch)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            return cls({key: f[key] for key in f.files})
+
+    def transform(self, frame):
+        """Preprocessed float matrix of a DataFrame with the training columns."""
+        blocks = []
+        for branch in self.branches:
+            if branch['categorical']:
+                for j, (column, cats) in enumerate(zip(branch['columns'], branch['categories'])):
+                    values = frame[column]
+                    if 'fill' in branch:
+                        values = values.where(values.notna(), branch['fill'][j])
+                    values = values.astype(str).to_numpy()
+                    # unknown categories encode as all zeros (handle_unknown='ignore')
+                    blocks.append((values[:, None] == cats[None, :]).astype(np.float64))
+            else:
+                x = frame[branch['columns']].to_numpy(dtype=np.float64, na_value=np.nan)
+                if 'fill' in branch:
+                    x = np.where(np.isnan(x), branch['fill'], x)
+                if 'mean' in branch:
+                    x = x - branch['mean']
+                if 'scale' in branch:
+                    x = x / branch['scale']
+                blocks.append(x)
+        return np.hstack(blocks)
+
+    def _forest_proba(self, X):
+        # the trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32).astype(np.float64)
+        n_trees = len(self.roots)
+        node = np.tile(self.roots, len(X))                      # one path per (row, tree)
+        row_offset = np.repeat(np.arange(len(X)) * X.shape[1], n_trees)
+        X = X.ravel()
+        active = np.arange(len(node))
+        while len(active):
+            current = node[active]
+            go_left = X[row_offset[active] + self.feature[current]] <= self.threshold[current]
+            current = self.children[2 * current + go_left]
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        # tree probabilities summed in tree order, as scikit-learn accumulates them
+        proba = np.cumsum(self.value[node.reshape(-1, n_trees)], axis=1)[:, -1]
+        return proba / n_trees
+
+    def predict_proba(self, frame):
+        X = self.transform(frame)
+        return np.vstack([self._forest_proba(X[start:start + ROW_BLOCK])
+                          for start in range(0, len(X), ROW_BLOCK)] or [np.empty((0, len(self.classes_)))])
+
+    def predict(self, frame):
+        return self.classes_[self.predict_proba(frame).argmax(axis=1)]
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    import joblib
+
+    parser = argparse.ArgumentParser(description='Compile the stunting-risk pipeline to NumPy arrays.')
+    parser.add_argument('model', help='joblib pipeline saved by the notebook')
+    parser.add_argument('output', nargs='?', help='default: <model>.npz')
+    parser.add_argument('--check', help='CSV of raw records to compare predictions on')
+    parser.add_argument('--poverty-threshold', type=float,
+                        help='for --check; default: POVERTY_THRESHOLD or the model .meta.json')
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.model)
+    output = export(pipeline, args.output or Path(args.model).with_suffix('.npz'))
+    print(f'Wrote {output} ({output.stat().st_size / 1024:.0f} KB, {Path(args.model).stat().st_size / 1024:.0f} KB pickled)')
+
+    if args.check:
+        import os
+
+        from .batch import feature_frame
+        from .model import model_metadata
+
+        threshold = args.poverty_threshold or os.environ.get('POVERTY_THRESHOLD') \
+            or model_metadata(args.model).get('poverty_threshold')
+        if threshold is None:
+            raise SystemExit('--check needs --poverty-threshold')
+        frame = feature_frame(pd.read_csv(args.check), float(threshold))
+        compiled = CompiledModel.load(output)
+        start = time.perf_counter()
+        expected = pipeline.predict_proba(frame)
+        sk_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        got = compiled.predict_proba(frame)
+        seconds = time.perf_counter() - start
+        if not np.array_equal(expected, got):
+            raise SystemExit(f'MISMATCH: max difference {np.abs(expected - got).max()}')
+        print(f'{len(frame)} rows identical (scikit-learn {sk_seconds:.2f}s, compiled {seconds:.2f}s)')
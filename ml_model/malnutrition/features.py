@@ -0,0 +1,115 @@
+"""
+Model features from the raw prediction-form fields.
+
+Mirrors the feature-engineering cell of `malnutrition_model.ipynb`: the age
+group, the poverty flag and the WASH, health-vulnerability and composite risk
+scores, as column expressions (`pd.cut`, `np.select`) over a whole frame.
+Training (`train`), batch scoring (`batch`) and the service all go through
+`FeatureTransformer`, so the features cannot drift between them.
+
+The poverty threshold is the 30% quantile of household income in the
+training data. It is learnt by `FeatureTransformer.fit` and saved in
+<model>.meta.json, since it is not part of the joblib pipeline.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Raw fields of one child, as posted by react-web-prediction_model's Prediction form
+INPUT_FIELDS = [
+    'age_months', 'household_income', 'family_size', 'food_insecurity', 'breastfeeding',
+    'vaccination_complete', 'diarrhea_last_week', 'clean_water_access', 'improved_sanitation',
+    'stunting_risk_score', 'rural_urban', 'region', 'mother_education',
+]
+
+# Columns the pipeline was fitted on, in training order
+SELECTED_FEATURES = [
+    'food_insecurity', 'wash_score', 'composite_risk_score', 'stunting_risk_score',
+    'age_months', 'rural_urban', 'region',
+    'household_income', 'mother_education', 'poverty_status',
+    'breastfeeding', 'vaccination_complete', 'diarrhea_last_week', 'health_vulnerability',
+    'family_size',
+]
+
+# Critical periods for malnutrition (the notebook's create_age_groups)
+AGE_BINS = [-np.inf, 6, 12, 24, 36, np.inf]
+AGE_GROUPS = ['0-5_months', '6-11_months', '12-23_months', '24-35_months', '36-59_months']
+POVERTY_QUANTILE = 0.3
+CATEGORICAL_FIELDS = ['rural_urban', 'region', 'mother_education']
+
+
+def engineered_columns(columns, poverty_threshold):
+    """Engineered model features (dict of arrays) from raw column arrays."""
+    clean_water = columns['clean_water_access']
+    sanitation = columns['improved_sanitation']
+    health_vulnerability = (
+        columns['diarrhea_last_week'] +
+        (1 - columns['vaccination_complete']) +
+        (1 - columns['breastfeeding'])
+    )
+    return {
+        # missing incomes compare False, i.e. 'Above_poverty', as in the notebook
+        'poverty_status': np.select([columns['household_income'] < poverty_threshold],
+                                    ['Below_poverty'], 'Above_poverty').astype(object),
+        'wash_score': clean_water + sanitation,
+        'health_vulnerability': health_vulnerability,
+        'composite_risk_score': (
+            columns['food_insecurity'] +
+            (1 - clean_water) +
+            (1 - sanitation) +
+            health_vulnerability / 3
+        ),
+    }
+
+
+def add_features(df, poverty_threshold):
+    """Copy of `df` (raw INPUT_FIELDS columns) with all the notebook's engineered columns."""
+    df = df.copy()
+    df['age_group'] = pd.cut(df['age_months'], bins=AGE_BINS, labels=AGE_GROUPS, right=False)
+    for name, values in engineered_columns(_columns(df), poverty_threshold).items():
+        df[name] = values
+    return df
+
+
+class FeatureTransformer:
+    """
+    Raw records -> SELECTED_FEATURES frame, with the poverty threshold learnt in fit().
+
+    Follows the scikit-learn fit/transform convention without depending on it,
+    so the compiled-model service can use it too. The features are computed
+    on NumPy columns and the frame is built once, so a one-record call costs
+    about half a millisecond.
+    """
+
+    def __init__(self, poverty_threshold=None, poverty_quantile=POVERTY_QUANTILE):
+        self.poverty_threshold = poverty_threshold
+        self.poverty_quantile = poverty_quantile
+
+    def fit(self, records, y=None):
+        income = _columns(records)['household_income']
+        self.poverty_threshold = float(pd.Series(income).quantile(self.poverty_quantile))
+        return self
+
+    def transform(self, records):
+        if self.poverty_threshold is None:
+            raise RuntimeError('FeatureTransformer is not fitted: call fit() or pass poverty_threshold')
+        columns = _columns(records)
+        columns.update(engineered_columns(columns, self.poverty_threshold))
+        index = records.index if isinstance(records, pd.DataFrame) else None
+        return pd.DataFrame({name: columns[name] for name in SELECTED_FEATURES}, index=index)
+
+    def fit_transform(self, records, y=None):
+        return self.fit(records).transform(records)
+
+
+def _columns(records):
+    """Raw INPUT_FIELDS as arrays (float for numeric fields, object for categorical ones)."""
+    if isinstance(records, dict):
+        records = [records]
+    if isinstance(records, pd.DataFrame):
+        get = records.__getitem__
+    else:
+        records = list(records)
+        get = lambda name: [r.get(name) for r in records]  # noqa: E731
+    return {name: np.asarray(get(name), dtype=object if name in CATEGORICAL_FIELDS else np.float64)
+            for name in INPUT_FIELDS}
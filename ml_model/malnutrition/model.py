@@ -0,0 +1,79 @@
+"""
+Loading the trained stunting-risk pipeline.
+
+The notebook saves the fitted Pipeline with joblib; `compiled` exports it to
+<model>.npz, which loads without scikit-learn and is preferred when it is at
+least as new as the pickle. The compiled runtime is the faster one for small
+calls (a few ms per record against ~20-30 ms), but scikit-learn traverses
+the trees in C and wins above roughly BULK_ROWS rows, so bulk scoring loads
+the pipeline with `compiled=False`. The poverty threshold behind the `poverty_status`
+feature is part of neither: it comes from POVERTY_THRESHOLD or from
+'poverty_threshold' in <model>.meta.json.
+"""
+
+import json
+import os
+from pathlib import Path
+
+MODEL_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_MODEL = MODEL_DIR / 'best_malnutrition_model_random_forest.pkl'
+# Rows per call above which the scikit-learn pipeline outscores the compiled model
+BULK_ROWS = 512
+
+
+def model_metadata(model_path):
+    """Training metadata saved next to the model (<model>.meta.json), or {}."""
+    meta_path = Path(model_path).with_suffix('.meta.json')
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _compiled_version(model_path):
+    """<model>.npz if it exists and is not older than the pickle, else the pickle."""
+    compiled = model_path.with_suffix('.npz')
+    if model_path.suffix == '.npz' or not compiled.exists():
+        return model_path
+    if model_path.exists() and compiled.stat().st_mtime < model_path.stat().st_mtime:
+        print(f'Ignoring {compiled.name}: older than {model_path.name} (re-run malnutrition.compiled)')
+        return model_path
+    return compiled
+
+
+def load_model(model_path=None, compiled=True):
+    """
+    (pipeline, poverty_threshold, path) from the arguments / environment / defaults.
+
+    With compiled=False the joblib pipeline is loaded even when a current
+    <model>.npz exists; the .npz is still used when the pickle or
+    scikit-learn is missing.
+    """
+    model_path = Path(model_path or os.environ.get('MALNUTRITION_MODEL', DEFAULT_MODEL))
+    if compiled or not model_path.exists():
+        model_path = _compiled_version(model_path)
+    if not model_path.exists():
+        raise RuntimeError(f"Model not found: {model_path} (set MALNUTRITION_MODEL)")
+    threshold = os.environ.get('POVERTY_THRESHOLD', model_metadata(model_path).get('poverty_threshold'))
+    if threshold is None:
+        raise RuntimeError('Poverty threshold unknown: set POVERTY_THRESHOLD to the 30% quantile of '
+                           f'household income in the training data, or add {model_path.stem}.meta.json')
+    if model_path.suffix == '.npz':
+        from .compiled import CompiledModel
+        return CompiledModel.load(model_path), float(threshold), model_path
+
+    try:
+        import joblib
+        model = joblib.load(model_path)
+    except ImportError:
+        if compiled or not model_path.with_suffix('.npz').exists():
+            raise
+        print(f'scikit-learn not installed: scoring with {model_path.with_suffix(".npz").name}')
+        return load_model(model_path.with_suffix('.npz'))
+    # the notebook's grid search may leave n_jobs=-1 on the forest; spinning up a
+    # thread pool per call costs more than scoring a few rows
+    for step in getattr(model, 'named_steps', {}).values():
+        if hasattr(step, 'n_jobs'):
+            step.n_jobs = 1
+    return model, float(threshold), model_path
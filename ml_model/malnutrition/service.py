@@ -0,0 +1,153 @@
+"""
+Self-hosted stunting-risk prediction service.
+
+Serves the joblib pipeline saved by `malnutrition_model.ipynb` over HTTP:
+
+    cd ml_model
+    uvicorn malnutrition.service:app --port 8000
+    # or: python -m malnutrition.service --port 8000
+
+The pipeline is loaded once at startup and scored once on a dummy record so
+the first real request does not pay for lazy initialisation. Scoring runs in
+a worker thread, so slow requests never block the event loop, and
+concurrent /predict calls are micro-batched (`batch.MicroBatcher`): records
+arriving within MICROBATCH_WINDOW_MS of each other share one pipeline call.
+
+Endpoints:
+ - GET  /health          model path, poverty threshold, load time
+ - POST /predict         one child (the fields of the Prediction form)
+ - POST /predict/batch   {"records": [child, ...]}, one pipeline call for all
+
+/predict and batches below model.BULK_ROWS records are scored with the
+compiled <model>.npz when it is current; larger batches use the scikit-learn
+pipeline, which is faster on many rows, when scikit-learn is installed.
+
+Configuration (environment):
+ - MALNUTRITION_MODEL     path of the joblib pipeline
+                          (default ml_model/best_malnutrition_model_random_forest.pkl)
+ - POVERTY_THRESHOLD      household income below which poverty_status is
+                          'Below_poverty'; defaults to 'poverty_threshold' in
+                          <model>.meta.json next to the model
+ - CORS_ORIGINS           comma-separated allowed origins (default *)
+ - MICROBATCH_WINDOW_MS   micro-batch window (default 5 ms)
+ - MICROBATCH_MAX         records per micro-batch (default 256)
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+try:
+    from fastapi import FastAPI, HTTPException
+    from fastapi.middleware.cors import CORSMiddleware
+    from pydantic import BaseModel, Field
+except ImportError:
+    print('The prediction service needs fastapi and uvicorn. '
+          'Install with: pip install -r ml_model/requirements.txt')
+    raise
+
+from .batch import MicroBatcher, predict_records
+from .features import INPUT_FIELDS
+from .model import BULK_ROWS, load_model
+
+MAX_BATCH = 10_000
+# Concurrent /predict calls arriving within this window are scored together
+MICROBATCH_WINDOW_MS = float(os.environ.get('MICROBATCH_WINDOW_MS', 5))
+MICROBATCH_MAX = int(os.environ.get('MICROBATCH_MAX', 256))
+
+
+class ChildRecord(BaseModel):
+    age_months: float = Field(ge=0, le=120)
+    household_income: float = Field(ge=0)
+    family_size: int = Field(ge=1, le=50)
+    food_insecurity: float = Field(ge=0)
+    breastfeeding: int = Field(ge=0, le=1)
+    vaccination_complete: int = Field(ge=0, le=1)
+    diarrhea_last_week: int = Field(ge=0, le=1)
+    clean_water_access: int = Field(ge=0, le=1)
+    improved_sanitation: int = Field(ge=0, le=1)
+    stunting_risk_score: float = Field(ge=0)
+    rural_urban: str
+    region: str
+    mother_education: str
+
+
+class BatchRequest(BaseModel):
+    records: list[ChildRecord] = Field(max_length=MAX_BATCH)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start = time.perf_counter()
+    model, threshold, path = load_model()
+    # warm-up call so the first request is as fast as the rest
+    warm = {name: 0 for name in INPUT_FIELDS}
+    warm.update(family_size=1, rural_urban='Rural', region='Kigali', mother_education='Primary')
+    predict_records(model, [warm], threshold)
+    bulk_model, bulk_path = model, path
+    if path.suffix == '.npz':
+        bulk_model, _, bulk_path = load_model(compiled=False)
+        predict_records(bulk_model, [warm], threshold)
+    app.state.model = model
+    app.state.bulk_model = bulk_model
+    app.state.poverty_threshold = threshold
+    app.state.model_path = str(path)
+    app.state.bulk_model_path = str(bulk_path)
+    app.state.load_seconds = round(time.perf_counter() - start, 3)
+    app.state.batcher = MicroBatcher(lambda records: predict_records(model, records, threshold),
+                                     window=MICROBATCH_WINDOW_MS / 1000, max_batch=MICROBATCH_MAX)
+    app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+
+
+app = FastAPI(title='Malnutrition risk prediction', lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_methods=['GET', 'POST'],
+    allow_headers=['*'],
+)
+
+
+async def _score(records):
+    model = app.state.bulk_model if len(records) >= BULK_ROWS else app.state.model
+    return await asyncio.to_thread(predict_records, model, [r.model_dump() for r in records],
+                                   app.state.poverty_threshold)
+
+
+@app.get('/')
+@app.get('/health')
+async def health():
+    return {
+        'status': 'ok',
+        'model': app.state.model_path,
+        'bulk_model': app.state.bulk_model_path,
+        'poverty_threshold': app.state.poverty_threshold,
+        'load_seconds': app.state.load_seconds,
+    }
+
+
+@app.post('/predict')
+async def predict(record: ChildRecord):
+    return await app.state.batcher.predict(record.model_dump())
+
+
+@app.post('/predict/batch')
+async def predict_batch(batch: BatchRequest):
+    if not batch.records:
+        raise HTTPException(status_code=422, detail='records is empty')
+    return {'predictions': await _score(batch.records)}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Serve the stunting-risk model.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
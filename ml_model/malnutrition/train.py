@@ -0,0 +1,242 @@
+"""
+Training of the stunting-risk model (the modelling cells of `malnutrition_model.ipynb`).
+
+    cd ml_model
+    python -m malnutrition.train --data malnutrition_prediction_dataset.csv
+
+Steps, as in the notebook: engineered features, stratified 80/20 split,
+ColumnTransformer (median imputation + scaling, most-frequent imputation +
+one-hot) and a RandomForest tuned for F1 with 5-fold stratified CV. The grid
+search over 162 combinations is replaced by successive halving over random
+candidates from the same space (`--search random` for plain randomised
+search), so a retrain takes minutes.
+
+Reproducible: every random state derives from `--seed`, and the data file's
+SHA-256, the parameters and the scores are written to <model>.meta.json along
+with the poverty threshold the service needs. The engineered features are
+cached per data file in `.cache/`, and the fitted preprocessor per CV fold
+(Pipeline memory), so candidates and reruns do not redo that work.
+
+Writes <model>.pkl (joblib, as the notebook did), <model>.meta.json and,
+unless `--no-compile`, the compiled <model>.npz checked against the pipeline.
+"""
+
+import hashlib
+import inspect
+import json
+import random
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import (accuracy_score, classification_report, f1_score, precision_score,
+                             recall_score, roc_auc_score)
+from sklearn.model_selection import (HalvingRandomSearchCV, RandomizedSearchCV, StratifiedKFold,
+                                     train_test_split)
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from . import features
+from .features import POVERTY_QUANTILE, SELECTED_FEATURES, FeatureTransformer
+from .model import DEFAULT_MODEL, MODEL_DIR
+
+try:
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline as SamplerPipeline
+except ImportError:
+    SMOTE = None
+
+TARGET = 'stunting_high_risk'
+DEFAULT_DATA = MODEL_DIR / 'malnutrition_prediction_dataset.csv'
+CACHE_DIR = MODEL_DIR / '.cache'
+SEED = 42
+
+# Same space as the notebook's GridSearchCV
+PARAM_DISTRIBUTIONS = {
+    'model__n_estimators': [100, 200, 300],
+    'model__max_depth': [10, 20, None],
+    'model__min_samples_split': [2, 5, 10],
+    'model__min_samples_leaf': [1, 2, 4],
+    'model__class_weight': ['balanced', None],
+}
+
+
+def set_seeds(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def data_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def engineered_features(data_path, cache_dir=CACHE_DIR):
+    """
+    (X, y, poverty_threshold, sha256) of a training CSV.
+
+    Cached in `cache_dir` keyed by the data file's SHA-256 and the source of
+    `features`, so editing either rebuilds the cache.
+    """
+    sha = data_sha256(data_path)
+    code = hashlib.sha256(inspect.getsource(features).encode()).hexdigest()[:12]
+    cache_path = Path(cache_dir) / f'features_{sha[:16]}_{code}.pkl' if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        X, y, threshold = pd.read_pickle(cache_path)
+        print(f'Features from cache: {cache_path.name}')
+        return X, y, threshold, sha
+
+    df = pd.read_csv(data_path)
+    # as in the notebook: bottom 30% of household income over the whole dataset
+    transformer = FeatureTransformer(poverty_quantile=POVERTY_QUANTILE)
+    X = transformer.fit_transform(df)
+    threshold = transformer.poverty_threshold
+    y = df[TARGET].astype(int)
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        pd.to_pickle((X, y, threshold), cache_path)
+    return X, y, threshold, sha
+
+
+def build_pipeline(X, seed=SEED, smote=False, memory=None):
+    """Unfitted preprocessor + RandomForest pipeline for the columns of X."""
+    categorical = X.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
+    numerical = X.select_dtypes(include=[np.number]).columns.tolist()
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', Pipeline([('imputer', SimpleImputer(strategy='median')), ('scaler', StandardScaler())]), numerical),
+        ('cat', Pipeline([('imputer', SimpleImputer(strategy='most_frequent')),
+                          ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))]), categorical),
+    ])
+    # the search parallelises over candidates and folds, so each forest is single-threaded
+    forest = RandomForestClassifier(random_state=seed, n_jobs=1)
+    if smote:
+        if SMOTE is None:
+            raise SystemExit('--smote needs imbalanced-learn: pip install imbalanced-learn')
+        # resampling inside the pipeline only ever touches the training folds
+        return SamplerPipeline([('preprocessor', preprocessor), ('smote', SMOTE(random_state=seed)),
+                                ('model', forest)], memory=memory)
+    return Pipeline([('preprocessor', preprocessor), ('model', forest)], memory=memory)
+
+
+def search(pipeline, X, y, method='halving', n_iter=30, seed=SEED, n_jobs=-1):
+    """Fitted hyper-parameter search over PARAM_DISTRIBUTIONS (F1, 5-fold stratified CV)."""
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=seed)
+    if method == 'halving':
+        searcher = HalvingRandomSearchCV(pipeline, PARAM_DISTRIBUTIONS, factor=3, resource='n_samples',
+                                         cv=cv, scoring='f1', random_state=seed, n_jobs=n_jobs)
+    elif method == 'random':
+        searcher = RandomizedSearchCV(pipeline, PARAM_DISTRIBUTIONS, n_iter=n_iter, cv=cv, scoring='f1',
+                                      random_state=seed, n_jobs=n_jobs)
+    else:
+        raise ValueError(f'unknown search method: {method}')
+    return searcher.fit(X, y)
+
+
+def serving_pipeline(fitted):
+    """Plain (preprocessor, model) Pipeline of a fitted search result; drops SMOTE and the cache."""
+    return Pipeline([('preprocessor', fitted.named_steps['preprocessor']),
+                     ('model', fitted.named_steps['model'])])
+
+
+def evaluate(model, X_test, y_test):
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)[:, 1]
+    print(classification_report(y_test, y_pred, target_names=['Low Risk', 'High Risk']))
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred),
+        'recall': recall_score(y_test, y_pred),
+        'f1': f1_score(y_test, y_pred),
+        'roc_auc': roc_auc_score(y_test, y_proba),
+    }
+
+
+def train(data_path=DEFAULT_DATA, output=DEFAULT_MODEL, seed=SEED, method='halving', n_iter=30,
+          smote=False, n_jobs=-1, cache_dir=CACHE_DIR, compile_model=True):
+    """Train, evaluate and save the model; returns the metadata written next to it."""
+    set_seeds(seed)
+    output = Path(output)
+    start = time.perf_counter()
+    X, y, threshold, sha = engineered_features(data_path, cache_dir)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+    print(f'Training set: {len(X_train)} rows ({y_train.mean():.1%} high risk), test set: {len(X_test)} rows')
+
+    memory = None
+    if cache_dir:
+        memory = Path(cache_dir) / f'transformers_{sha[:16]}'
+    try:
+        result = search(build_pipeline(X, seed, smote, memory and str(memory)), X_train, y_train,
+                        method, n_iter, seed, n_jobs)
+    finally:
+        # fold-level transformer cache only pays off within one search
+        if memory is not None:
+            shutil.rmtree(memory, ignore_errors=True)
+    model = serving_pipeline(result.best_estimator_)
+    print(f'Best CV F1: {result.best_score_:.4f} with {result.best_params_}')
+
+    metrics = evaluate(model, X_test, y_test)
+    for name, value in metrics.items():
+        print(f'  {name:<10} {value:.4f}')
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, output)
+    meta = {
+        'poverty_threshold': threshold,
+        'features': SELECTED_FEATURES,
+        'best_params': result.best_params_,
+        'cv_f1': result.best_score_,
+        'test_metrics': metrics,
+        'search': method,
+        'smote': smote,
+        'seed': seed,
+        'data': str(Path(data_path).name),
+        'data_sha256': sha,
+        'n_train': len(X_train),
+        'n_test': len(X_test),
+        'sklearn_version': sklearn.__version__,
+        'trained_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'train_seconds': round(time.perf_counter() - start, 1),
+    }
+    with open(output.with_suffix('.meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, default=str)
+    print('Wrote', output, 'and', output.with_suffix('.meta.json').name)
+
+    if compile_model:
+        from .compiled import CompiledModel, export
+        npz = export(model, output.with_suffix('.npz'))
+        if not np.array_equal(CompiledModel.load(npz).predict_proba(X_test), model.predict_proba(X_test)):
+            npz.unlink()
+            raise SystemExit('Compiled model disagrees with the pipeline; not written')
+        print('Wrote', npz)
+    return meta
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Train the stunting-risk model.')
+    parser.add_argument('--data', default=str(DEFAULT_DATA), help='training CSV (default: %(default)s)')
+    parser.add_argument('--output', default=str(DEFAULT_MODEL), help='model path (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--search', choices=['halving', 'random'], default='halving')
+    parser.add_argument('--n-iter', type=int, default=30, help='candidates for --search random')
+    parser.add_argument('--smote', action='store_true', help='oversample the training folds (imbalanced-learn)')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--no-cache', action='store_true', help='recompute the engineered features')
+    parser.add_argument('--no-compile', action='store_true', help='skip writing the compiled .npz')
+    args = parser.parse_args()
+
+    train(args.data, args.output, args.seed, args.search, args.n_iter, args.smote, args.n_jobs,
+          cache_dir=None if args.no_cache else CACHE_DIR, compile_model=not args.no_compile)
@@ -4,6 +4,9 @@ import { MapContainer, GeoJSON, TileLayer, useMap } from "react-leaflet";
 import L from "leaflet";
 import "leaflet/dist/leaflet.css";
 import "../styles/RwandaMap.css";
+import { topologyToGeoJSON } from "./topojson";
+import { assetUrl } from "./assets";
+import { loadRecords } from "./columnarData";
 
 const provinceColors = {
   Kigali: "#e41a1c",
@@ -97,6 +100,52 @@ const LegendControl = () => {
   return null;
 };
 
+// Simplified TopoJSON variant for the map's fixed zoom (see
+// scripts/merge_geojson_with_analytics.py); "low" and "high" also exist.
+const MAP_VARIANT = "medium";
+
+// Join the attribute table (public/data/district_attributes.json, keyed by
+// district id) onto geometry-only features. Features are returned unchanged
+// when the table is unavailable.
+const joinAttributes = (geo) =>
+  assetUrl("/data/district_attributes.json")
+    .then((url) => fetch(url))
+    .then((r) => (r.ok ? r.json() : null))
+    .then((table) => {
+      if (!table || !table.districts) return geo;
+      const sets = table.recommendation_sets || [];
+      geo.features.forEach((f) => {
+        const attrs = table.districts[f.id];
+        if (!attrs) return;
+        const recs = attrs.Recommendations;
+        f.properties = Object.assign({}, f.properties, attrs, {
+          Recommendations: typeof recs === "number" ? sets[recs] : recs,
+        });
+      });
+      return geo;
+    })
+    .catch(() => geo);
+
+// Load the district shapes: the TopoJSON variant (geometry only, with the
+// analytics joined by district id) when available, otherwise the
+// full-resolution GeoJSON.
+const loadDistrictShapes = () =>
+  assetUrl(`/rwanda_districts.${MAP_VARIANT}.topo.json`)
+    .then((url) => fetch(url))
+    .then((response) => {
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      return response.json();
+    })
+    .then((topology) => joinAttributes(topologyToGeoJSON(topology)))
+    .catch(() =>
+      assetUrl("/rwanda_districts.json")
+        .then((url) => fetch(url))
+        .then((response) => {
+          if (!response.ok) throw new Error(`HTTP ${response.status}`);
+          return response.json();
+        })
+    );
+
 // Map a numeric RiskScore to a color used on the map
 const getColorForRisk = (score) => {
   if (score === null || score === undefined || isNaN(Number(score)))
@@ -117,13 +166,9 @@ const RwandaMap = () => {
   const miniMapInstanceRef = useRef(null);
 
   useEffect(() => {
-    // Fetch the districts GeoJSON from the public/ folder using an absolute path.
+    // Fetch the district shapes from the public/ folder using absolute paths.
     // Use response.ok guard to avoid trying to parse HTML error pages as JSON.
-    fetch("/rwanda_districts.json")
-      .then((response) => {
-        if (!response.ok) throw new Error(`HTTP ${response.status}`);
-        return response.json();
-      })
+    loadDistrictShapes()
       .then((data) => {
         // if features already contain RiskScore values, use them as-is.
         const hasRisk =
@@ -140,8 +185,7 @@ const RwandaMap = () => {
 
         // Otherwise, try to enrich features by fetching the district analytics JSON
         // and matching on district name (feature.properties.NAME_2 <-> analytics.District).
-        fetch("/data/district_analytics.json")
-          .then((r) => (r.ok ? r.json() : Promise.resolve([])))
+        loadRecords("district_analytics")
           .then((analytics) => {
             try {
               const lookup = {};
@@ -0,0 +1,34 @@
+// URLs of the data files in public/.
+//
+// At build time scripts/publish_static_assets.py writes a content-hashed copy
+// of every data file and /data/manifest.json mapping logical names
+// ("district_analytics", "columnar/district_analytics", "rwanda_districts", ...)
+// to the hashed paths. Fetch through assetUrl() so those long-cacheable paths
+// are used when published; without a manifest (npm run dev) the plain files are.
+
+let manifestPromise = null;
+
+export function loadManifest() {
+  if (!manifestPromise) {
+    manifestPromise = fetch("/data/manifest.json", { cache: "no-cache" })
+      .then((r) => (r.ok ? r.json() : {}))
+      .catch(() => ({}));
+  }
+  return manifestPromise;
+}
+
+// Manifest key of a public path: "/data/district_analytics.json" ->
+// "district_analytics", "/rwanda_districts.medium.topo.json" ->
+// "rwanda_districts.medium.topo"; bare names are returned unchanged.
+const manifestKey = (path) =>
+  path.replace(/^\/(data\/)?/, "").replace(/\.json$/, "");
+
+// URL to fetch for a public path ("/data/province_summary.json") or logical
+// name ("columnar/district_analytics"); the hashed path when published.
+export function assetUrl(path) {
+  const plain = path.startsWith("/") ? path : `/data/${path}.json`;
+  return loadManifest().then((manifest) => {
+    const entry = manifest[manifestKey(path)];
+    return entry ? entry.path : plain;
+  });
+}
@@ -0,0 +1,90 @@
+// Loader for the columnar data files written by scripts/generate_frontend_json.py.
+//
+// /data/schema.json lists every dataset (file, row count, columns and their
+// encoding). Each dataset file stores column arrays; dictionary-encoded
+// columns hold integer codes into `dictionaries[column]`. Files are fetched
+// through assetUrl(), i.e. from their content-hashed paths when published.
+
+import { assetUrl } from "./assets";
+
+let schemaPromise = null;
+
+export function loadSchema() {
+  if (!schemaPromise) {
+    schemaPromise = assetUrl("schema")
+      .then((url) => fetch(url))
+      .then((r) => (r.ok ? r.json() : null))
+      .catch(() => null);
+  }
+  return schemaPromise;
+}
+
+// Decode a columnar payload into { name: values[] } (codes replaced by values).
+export function decodeColumns(payload, columns) {
+  const names = columns || Object.keys(payload.columns);
+  const dicts = payload.dictionaries || {};
+  const out = {};
+  names.forEach((name) => {
+    const values = payload.columns[name] || [];
+    const dict = dicts[name];
+    out[name] = dict ? values.map((c) => (c === null ? null : dict[c])) : values;
+  });
+  return out;
+}
+
+// Rebuild the row records of a payload (same shape as the *.json record files).
+export function toRecords(payload, columns) {
+  const cols = decodeColumns(payload, columns);
+  const names = Object.keys(cols);
+  const rows = new Array(payload.rows);
+  for (let i = 0; i < payload.rows; i += 1) {
+    const row = {};
+    names.forEach((name) => {
+      row[name] = cols[name][i];
+    });
+    rows[i] = row;
+  }
+  return rows;
+}
+
+// Fetch one dataset listed in the schema; resolves to null when unavailable.
+export function loadDataset(name) {
+  return loadSchema().then((schema) => {
+    const entry = schema && schema.datasets && schema.datasets[name];
+    if (!entry) return null;
+    return assetUrl(entry.file.replace(/\.json$/, ""))
+      .then((url) => fetch(url))
+      .then((r) => (r.ok ? r.json() : null));
+  });
+}
+
+// Plain record file (/data/<name>.json); null when unavailable.
+const loadRecordFile = (name) =>
+  assetUrl(name)
+    .then((url) => fetch(url))
+    .then((r) => (r.ok ? r.json() : null))
+    .catch(() => null);
+
+const datasetRecords = (name) =>
+  loadDataset(name)
+    .then((payload) => (payload ? toRecords(payload) : null))
+    .catch(() => null);
+
+// Records of one dataset, as in the plain /data/<name>.json file, which is
+// fetched instead when the schema or the columnar file cannot be loaded.
+export function loadRecords(name) {
+  return datasetRecords(name).then((rows) => rows || loadRecordFile(name));
+}
+
+// /data/top_hotspots.json ({ by_risk, by_stunting }), rebuilt from its two
+// datasets or, failing that, fetched as is.
+export function loadTopHotspots() {
+  return Promise.all([
+    datasetRecords("top_hotspots_by_risk"),
+    datasetRecords("top_hotspots_by_stunting"),
+  ]).then(([byRisk, byStunting]) =>
+    byRisk && byStunting
+      ? { by_risk: byRisk, by_stunting: byStunting }
+      : loadRecordFile("top_hotspots")
+  );
+}
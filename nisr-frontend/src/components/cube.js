@@ -0,0 +1,79 @@
+// Queries on /data/malnutrition_cube.json (written by scripts/generate_frontend_json.py
+// from Nisr-Data_analysis/cfsva/cube.py).
+//
+// The cube holds, for the national total, every dimension and every pair of
+// dimensions, dense row-major arrays of children ("total") and per indicator
+// measured / affected counts. A slice is an array index:
+//
+//   const cube = await loadCube();
+//   lookup(cube, "Stunting", { S0_C_Prov: "Northern", UrbanRural: "Rural" });
+//   rates(cube, "Wasting", "ageCat");   // [{ ageCat, rate, measured, affected }]
+
+import { assetUrl } from "./assets";
+
+let cubePromise = null;
+
+export function loadCube() {
+  if (!cubePromise) {
+    cubePromise = assetUrl("malnutrition_cube")
+      .then((url) => fetch(url))
+      .then((r) => (r.ok ? r.json() : null))
+      .catch(() => null);
+  }
+  return cubePromise;
+}
+
+// Dimensions of a filter object, in cube order (the cuboid key order)
+const cuboidDims = (cube, names) =>
+  Object.keys(cube.dimensions).filter((d) => names.includes(d));
+
+const cuboidOf = (cube, dims) => {
+  const cuboid = cube.cuboids[dims.join("|")];
+  if (!cuboid) throw new Error(`No cuboid for ${dims.join(", ") || "national"}`);
+  return cuboid;
+};
+
+// Counts and rate (%) of one cell; filters map dimension columns to labels
+export function lookup(cube, indicator, filters = {}) {
+  const dims = cuboidDims(cube, Object.keys(filters));
+  const cuboid = cuboidOf(cube, dims);
+  let cell = 0;
+  dims.forEach((d) => {
+    const pos = cube.dimensions[d].indexOf(String(filters[d]));
+    if (pos < 0) throw new Error(`Unknown ${d} label: ${filters[d]}`);
+    cell = cell * cube.dimensions[d].length + pos;
+  });
+  const k = cube.indicators.length;
+  const j = cube.indicators.indexOf(indicator);
+  const measured = cuboid.measured[cell * k + j];
+  const affected = cuboid.affected[cell * k + j];
+  return {
+    total: cuboid.total[cell],
+    measured,
+    affected,
+    rate: measured > 0 ? (affected / measured) * 100 : null,
+  };
+}
+
+// Every non-empty cell of a one- or two-way cuboid with its rate
+export function rates(cube, indicator, ...dimensions) {
+  const dims = cuboidDims(cube, dimensions);
+  const cuboid = cuboidOf(cube, dims);
+  const k = cube.indicators.length;
+  const j = cube.indicators.indexOf(indicator);
+  const out = [];
+  cuboid.total.forEach((_, cell) => {
+    const measured = cuboid.measured[cell * k + j];
+    if (!(measured > 0)) return;
+    const row = {};
+    let rest = cell;
+    for (let i = dims.length - 1; i >= 0; i -= 1) {
+      const labels = cube.dimensions[dims[i]];
+      row[dims[i]] = labels[rest % labels.length];
+      rest = Math.floor(rest / labels.length);
+    }
+    const affected = cuboid.affected[cell * k + j];
+    out.push({ ...row, measured, affected, rate: (affected / measured) * 100 });
+  });
+  return out;
+}
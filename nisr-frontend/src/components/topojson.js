@@ -0,0 +1,51 @@
+// Minimal TopoJSON -> GeoJSON conversion for the district map files written by
+// scripts/merge_geojson_with_analytics.py (quantised, delta-encoded arcs;
+// Polygon / MultiPolygon geometries only).
+
+const decodeArcs = (topology) => {
+  const t = topology.transform;
+  return topology.arcs.map((arc) => {
+    if (!t) return arc;
+    let x = 0;
+    let y = 0;
+    return arc.map(([dx, dy]) => {
+      x += dx;
+      y += dy;
+      return [x * t.scale[0] + t.translate[0], y * t.scale[1] + t.translate[1]];
+    });
+  });
+};
+
+const ringFromArcs = (refs, arcs) => {
+  const ring = [];
+  refs.forEach((ref) => {
+    const arc = ref >= 0 ? arcs[ref] : arcs[~ref].slice().reverse();
+    // consecutive arcs share their end / start point
+    arc.forEach((pt, i) => {
+      if (i > 0 || ring.length === 0) ring.push(pt);
+    });
+  });
+  return ring;
+};
+
+export function topologyToGeoJSON(topology, objectName = "districts") {
+  const arcs = decodeArcs(topology);
+  const object = topology.objects[objectName];
+  const features = object.geometries.map((g) => {
+    const polygons =
+      g.type === "Polygon" ? [g.arcs] : g.type === "MultiPolygon" ? g.arcs : [];
+    const coordinates = polygons.map((polygon) =>
+      polygon.map((refs) => ringFromArcs(refs, arcs))
+    );
+    return {
+      type: "Feature",
+      id: g.id,
+      properties: g.properties || {},
+      geometry:
+        g.type === "Polygon"
+          ? { type: "Polygon", coordinates: coordinates[0] }
+          : { type: "MultiPolygon", coordinates },
+    };
+  });
+  return { type: "FeatureCollection", features };
+}
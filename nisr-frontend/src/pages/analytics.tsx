@@ -20,7 +20,11 @@ import {
   Bar,
   AreaChart,
   Area,
+  Legend,
 } from "recharts";
+import { assetUrl } from "../components/assets";
+import { loadRecords, loadTopHotspots } from "../components/columnarData";
+import { loadCube, lookup, rates } from "../components/cube";
 
 // Simple theme colors used by the analytics widgets (local fallbacks)
 const primaryRed = "#b10026";
@@ -547,39 +551,45 @@ const AnalyticsPage = () => {
   const [provinceSummary, setProvinceSummary] = useState<any[]>([]);
   const [districtRates, setDistrictRates] = useState<any[]>([]);
   const [childSample, setChildSample] = useState<any[] | null>(null);
+  const [cube, setCube] = useState<any | null>(null);
 
   useEffect(() => {
     // Fetch analytics JSONs generated by the backend script
-    fetch("/data/district_analytics.json")
-      .then((r) => (r.ok ? r.json() : Promise.resolve([])))
-      .then((data) => setDistrictAnalytics(data))
+    loadRecords("district_analytics")
+      .then((data) => setDistrictAnalytics(data || []))
       .catch(() => setDistrictAnalytics([]));
 
-    fetch("/data/top_hotspots.json")
-      .then((r) => (r.ok ? r.json() : Promise.resolve(null)))
+    loadTopHotspots()
       .then((data) => setTopHotspots(data))
       .catch(() => setTopHotspots(null));
 
-    fetch("/data/province_summary.json")
+    assetUrl("/data/province_summary.json")
+      .then((url) => fetch(url))
       .then((r) => (r.ok ? r.json() : Promise.resolve([])))
       .then((d) => setProvinceSummary(d))
       .catch(() => setProvinceSummary([]));
 
-    fetch("/data/district_malnutrition_rates.json")
+    assetUrl("/data/district_malnutrition_rates.json")
+      .then((url) => fetch(url))
       .then((r) => (r.ok ? r.json() : Promise.resolve([])))
       .then((d) => setDistrictRates(d))
       .catch(() => setDistrictRates([]));
 
-    fetch("/data/policy_briefs.json")
+    assetUrl("/data/policy_briefs.json")
+      .then((url) => fetch(url))
       .then((r) => (r.ok ? r.json() : Promise.resolve([])))
       .then((data) => setPolicyBriefs(data))
       .catch(() => setPolicyBriefs([]));
 
     // try to fetch child-level sample data to power clinic load heatmap
-    fetch("/data/CFSVAHH2021_UNDER_5_ChildWithMother_sample.json")
+    assetUrl("/data/CFSVAHH2021_UNDER_5_ChildWithMother_sample.json")
+      .then((url) => fetch(url))
       .then((r) => (r.ok ? r.json() : Promise.resolve([])))
       .then((d) => setChildSample(Array.isArray(d) ? d : []))
       .catch(() => setChildSample(null));
+
+    // survey cube for the weighted breakdowns (stunting by wealth and area)
+    loadCube().then((c) => setCube(c));
   }, []);
 
   // small derived series: coverage and admissions fallbacks (if no time-series provided)
@@ -615,6 +625,23 @@ const AnalyticsPage = () => {
         )
       : 0) || 0;
 
+  // Weighted stunting rate by wealth quintile, urban vs rural (survey cube)
+  const stuntingByWealth: Record<string, any>[] = [];
+  let nationalStunting: number | null = null;
+  if (cube) {
+    const cells = rates(cube, "Stunting", "UrbanRural", "WI_cat");
+    cube.dimensions.WI_cat.forEach((wealth: string) => {
+      const row: Record<string, any> = { wealth };
+      cells
+        .filter((c: any) => c.WI_cat === wealth)
+        .forEach((c: any) => {
+          row[c.UrbanRural] = Math.round(c.rate * 10) / 10;
+        });
+      if (Object.keys(row).length > 1) stuntingByWealth.push(row);
+    });
+    nationalStunting = lookup(cube, "Stunting").rate;
+  }
+
   const serviceDeliveryPie = [
     { name: "Stunted (survey count)", value: totalStunted, fill: primaryRed },
     {
@@ -1188,6 +1215,38 @@ const AnalyticsPage = () => {
           </div>
         </article>
 
+        <article className="card-analytics">
+          <div className="card-header">
+            <h2>Stunting by wealth quintile</h2>
+            <span className="metric-sub">
+              Weighted survey rate (%), urban vs rural
+              {nationalStunting !== null
+                ? ` — national ${nationalStunting.toFixed(1)}%`
+                : ""}
+            </span>
+          </div>
+          <div style={{ padding: 12 }}>
+            {stuntingByWealth.length > 0 ? (
+              <ResponsiveContainer width="100%" height={220}>
+                <BarChart data={stuntingByWealth}>
+                  <CartesianGrid
+                    strokeDasharray="3 3"
+                    stroke="var(--color-primary-100)"
+                  />
+                  <XAxis dataKey="wealth" {...axisStyle} />
+                  <YAxis unit="%" {...axisStyle} />
+                  <Tooltip />
+                  <Legend />
+                  <Bar dataKey="Urban" fill={primaryBlue} />
+                  <Bar dataKey="Rural" fill={primaryRed} />
+                </BarChart>
+              </ResponsiveContainer>
+            ) : (
+              <div>No survey breakdown available</div>
+            )}
+          </div>
+        </article>
+
         <article className="card-analytics">
           <div className="card-header">
             <h2>Support channels & recommendations</h2>
@@ -2,20 +2,19 @@ import "../styles/dynamicHotspot.css";
 import RwandaMap from "../components/RwandaMap"; // Ensure the RwandaMap component is imported
 import HotspotWidget from "../components/HotspotWidget";
 import { useEffect, useState } from "react";
+import { loadRecords, loadTopHotspots } from "../components/columnarData";
 
 export default function DynamicHotspot() {
   const [topHotspots, setTopHotspots] = useState<any | null>(null);
   const [districtAnalytics, setDistrictAnalytics] = useState<any[]>([]);
 
   useEffect(() => {
-    fetch("/data/top_hotspots.json")
-      .then((r) => (r.ok ? r.json() : Promise.resolve(null)))
+    loadTopHotspots()
       .then((d) => setTopHotspots(d))
       .catch(() => setTopHotspots(null));
 
-    fetch("/data/district_analytics.json")
-      .then((r) => (r.ok ? r.json() : Promise.resolve([])))
-      .then((d) => setDistrictAnalytics(d))
+    loadRecords("district_analytics")
+      .then((d) => setDistrictAnalytics(d || []))
       .catch(() => setDistrictAnalytics([]));
   }, []);
 
@@ -1,10 +1,12 @@
 import React, { useEffect, useState } from "react";
+import { assetUrl } from "../components/assets";
 
 export default function NisrDashboard() {
   const [provinceSummary, setProvinceSummary] = useState<any[]>([]);
 
   useEffect(() => {
-    fetch("/data/province_summary.json")
+    assetUrl("/data/province_summary.json")
+      .then((url) => fetch(url))
       .then((r) => (r.ok ? r.json() : Promise.resolve([])))
       .then((d) => setProvinceSummary(d))
       .catch(() => setProvinceSummary([]));
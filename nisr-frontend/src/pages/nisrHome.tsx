@@ -1,6 +1,8 @@
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import "../styles/nisrHome.css";
+import { assetUrl } from "../components/assets";
+import { loadRecords, loadTopHotspots } from "../components/columnarData";
 
 export default function NisrHome() {
   const navigate = useNavigate();
@@ -19,7 +21,8 @@ export default function NisrHome() {
   const [criticalCount, setCriticalCount] = useState<number>(0);
 
   useEffect(() => {
-    fetch("/data/policy_briefs.json")
+    assetUrl("/data/policy_briefs.json")
+      .then((url) => fetch(url))
       .then((r) => (r.ok ? r.json() : Promise.resolve([])))
       .then((d) => setPolicyBriefs(d))
       .catch(() => setPolicyBriefs([]));
@@ -27,17 +30,16 @@ export default function NisrHome() {
 
   useEffect(() => {
     // load district analytics and hotspots
-    fetch("/data/district_analytics.json")
-      .then((r) => (r.ok ? r.json() : Promise.resolve([])))
-      .then((d) => setDistrictAnalytics(d))
+    loadRecords("district_analytics")
+      .then((d) => setDistrictAnalytics(d || []))
       .catch(() => setDistrictAnalytics([]));
 
-    fetch("/data/top_hotspots.json")
-      .then((r) => (r.ok ? r.json() : Promise.resolve([])))
-      .then((d) => setTopHotspots(d))
+    loadTopHotspots()
+      .then((d) => setTopHotspots(d || []))
       .catch(() => setTopHotspots([]));
 
-    fetch("/data/province_summary.json")
+    assetUrl("/data/province_summary.json")
+      .then((url) => fetch(url))
       .then((r) => (r.ok ? r.json() : Promise.resolve([])))
       .then((d) => setProvinceSummary(d))
       .catch(() => setProvinceSummary([]));
@@ -265,10 +267,9 @@ export default function NisrHome() {
                   // Download district analytics as JSON and CSV options
                   const data = districtAnalytics || [];
                   if (!data || data.length === 0) {
-                    // fallback: try to fetch the file directly
-                    fetch("/data/district_analytics.json")
-                      .then((r) => (r.ok ? r.json() : Promise.resolve([])))
-                      .then((d) => triggerDownload(d))
+                    // fallback: load the dataset directly
+                    loadRecords("district_analytics")
+                      .then((d) => triggerDownload(d || []))
                       .catch(() => alert("No report available to download"));
                     return;
                   }
@@ -3,6 +3,12 @@ import { motion } from "framer-motion";
 import { Send, CheckCircle, AlertTriangle, XCircle } from "lucide-react";
 import { PredictionResult } from "../types";
 
+// Prediction service: set VITE_PREDICT_URL to a self-hosted one
+// (ml_model/malnutrition/service.py, e.g. http://localhost:8000/predict)
+const PREDICT_URL =
+  import.meta.env.VITE_PREDICT_URL ||
+  "https://mal-nutrition-fastapi.onrender.com/predict";
+
 interface PredictionProps {
   onPredictionComplete: (result: PredictionResult) => void;
 }
@@ -32,14 +38,11 @@ export default function Prediction({ onPredictionComplete }: PredictionProps) {
     setLoading(true);
 
     try {
-      const response = await fetch(
-        "https://mal-nutrition-fastapi.onrender.com/predict",
-        {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(formData),
-        }
-      );
+      const response = await fetch(PREDICT_URL, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(formData),
+      });
 
       if (!response.ok) throw new Error("API request failed");
 
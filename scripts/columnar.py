@@ -0,0 +1,100 @@
+"""
+Column-oriented JSON payloads for the frontend.
+
+Each table is written as one object of column arrays instead of a list of
+records, so keys are stored once per file rather than once per row.
+Repeated labels (District, Province, Hotspot, recommendation lists, ...) are
+dictionary-encoded: the column holds integer codes into a per-column list of
+values.
+
+Payload (`public/data/columnar/<name>.json`):
+
+    {"name": ..., "rows": n,
+     "columns": {"District": [0, 1, ...], "RiskScore": [32.63, ...]},
+     "dictionaries": {"District": ["Bugesera", ...]}}
+
+`write_schema()` writes `public/data/schema.json`, listing every dataset with
+its file, row count, size and column types/encodings, so a page can fetch
+the manifest first and then only the tables (and know the columns) it needs.
+"""
+
+import json
+import math
+
+import pandas as pd
+
+SCHEMA_VERSION = 1
+COLUMNAR_SUBDIR = 'columnar'
+
+# Always dictionary-encoded (when present); other string and list columns are
+# encoded when they have repeated values.
+DICTIONARY_COLUMNS = ('District', 'Province', 'Hotspot', 'S0_C_Prov', 'S0_D_Dist')
+
+
+def _clean(value):
+    """JSON-safe scalar: NaN/NA -> None, numpy scalars -> Python."""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _column_type(values):
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return 'null'
+    if kinds <= {bool}:
+        return 'boolean'
+    if kinds <= {int}:
+        return 'integer'
+    if kinds <= {int, float}:
+        return 'number'
+    if kinds <= {list}:
+        return 'list'
+    return 'string'
+
+
+def encode_table(frame, name):
+    """Columnar payload and schema entry of a DataFrame (or list of records)."""
+    frame = pd.DataFrame(frame)
+    columns, dictionaries, schema = {}, {}, []
+    for col in frame.columns:
+        values = [_clean(v) for v in frame[col].astype(object).tolist()]
+        kind = _column_type(values)
+        entry = {'name': str(col), 'type': kind, 'encoding': 'plain'}
+        if kind in ('string', 'list'):
+            keys = [tuple(v) if isinstance(v, list) else v for v in values]
+            uniques = list(dict.fromkeys(k for k in keys if k is not None))
+            if col in DICTIONARY_COLUMNS or len(uniques) < len(values):
+                codes = {k: i for i, k in enumerate(uniques)}
+                values = [None if k is None else codes[k] for k in keys]
+                dictionaries[str(col)] = [list(k) if isinstance(k, tuple) else k for k in uniques]
+                entry.update(encoding='dictionary', cardinality=len(uniques))
+        columns[str(col)] = values
+        schema.append(entry)
+    payload = {'name': name, 'rows': int(len(frame)), 'columns': columns, 'dictionaries': dictionaries}
+    return payload, {'rows': int(len(frame)), 'columns': schema}
+
+
+def write_columnar(frame, name, data_dir):
+    """Write `<data_dir>/columnar/<name>.json`; return (path, schema entry)."""
+    out_dir = data_dir / COLUMNAR_SUBDIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    payload, entry = encode_table(frame, name)
+    path = out_dir / f'{name}.json'
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    path.write_text(text, encoding='utf-8')
+    entry = {'file': f'{COLUMNAR_SUBDIR}/{name}.json', 'bytes': len(text.encode('utf-8')), **entry}
+    return path, entry
+
+
+def write_schema(entries, data_dir):
+    """Write the dataset manifest `<data_dir>/schema.json` (datasets sorted by name)."""
+    path = data_dir / 'schema.json'
+    schema = {'version': SCHEMA_VERSION, 'datasets': dict(sorted(entries.items()))}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, separators=(',', ':'))
+    return path
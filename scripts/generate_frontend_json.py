@@ -7,7 +7,13 @@ Usage:
 
 The script will:
 - Read `child_nutrition/district_malnutrition_rates.csv` and write `district_malnutrition_rates.json`
-- Attempt to read common .dta files in `Nisr-Data_analysis/data/` and convert sample metadata or selected variables to JSON.
+- Read `child_nutrition/admin_levels/<level>_malnutrition_rates.csv` (every admin level in the child file) and write
+  `levels/<level>_analytics.json` and `levels/<level>_top_hotspots.json`, with the small-area estimates of
+  `<level>_sae_rates.csv` where present
+- Build `malnutrition_cube.json`: weighted counts of every indicator x one- and two-way disaggregation (`cfsva.cube`)
+- Write each table again as columnar JSON under `public/data/columnar/`, listed in `public/data/schema.json`
+- Attempt to read common .dta files in `Nisr-Data_analysis/data/` and convert sample metadata or selected variables to JSON
+  (header and a stratified sample only, via `cfsva.stata` / `cfsva.sampling`).
 
 Notes:
 - Requires pandas to read Stata (.dta) files.
@@ -15,10 +21,12 @@ Notes:
 """
 
 import os
+import sys
 import json
 from pathlib import Path
 
 try:
+    import numpy as np
     import pandas as pd
 except Exception as e:
     print("pandas is required. Install with: pip install pandas")
@@ -29,9 +37,89 @@ DATA_DIR = ROOT / 'Nisr-Data_analysis'
 FRONTEND_DATA_DIR = ROOT / 'nisr-frontend' / 'public' / 'data'
 SCRIPTS_DIR = ROOT / 'scripts'
 
+sys.path.insert(0, str(DATA_DIR))
+from columnar import write_columnar, write_schema
+from cfsva import CHILD_FILE, load_survey
+from cfsva.cube import CUBE_DIMENSIONS, build_cube
+from cfsva.malnutrition import INDICATORS
+from cfsva.sampling import stratified_sample
+from cfsva.stata import dta_metadata
+
+# Rows per survey sample export (CFSVA_SAMPLE_SIZE overrides)
+SAMPLE_SIZE = int(os.environ.get('CFSVA_SAMPLE_SIZE', 200))
+
+RATE_COLS = ['Stunting_Rate', 'Wasting_Rate', 'Underweight_Rate']
+
+# Recommendations by hotspot
+REC_MAP = {
+    'Severe': [
+        'Immediate nutrition interventions (supplementary feeding).',
+        'Strengthen community health and growth monitoring.',
+        'Short-term cash or food assistance and agricultural support.'
+    ],
+    'High': [
+        'Targeted nutrition education and supplementation.',
+        'Improve access to clean water and sanitation.',
+        'Support small-holder agriculture and diversification.'
+    ],
+    'Moderate': [
+        'Nutrition counselling and school feeding pilots.',
+        'Sanitation improvements and hygiene promotion.'
+    ],
+    'Low': [
+        'Maintain preventive programs and monitoring.'
+    ]
+}
+
+
+def score_hotspots(df):
+    """Add RiskScore and Hotspot columns to a rates table (in place)."""
+    # Ensure numeric columns are floats
+    for c in RATE_COLS:
+        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0.0) if c in df.columns else 0.0
+
+    # Risk score: weighted combination (Stunting 60%, Wasting 30%, Underweight 10%)
+    df['RiskScore'] = (0.6 * df['Stunting_Rate'] +
+                       0.3 * df['Wasting_Rate'] +
+                       0.1 * df['Underweight_Rate'])
+    # Cap score to 100
+    df['RiskScore'] = df['RiskScore'].clip(upper=100)
+
+    # Hotspot tiers: Severe >= 40, High >= 25, Moderate >= 15, else Low
+    df['Hotspot'] = np.select(
+        [df['RiskScore'] >= 40, df['RiskScore'] >= 25, df['RiskScore'] >= 15],
+        ['Severe', 'High', 'Moderate'],
+        default='Low',
+    )
+    return df
+
+
+def analytics_records(df, id_cols):
+    """
+    Analytics records built column-wise: `id_cols`, rates with SE / 95% CI
+    (and small-area estimate / SE) next to each rate when the table carries
+    them, then score, tier and recommendations.
+    """
+    record_cols = list(id_cols)
+    for c in RATE_COLS:
+        record_cols.append(c)
+        record_cols += [f'{c}_{suffix}' for suffix in ('SE', 'CI_Low', 'CI_High', 'SAE', 'SAE_SE')
+                        if f'{c}_{suffix}' in df.columns]
+    records = df.reindex(columns=record_cols).astype({c: float for c in RATE_COLS})
+    interval_cols = [c for c in record_cols[len(id_cols):] if c not in RATE_COLS]
+    records[interval_cols] = records[interval_cols].astype(float).round(2)
+    records = records.astype(object).where(records.notna(), None)
+    records['RiskScore'] = df['RiskScore'].round(2)
+    records['Hotspot'] = df['Hotspot']
+    records['Recommendations'] = df['Hotspot'].map(lambda tier: REC_MAP.get(tier, []))
+    return records.to_dict('records')
+
+
 FRONTEND_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 outputs = []
+# name -> table, also written as columnar JSON at the end
+tables = {}
 
 # 1) Convert district_malnutrition_rates.csv
 csv_path = DATA_DIR / 'child_nutrition' / 'district_malnutrition_rates.csv'
@@ -41,73 +129,19 @@ if csv_path.exists():
     out_path = FRONTEND_DATA_DIR / 'district_malnutrition_rates.json'
     df.to_json(out_path, orient='records', force_ascii=False, date_format='iso')
     outputs.append(str(out_path))
+    tables['district_malnutrition_rates'] = df.copy()
 
     # Generate enriched analytics JSONs from district malnutrition rates
     try:
-        # Ensure numeric columns are floats
-        num_cols = ['Stunting_Rate', 'Wasting_Rate', 'Underweight_Rate']
-        for c in num_cols:
-            if c in df.columns:
-                df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0.0)
-
-        # Risk score: weighted combination (Stunting 60%, Wasting 30%, Underweight 10%)
-        df['RiskScore'] = (0.6 * df.get('Stunting_Rate', 0.0) +
-                           0.3 * df.get('Wasting_Rate', 0.0) +
-                           0.1 * df.get('Underweight_Rate', 0.0))
-        # Cap score to 100
-        df['RiskScore'] = df['RiskScore'].clip(upper=100)
-
-        def hotspot_category(score):
-            if score >= 40:
-                return 'Severe'
-            if score >= 25:
-                return 'High'
-            if score >= 15:
-                return 'Moderate'
-            return 'Low'
-
-        df['Hotspot'] = df['RiskScore'].apply(hotspot_category)
-
-        # Recommendations by hotspot
-        rec_map = {
-            'Severe': [
-                'Immediate nutrition interventions (supplementary feeding).',
-                'Strengthen community health and growth monitoring.',
-                'Short-term cash or food assistance and agricultural support.'
-            ],
-            'High': [
-                'Targeted nutrition education and supplementation.',
-                'Improve access to clean water and sanitation.',
-                'Support small-holder agriculture and diversification.'
-            ],
-            'Moderate': [
-                'Nutrition counselling and school feeding pilots.',
-                'Sanitation improvements and hygiene promotion.'
-            ],
-            'Low': [
-                'Maintain preventive programs and monitoring.'
-            ]
-        }
-
-        analytics = []
-        for _, row in df.iterrows():
-            recs = rec_map.get(row['Hotspot'], [])
-            analytics.append({
-                'District': row.get('District'),
-                'Province': row.get('Province'),
-                'Stunting_Rate': float(row.get('Stunting_Rate', 0.0)),
-                'Wasting_Rate': float(row.get('Wasting_Rate', 0.0)),
-                'Underweight_Rate': float(row.get('Underweight_Rate', 0.0)),
-                'RiskScore': float(round(row.get('RiskScore', 0.0), 2)),
-                'Hotspot': row.get('Hotspot'),
-                'Recommendations': recs
-            })
+        score_hotspots(df)
+        analytics = analytics_records(df, ['District', 'Province'])
 
         # Write district analytics file (to be joined with GeoJSON by frontend)
         district_analytics_path = FRONTEND_DATA_DIR / 'district_analytics.json'
         with open(district_analytics_path, 'w', encoding='utf-8') as f:
             json.dump(analytics, f, ensure_ascii=False, indent=2)
         outputs.append(str(district_analytics_path))
+        tables['district_analytics'] = analytics
 
         # Top hotspots by RiskScore and by Stunting
         top_by_risk = df.sort_values('RiskScore', ascending=False).head(10)
@@ -121,6 +155,8 @@ if csv_path.exists():
         with open(top_path, 'w', encoding='utf-8') as f:
             json.dump(top_hotspots, f, ensure_ascii=False, indent=2)
         outputs.append(str(top_path))
+        tables['top_hotspots_by_risk'] = top_hotspots['by_risk']
+        tables['top_hotspots_by_stunting'] = top_hotspots['by_stunting']
 
         # Province summaries
         prov = df.groupby('Province').agg({
@@ -137,62 +173,116 @@ if csv_path.exists():
         province_summary_path = FRONTEND_DATA_DIR / 'province_summary.json'
         prov.to_json(province_summary_path, orient='records', force_ascii=False)
         outputs.append(str(province_summary_path))
+        tables['province_summary'] = prov
 
         # Policy briefs: auto-generate concise briefs per hotspot province
-        briefs = []
-        for _, prow in prov.iterrows():
-            province = prow['Province']
-            brief = {
-                'Province': province,
-                'Summary': f"{province} has average stunting rate {prow['Stunting_Rate']}% and a risk score of {prow['RiskScore']}. Priority: scale-up nutrition and WASH interventions in high-risk districts.",
-                'RecommendedActions': [
-                    'Scale up community-based management of acute malnutrition.',
-                    'Invest in maternal & child health services and growth monitoring.',
-                    'Promote diversified agriculture and market access for nutritious foods.'
-                ]
-            }
-            briefs.append(brief)
+        actions = [
+            'Scale up community-based management of acute malnutrition.',
+            'Invest in maternal & child health services and growth monitoring.',
+            'Promote diversified agriculture and market access for nutritious foods.'
+        ]
+        briefs = pd.DataFrame({
+            'Province': prov['Province'],
+            'Summary': (prov['Province'] + ' has average stunting rate ' + prov['Stunting_Rate'].astype(str)
+                        + '% and a risk score of ' + prov['RiskScore'].astype(str)
+                        + '. Priority: scale-up nutrition and WASH interventions in high-risk districts.'),
+            'RecommendedActions': [list(actions) for _ in range(len(prov))],
+        }).to_dict('records')
 
         briefs_path = FRONTEND_DATA_DIR / 'policy_briefs.json'
         with open(briefs_path, 'w', encoding='utf-8') as f:
             json.dump(briefs, f, ensure_ascii=False, indent=2)
         outputs.append(str(briefs_path))
+        tables['policy_briefs'] = briefs
 
     except Exception as e:
         print('Failed to generate analytics JSONs:', e)
 else:
     print(f"Warning: {csv_path} not found")
 
-# 2) Convert available .dta files (sample first N rows and columns) as JSON metadata + sample
+# 1b) Analytics for every admin level (child_nutrition/malnutrition_by_admin_level.py):
+# levels/<level>_analytics.json and levels/<level>_top_hotspots.json, units keyed by
+# their full path ('Eastern/Bugesera')
+levels_dir = DATA_DIR / 'child_nutrition' / 'admin_levels'
+for level_csv in sorted(levels_dir.glob('*_malnutrition_rates.csv')):
+    level = level_csv.name[:-len('_malnutrition_rates.csv')]
+    try:
+        level_df = pd.read_csv(level_csv, dtype={'Key': str})
+        path_cols = list(level_df.columns[1:level_df.columns.get_loc('Total_Children')])
+        # Fay-Herriot rates (child_nutrition/small_area_estimates.py) where fitted
+        sae_csv = levels_dir / f'{level}_sae_rates.csv'
+        if sae_csv.exists():
+            sae = pd.read_csv(sae_csv, dtype={'Key': str})
+            sae_cols = [f'{c}_{suffix}' for c in RATE_COLS for suffix in ('SAE', 'SAE_SE')]
+            level_df = level_df.merge(sae[['Key'] + sae_cols], on='Key', how='left')
+        score_hotspots(level_df)
+        level_records = analytics_records(level_df, ['Key'] + path_cols + ['Measured'])
+
+        out_dir = FRONTEND_DATA_DIR / 'levels'
+        out_dir.mkdir(exist_ok=True)
+        level_path = out_dir / f'{level}_analytics.json'
+        with open(level_path, 'w', encoding='utf-8') as f:
+            json.dump(level_records, f, ensure_ascii=False, indent=2)
+        outputs.append(str(level_path))
+        tables[f'{level}_level_analytics'] = level_records
+
+        level_top = {
+            'by_risk': level_df.nlargest(10, 'RiskScore')[['Key', 'RiskScore', 'Hotspot']].to_dict('records'),
+            'by_stunting': level_df.nlargest(10, 'Stunting_Rate')[['Key', 'Stunting_Rate']].to_dict('records'),
+        }
+        top_path = out_dir / f'{level}_top_hotspots.json'
+        with open(top_path, 'w', encoding='utf-8') as f:
+            json.dump(level_top, f, ensure_ascii=False, indent=2)
+        outputs.append(str(top_path))
+    except Exception as e:
+        print(f'Failed to generate {level} analytics: {e}')
+
+# 2) Convert available .dta files as JSON metadata + stratified sample
+# Only the .dta header and the sampled rows are decoded, so this step does not
+# grow with the size of the survey files.
 dta_dir = DATA_DIR / 'data'
 if dta_dir.exists():
     for dta in dta_dir.glob('*.dta'):
         name = dta.stem
         try:
-            print(f"Reading {dta} (this may take a moment)")
-            df = pd.read_stata(dta)
-            # create a smaller sample export with columns and first 200 rows
-            sample = df.head(200)
-            # Simplify column names to str
-            sample.columns = [str(c) for c in sample.columns]
+            print(f"Reading {dta} header")
+            # Column dictionary: dtype, value labels and missingness per variable
+            meta = dta_metadata(dta)
+            # Stratified (province/district) sample of the columns the frontend uses
+            sample = stratified_sample(dta, size=SAMPLE_SIZE)
             out_sample = FRONTEND_DATA_DIR / f'{name}_sample.json'
             sample.to_json(out_sample, orient='records', force_ascii=False, date_format='iso')
-            # Basic metadata
-            meta = {
-                'file': dta.name,
-                'rows': int(len(df)),
-                'columns': [str(c) for c in df.columns],
-            }
             out_meta = FRONTEND_DATA_DIR / f'{name}_meta.json'
             with open(out_meta, 'w', encoding='utf-8') as f:
                 json.dump(meta, f, ensure_ascii=False, indent=2)
             outputs.append(str(out_sample))
             outputs.append(str(out_meta))
+            tables[f'{name}_sample'] = sample
         except Exception as e:
             print(f"Failed to read {dta}: {e}")
 else:
     print(f"Warning: {dta_dir} not found")
 
+# 2b) Malnutrition cube: every indicator x one- and two-way disaggregation of the
+# child file, queried by the dashboard pages (src/components/cube.js)
+if CHILD_FILE.exists():
+    try:
+        child = load_survey(CHILD_FILE, columns=list(CUBE_DIMENSIONS) + list(INDICATORS))
+        cube = build_cube(child, CUBE_DIMENSIONS)
+        cube_path = FRONTEND_DATA_DIR / 'malnutrition_cube.json'
+        with open(cube_path, 'w', encoding='utf-8') as f:
+            json.dump({**cube.to_dict(), 'labels': CUBE_DIMENSIONS}, f, ensure_ascii=False, separators=(',', ':'))
+        outputs.append(str(cube_path))
+    except Exception as e:
+        print('Failed to build malnutrition cube:', e)
+
+# 3) Columnar copies of every table plus the schema manifest (public/data/schema.json)
+schema = {}
+for table_name, table in tables.items():
+    path, schema[table_name] = write_columnar(table, table_name, FRONTEND_DATA_DIR)
+    outputs.append(str(path))
+outputs.append(str(write_schema(schema, FRONTEND_DATA_DIR)))
+
 print('\nGenerated files:')
 for p in outputs:
     print(' -', p)
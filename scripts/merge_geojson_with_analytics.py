@@ -8,36 +8,130 @@ Reads:
 
 Writes:
  - nisr-frontend/public/rwanda_districts.json (enriched GeoJSON the frontend fetches)
+ - nisr-frontend/public/rwanda_districts.<level>.topo.json for each zoom level in
+   ZOOM_VARIANTS: TopoJSON with shared district borders simplified
+   (Douglas-Peucker on shared arcs, see scripts/topology.py) and quantised
+ - nisr-frontend/public/data/district_attributes.json (split mode, the default):
+   the analytics fields per district id, joined to the geometry at runtime
+
+In split mode the TopoJSON files hold geometry only: each district carries its
+stable id (GADM `GID_2`) and names, so the files change only when boundaries
+change and can be cached long-term; analytics refreshes rewrite just the small
+attribute table. `--mode merged` puts the analytics into the TopoJSON
+properties instead.
 
 Usage:
   python3 scripts/merge_geojson_with_analytics.py
-
-The script matches analytics 'District' to GeoJSON feature.properties.NAME_2 using a
-simple normalization (casefold, remove non-alphanum). It reports matched and unmatched
-districts.
+  python3 scripts/merge_geojson_with_analytics.py --variants low=0.01,high=0.001 --quantization 20000
+  python3 scripts/merge_geojson_with_analytics.py --mode merged
+  python3 scripts/merge_geojson_with_analytics.py --no-topojson
+
+The script resolves analytics 'District' and GeoJSON feature.properties.NAME_2 to the
+same district id through the gazetteer (`cfsva.gazetteer`: known spellings and aliases,
+then fuzzy matching with a confidence score) and joins on that id. It reports fuzzy
+and unmatched districts.
 """
 
 from pathlib import Path
+import argparse
 import json
-import re
-import unicodedata
+import sys
 from pprint import pprint
 
+from topology import build_topology, simplify_arcs, to_topojson
+
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'Nisr-Data_analysis'))
+from cfsva.gazetteer import load_gazetteer, normalize
 SRC_GEOJSON = ROOT / 'nisr-frontend' / 'src' / 'components' / 'rwanda_districts.json'
 ANALYTICS = ROOT / 'nisr-frontend' / 'public' / 'data' / 'district_analytics.json'
 DEST = ROOT / 'nisr-frontend' / 'public' / 'rwanda_districts.json'
+ATTRIBUTES = ROOT / 'nisr-frontend' / 'public' / 'data' / 'district_attributes.json'
+
+# Stable district key and the static properties kept with the geometry
+ID_PROPERTY = 'GID_2'
+GEOMETRY_PROPERTIES = ('NAME_1', 'NAME_2', 'TYPE_2')
+# Analytics fields copied from district_analytics.json
+ANALYTICS_FIELDS = ('Stunting_Rate', 'Wasting_Rate', 'Underweight_Rate', 'RiskScore', 'Hotspot',
+                    'Recommendations')
+
+# zoom level -> Douglas-Peucker tolerance in degrees (0.001 deg ~ 110 m)
+ZOOM_VARIANTS = {'low': 0.005, 'medium': 0.002, 'high': 0.0005}
+QUANTIZATION = 10000
+
+
+def topojson_path(level):
+    return DEST.with_name(f'{DEST.stem}.{level}.topo.json')
+
+
+def parse_variants(text):
+    variants = {}
+    for item in text.split(','):
+        level, _, tol = item.partition('=')
+        variants[level.strip()] = float(tol)
+    return variants
+
+
+def district_id(feature):
+    props = feature.get('properties', {})
+    return props.get(ID_PROPERTY) or normalize(props.get('NAME_2'))
 
 
-def normalize(name: str) -> str:
-    if name is None:
-        return ''
-    # unicode normalize, lower, remove non-alphanumeric
-    n = unicodedata.normalize('NFKD', str(name))
-    n = n.casefold()
-    n = re.sub(r"[^0-9a-z]+", '', n)
-    return n
+def geometry_properties(feature):
+    props = feature.get('properties', {})
+    return {k: props[k] for k in GEOMETRY_PROPERTIES if k in props}
+
+
+def write_topojson_variants(geo, variants=ZOOM_VARIANTS, quantization=QUANTIZATION, split=True):
+    """
+    Write one simplified, quantised TopoJSON file per zoom level.
+
+    With `split`, features keep only their id and GEOMETRY_PROPERTIES.
+    """
+    features = geo.get('features', [])
+    arcs, geometries = build_topology(features)
+    for level, tolerance in variants.items():
+        topo = to_topojson(simplify_arcs(arcs, geometries, tolerance), geometries, features,
+                           quantization=quantization,
+                           properties=geometry_properties if split else None,
+                           feature_id=district_id)
+        path = topojson_path(level)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(topo, f, ensure_ascii=False, separators=(',', ':'))
+        print(f'Wrote {level} TopoJSON (tolerance {tolerance}) to {path} '
+              f'({path.stat().st_size / 1024:.0f} KB)')
+
+
+def write_attributes(geo):
+    """
+    Write the analytics of every district keyed by district id.
+
+    Recommendation lists are stored once in 'recommendation_sets'; each
+    district's 'Recommendations' is an index into it.
+    """
+    sets, set_index, districts = [], {}, {}
+    for feat in geo.get('features', []):
+        props = feat.get('properties', {})
+        if 'RiskScore' not in props:
+            continue
+        attrs = {'District': props.get('NAME_2')}
+        attrs.update({k: props.get(k) for k in ANALYTICS_FIELDS})
+        recs = attrs.get('Recommendations')
+        if isinstance(recs, list):
+            key = tuple(recs)
+            if key not in set_index:
+                set_index[key] = len(sets)
+                sets.append(recs)
+            attrs['Recommendations'] = set_index[key]
+        districts[district_id(feat)] = attrs
+
+    ATTRIBUTES.parent.mkdir(parents=True, exist_ok=True)
+    with open(ATTRIBUTES, 'w', encoding='utf-8') as f:
+        json.dump({'key': ID_PROPERTY, 'recommendation_sets': sets, 'districts': districts},
+                  f, ensure_ascii=False, separators=(',', ':'))
+    print(f'Wrote attributes for {len(districts)} districts to {ATTRIBUTES} '
+          f'({ATTRIBUTES.stat().st_size / 1024:.1f} KB)')
 
 
 def load_json(path: Path):
@@ -47,17 +141,36 @@ def load_json(path: Path):
         return json.load(f)
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Merge analytics into the district map files.')
+    parser.add_argument('--variants', type=parse_variants, default=ZOOM_VARIANTS,
+                        help='zoom levels as level=tolerance[,...] (degrees)')
+    parser.add_argument('--quantization', type=int, default=QUANTIZATION,
+                        help='TopoJSON grid size per axis')
+    parser.add_argument('--mode', choices=('split', 'merged'), default='split',
+                        help='split: geometry-only TopoJSON + attribute table; merged: analytics in TopoJSON')
+    parser.add_argument('--no-topojson', action='store_true', help='only write the GeoJSON')
+    args = parser.parse_args(argv)
+
     print('Loading geojson from', SRC_GEOJSON)
     geo = load_json(SRC_GEOJSON)
 
     print('Loading analytics from', ANALYTICS)
     analytics = load_json(ANALYTICS)
 
-    # build analytics lookup
+    gazetteer = load_gazetteer()
+    fuzzy = []
+
+    def resolve(name):
+        match = gazetteer.lookup(name, 'district')
+        if match is not None and match.method == 'fuzzy':
+            fuzzy.append((name, match.name, match.score))
+        return match.id if match is not None else None
+
+    # build analytics lookup by district id
     lookup = {}
     for rec in analytics:
-        key = normalize(rec.get('District'))
+        key = resolve(rec.get('District'))
         if not key:
             continue
         lookup[key] = rec
@@ -69,21 +182,18 @@ def main():
     for feat in features:
         props = feat.get('properties', {})
         name2 = props.get('NAME_2') or props.get('NAME') or props.get('name')
-        key = normalize(name2)
-        rec = lookup.get(key)
+        rec = lookup.get(resolve(name2))
         if rec:
             # inject fields into properties (do not remove existing props)
-            props['Stunting_Rate'] = rec.get('Stunting_Rate')
-            props['Wasting_Rate'] = rec.get('Wasting_Rate')
-            props['Underweight_Rate'] = rec.get('Underweight_Rate')
-            props['RiskScore'] = rec.get('RiskScore')
-            props['Hotspot'] = rec.get('Hotspot')
-            props['Recommendations'] = rec.get('Recommendations')
+            for field in ANALYTICS_FIELDS:
+                props[field] = rec.get(field)
             matched += 1
         else:
             unmatched.append(name2)
 
     print(f'Matched analytics to {matched} features, {len(unmatched)} unmatched')
+    for name, canonical, score in fuzzy:
+        print(f'  fuzzy match: {name!r} -> {canonical!r} (confidence {score})')
     if unmatched:
         print('Some unmatched districts (sample 20):')
         pprint(unmatched[:20])
@@ -95,6 +205,11 @@ def main():
 
     print('Wrote enriched GeoJSON to', DEST)
 
+    if not args.no_topojson:
+        write_topojson_variants(geo, args.variants, args.quantization, split=args.mode == 'split')
+        if args.mode == 'split':
+            write_attributes(geo)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Script: pipeline.py
+Purpose: Rebuild the analysis outputs and frontend data incrementally.
+
+Usage:
+  python scripts/pipeline.py                  # rebuild whatever is stale
+  python scripts/pipeline.py geojson          # a stage and everything upstream of it
+  python scripts/pipeline.py --force          # re-run every selected stage
+  python scripts/pipeline.py --dry-run        # only show what would run
+  python scripts/pipeline.py --list           # show stages, inputs and outputs
+
+Each stage declares its script, input files and output files. Stages are
+ordered by their files: a stage that reads another stage's output runs after
+it. A stage re-runs when the content (SHA-256) of any input changed since its
+last successful run, or when an output is missing or was modified. File hashes
+are cached by size + mtime, so a no-op rebuild only stats files.
+
+Independent stages (e.g. the village figures and the child tables) run at the
+same time, each in its own Python process. Run state is kept in
+`.cache/pipeline.json` at the repository root.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ANALYSIS_DIR = ROOT / 'Nisr-Data_analysis'
+CFSVA_DIR = ANALYSIS_DIR / 'cfsva'
+SURVEY_DIR = ANALYSIS_DIR / 'data'
+CHILD_DIR = ANALYSIS_DIR / 'child_nutrition'
+VILLAGE_DIR = ANALYSIS_DIR / 'village'
+FRONTEND_DATA_DIR = ROOT / 'nisr-frontend' / 'public' / 'data'
+SCRIPTS_DIR = ROOT / 'scripts'
+
+STATE_FILE = ROOT / '.cache' / 'pipeline.json'
+STATE_VERSION = 1
+
+CHILD_DTA = SURVEY_DIR / 'CFSVAHH2021_UNDER_5_ChildWithMother.dta'
+VILLAGE_DTA = SURVEY_DIR / 'CFSVA_2021_VILLAGE.dta'
+ENRICHED_META = SURVEY_DIR / 'derived' / 'CFSVA_2021_VILLAGE_enriched.meta.json'
+DISTRICT_RATES = CHILD_DIR / 'district_malnutrition_rates.csv'
+DISTRICT_ANALYTICS = FRONTEND_DATA_DIR / 'district_analytics.json'
+LEVELS_DIR = CHILD_DIR / 'admin_levels'
+COLUMNAR_TABLES = ('district_malnutrition_rates', 'district_analytics', 'top_hotspots_by_risk',
+                   'top_hotspots_by_stunting', 'province_summary', 'policy_briefs')
+
+
+def admin_levels():
+    """Admin levels present in the child file (read from its .dta header)."""
+    if not CHILD_DTA.exists():
+        return []
+    sys.path.insert(0, str(ANALYSIS_DIR))
+    from cfsva.admin import admin_columns
+    return list(admin_columns(CHILD_DTA))
+
+
+def sae_levels():
+    """Admin levels with small-area estimates (in both the child and village files)."""
+    if not (CHILD_DTA.exists() and VILLAGE_DTA.exists()):
+        return []
+    sys.path.insert(0, str(ANALYSIS_DIR))
+    from cfsva.admin import admin_columns
+    from cfsva.sae import sae_levels as levels
+    return levels(admin_columns(CHILD_DTA), admin_columns(VILLAGE_DTA))
+
+
+ADMIN_LEVELS = admin_levels()
+SAE_LEVELS = sae_levels()
+
+
+def cfsva(*modules):
+    return [CFSVA_DIR / '__init__.py', CFSVA_DIR / 'loader.py'] + [CFSVA_DIR / f'{m}.py' for m in modules]
+
+
+def survey_exports():
+    """Sample/meta JSON written by generate_frontend_json.py for each .dta present."""
+    outputs = []
+    for dta in sorted(SURVEY_DIR.glob('*.dta')):
+        outputs += [FRONTEND_DATA_DIR / f'{dta.stem}_sample.json', FRONTEND_DATA_DIR / f'{dta.stem}_meta.json',
+                    FRONTEND_DATA_DIR / 'columnar' / f'{dta.stem}_sample.json']
+    return outputs
+
+
+# name -> {script, cwd, inputs, outputs}; the script itself is always an input
+STAGES = {
+    'child_tables': {
+        'script': CHILD_DIR / 'malnutrition_by_district.py',
+        'cwd': CHILD_DIR,
+        'inputs': [CHILD_DTA] + cfsva('estimators', 'malnutrition', 'variance'),
+        'outputs': [DISTRICT_RATES, CHILD_DIR / 'district_malnutrition_report.txt'],
+    },
+    'admin_tables': {
+        'script': CHILD_DIR / 'malnutrition_by_admin_level.py',
+        'cwd': CHILD_DIR,
+        'inputs': [CHILD_DTA] + cfsva('estimators', 'malnutrition', 'variance', 'stata', 'admin'),
+        'outputs': [LEVELS_DIR / f'{level}_malnutrition_rates.csv' for level in ADMIN_LEVELS],
+    },
+    'sae_tables': {
+        'script': CHILD_DIR / 'small_area_estimates.py',
+        'cwd': CHILD_DIR,
+        'inputs': ([LEVELS_DIR / f'{level}_malnutrition_rates.csv' for level in SAE_LEVELS] + [VILLAGE_DTA]
+                   + cfsva('malnutrition', 'variance', 'stata', 'admin', 'sae', 'vulnerability')),
+        'outputs': [LEVELS_DIR / f'{level}_sae_rates.csv' for level in SAE_LEVELS],
+    },
+    'village_enriched': {
+        'script': VILLAGE_DIR / 'advanced_village_analytics.py',
+        'cwd': VILLAGE_DIR,
+        'inputs': [VILLAGE_DTA] + cfsva('vulnerability', 'enriched'),
+        'outputs': [ENRICHED_META],
+    },
+    'village_figures': {
+        'script': VILLAGE_DIR / 'visualize_food_security.py',
+        'cwd': VILLAGE_DIR,
+        'inputs': [ENRICHED_META] + cfsva('vulnerability', 'enriched'),
+        'outputs': [VILLAGE_DIR / f for f in ('fig1_geographic_overview.png', 'fig2_infrastructure_access.png',
+                                              'fig3_food_availability_prices.png', 'fig4_labor_wages.png',
+                                              'fig5_vulnerability_analysis.png')],
+    },
+    'village_districts': {
+        'script': VILLAGE_DIR / 'district_analysis_simple.py',
+        'cwd': VILLAGE_DIR,
+        'inputs': [VILLAGE_DTA] + cfsva('estimators'),
+        'outputs': [VILLAGE_DIR / f for f in ('district_comprehensive_profile.csv', 'summary_stats.txt',
+                                              'district_by_province.txt')],
+    },
+    'frontend_json': {
+        'script': SCRIPTS_DIR / 'generate_frontend_json.py',
+        'cwd': ROOT,
+        'inputs': ([DISTRICT_RATES, SCRIPTS_DIR / 'columnar.py'] + sorted(SURVEY_DIR.glob('*.dta'))
+                   + [LEVELS_DIR / f'{level}_malnutrition_rates.csv' for level in ADMIN_LEVELS]
+                   + [LEVELS_DIR / f'{level}_sae_rates.csv' for level in SAE_LEVELS]
+                   + cfsva('stata', 'sampling', 'vulnerability', 'cube', 'malnutrition', 'estimators')),
+        'outputs': ([FRONTEND_DATA_DIR / f for f in ('district_malnutrition_rates.json', 'district_analytics.json',
+                                                     'top_hotspots.json', 'province_summary.json',
+                                                     'policy_briefs.json', 'schema.json',
+                                                     'malnutrition_cube.json')]
+                    + [FRONTEND_DATA_DIR / 'columnar' / f'{name}.json' for name in COLUMNAR_TABLES]
+                    + [FRONTEND_DATA_DIR / 'levels' / f'{level}_{kind}.json'
+                       for level in ADMIN_LEVELS for kind in ('analytics', 'top_hotspots')]
+                    + [FRONTEND_DATA_DIR / 'columnar' / f'{level}_level_analytics.json' for level in ADMIN_LEVELS]
+                    + survey_exports()),
+    },
+    'geojson': {
+        'script': SCRIPTS_DIR / 'merge_geojson_with_analytics.py',
+        'cwd': ROOT,
+        'inputs': ([ROOT / 'nisr-frontend' / 'src' / 'components' / 'rwanda_districts.json', DISTRICT_ANALYTICS,
+                    SCRIPTS_DIR / 'topology.py', VILLAGE_DTA] + cfsva('stata', 'gazetteer')),
+        'outputs': [ROOT / 'nisr-frontend' / 'public' / f'rwanda_districts{variant}.json'
+                    for variant in ('', '.low.topo', '.medium.topo', '.high.topo')]
+                   + [FRONTEND_DATA_DIR / 'district_attributes.json'],
+    },
+}
+# Hashed + precompressed copies of everything the frontend stages write (gitignored;
+# `npm run build` also runs it)
+STAGES['static_assets'] = {
+    'script': SCRIPTS_DIR / 'publish_static_assets.py',
+    'cwd': ROOT,
+    'inputs': STAGES['frontend_json']['outputs'] + STAGES['geojson']['outputs'],
+    'outputs': [FRONTEND_DATA_DIR / 'manifest.json'],
+}
+
+
+def stage_inputs(stage):
+    return [stage['script']] + list(stage['inputs'])
+
+
+def dependencies(stages=STAGES):
+    """name -> set of upstream stage names (stages producing one of its inputs)."""
+    producer = {}
+    for name, stage in stages.items():
+        for out in stage['outputs']:
+            if out in producer:
+                raise ValueError(f"{out} is produced by both {producer[out]} and {name}")
+            producer[out] = name
+    deps = {name: {producer[p] for p in stage_inputs(stage) if p in producer and producer[p] != name}
+            for name, stage in stages.items()}
+    _check_acyclic(deps)
+    return deps
+
+
+def _check_acyclic(deps):
+    done, active = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in active:
+            raise ValueError(f"Pipeline has a cycle through stage {name!r}")
+        active.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        active.discard(name)
+        done.add(name)
+
+    for name in deps:
+        visit(name)
+
+
+def with_upstream(targets, deps):
+    selected, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo.extend(deps[name])
+    return selected
+
+
+def _key(path):
+    """State key of a file: its path relative to the repository root."""
+    return path.relative_to(ROOT).as_posix()
+
+
+class FileHasher:
+    """SHA-256 of files, memoised on (size, mtime_ns) across runs."""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def digest(self, path):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        key = _key(path)
+        entry = self.known.get(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        self.known[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def snapshot(self, paths):
+        return {_key(p): self.digest(p) for p in paths}
+
+
+def load_state():
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+    if state.get('version') != STATE_VERSION:
+        return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+    return state
+
+
+def save_state(state):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_name(STATE_FILE.name + '.tmp')
+    tmp.write_text(json.dumps(state, indent=2), encoding='utf-8')
+    os.replace(tmp, STATE_FILE)
+
+
+def stale_reason(name, stage, record, hasher):
+    """Why a stage must run, or None if it is up to date."""
+    if not record:
+        return 'never run'
+    inputs = hasher.snapshot(stage_inputs(stage))
+    missing = [p for p, d in inputs.items() if d is None]
+    if missing:
+        return f'missing input {Path(missing[0]).name}'
+    if inputs != record.get('inputs'):
+        changed = [p for p in inputs if inputs[p] != record.get('inputs', {}).get(p)]
+        return f'changed input {Path(changed[0]).name}'
+    outputs = hasher.snapshot(stage['outputs'])
+    for p, d in outputs.items():
+        if d is None:
+            return f'missing output {Path(p).name}'
+        if d != record.get('outputs', {}).get(p):
+            return f'modified output {Path(p).name}'
+    return None
+
+
+def run_stage(name, stage):
+    """Run one stage script in its own Python process; returns (name, returncode, seconds, output)."""
+    start = time.perf_counter()
+    env = dict(os.environ, MPLBACKEND=os.environ.get('MPLBACKEND', 'Agg'))
+    proc = subprocess.run([sys.executable, str(stage['script'])], cwd=stage['cwd'], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return name, proc.returncode, time.perf_counter() - start, proc.stdout
+
+
+def build(targets=None, force=False, jobs=None, dry_run=False, stages=STAGES):
+    """Run the stale stages among `targets` (and their upstream stages). Returns an exit code."""
+    deps = dependencies(stages)
+    unknown = [t for t in targets or [] if t not in stages]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)}. Available: {', '.join(stages)}")
+        return 2
+    selected = with_upstream(targets or list(stages), deps)
+
+    state = load_state()
+    hasher = FileHasher(state['files'])
+    pending = {n: deps[n] & selected for n in stages if n in selected}
+    rerun = set()  # stages scheduled this build; their dependents re-check after they finish
+    running, failed = {}, []
+
+    def ready():
+        busy = set(pending) | set(running.values())
+        return [n for n, d in pending.items() if not d & busy]
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        while pending or running:
+            for name in ready():
+                del pending[name]
+                stage = stages[name]
+                if force:
+                    reason = 'forced'
+                elif dry_run and deps[name] & rerun:
+                    reason = 'upstream stage runs'
+                else:
+                    reason = stale_reason(name, stage, state['stages'].get(name), hasher)
+                if reason is None:
+                    print(f"  {name}: up to date")
+                    continue
+                if dry_run:
+                    print(f"  {name}: would run ({reason})")
+                    rerun.add(name)
+                    continue
+                print(f"  {name}: running ({reason})")
+                running[pool.submit(run_stage, name, stage)] = name
+                rerun.add(name)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, code, seconds, output = future.result()
+                del running[future]
+                stage = stages[name]
+                if code != 0:
+                    failed.append(name)
+                    print(f"  {name}: FAILED after {seconds:.1f}s (exit {code})")
+                    print('\n'.join('    | ' + line for line in output.rstrip().splitlines()[-20:]))
+                    # Nothing downstream of a failed stage can run
+                    blocked = {n for n in pending if name in with_upstream([n], deps)}
+                    for n in blocked:
+                        del pending[n]
+                        print(f"  {n}: skipped (depends on {name})")
+                    continue
+                state['stages'][name] = {
+                    'inputs': hasher.snapshot(stage_inputs(stage)),
+                    'outputs': hasher.snapshot(stage['outputs']),
+                    'seconds': round(seconds, 2),
+                }
+                missing = [p.name for p in stage['outputs'] if not p.exists()]
+                note = f" (did not write: {', '.join(missing)})" if missing else ''
+                print(f"  {name}: done in {seconds:.1f}s{note}")
+
+    state['files'] = hasher.known
+    if not dry_run:
+        save_state(state)
+    if not rerun:
+        print('Everything up to date.')
+    return 1 if failed else 0
+
+
+def describe(stages=STAGES):
+    deps = dependencies(stages)
+    for name, stage in stages.items():
+        after = ', '.join(sorted(deps[name])) or '-'
+        print(f"{name}  (after: {after})")
+        print(f"  script:  {stage['script'].relative_to(ROOT)}")
+        for p in stage['inputs']:
+            print(f"  input:   {p.relative_to(ROOT)}")
+        for p in stage['outputs']:
+            print(f"  output:  {p.relative_to(ROOT)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incrementally rebuild the analysis and frontend data.')
+    parser.add_argument('stages', nargs='*', help='stages to build (default: all)')
+    parser.add_argument('--force', action='store_true', help='re-run the selected stages even if up to date')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='stages to run in parallel')
+    parser.add_argument('--dry-run', '-n', action='store_true', help='show what would run')
+    parser.add_argument('--list', action='store_true', help='list stages and exit')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        describe()
+        return 0
+    start = time.perf_counter()
+    code = build(args.stages, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Publish the frontend data files as immutable, precompressed static assets.
+
+Reads:
+ - nisr-frontend/public/data/**/*.json (written by generate_frontend_json.py)
+ - nisr-frontend/public/rwanda_districts*.json (GeoJSON and TopoJSON variants written by
+   merge_geojson_with_analytics.py)
+
+Writes, next to each file:
+ - <name>.<hash>.json      copy named by the first 10 hex digits of its SHA-256
+ - <name>.<hash>.json.gz   gzip (level 9, no timestamp, so output is reproducible)
+ - <name>.<hash>.json.br   brotli (only when the `brotli` package is installed)
+and nisr-frontend/public/data/manifest.json mapping logical names
+('district_analytics', 'columnar/district_analytics', 'rwanda_districts', ...)
+to the hashed paths.
+
+Usage:
+  python3 scripts/publish_static_assets.py
+
+Runs at deploy time (`npm run build` in nisr-frontend, and the last pipeline
+stage); its outputs are gitignored. Pages resolve their fetch URLs through the
+manifest (src/components/assets.js), falling back to the plain-named files,
+which stay in place for `npm run dev`.
+
+Hashed files never change once written, so they can be served with
+`Cache-Control: immutable`; only manifest.json needs revalidation. Older hashed
+copies of a file are removed when its content changes.
+"""
+
+import gzip
+import hashlib
+import json
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLIC_DIR = ROOT / 'nisr-frontend' / 'public'
+DATA_DIR = PUBLIC_DIR / 'data'
+MANIFEST = DATA_DIR / 'manifest.json'
+
+HASH_LEN = 10
+HASHED = re.compile(r'\.[0-9a-f]{%d}\.json(\.gz|\.br)?$' % HASH_LEN)
+
+
+def source_files():
+    """Plain-named JSON files to publish (hashed copies and the manifest excluded)."""
+    files = [p for p in sorted(DATA_DIR.rglob('*.json')) if p != MANIFEST and not HASHED.search(p.name)]
+    maps = [p for p in sorted(PUBLIC_DIR.glob('rwanda_districts*.json')) if not HASHED.search(p.name)]
+    return files + maps
+
+
+def logical_name(path):
+    rel = path.relative_to(DATA_DIR if DATA_DIR in path.parents else PUBLIC_DIR)
+    return rel.with_suffix('').as_posix()
+
+
+def _write_if_changed(path, data):
+    if not path.exists() or path.read_bytes() != data:
+        path.write_bytes(data)
+
+
+def publish(path):
+    """Write the hashed copy and its compressed siblings; return the manifest entry."""
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    hashed = path.with_name(f'{path.stem}.{digest[:HASH_LEN]}{path.suffix}')
+    _write_if_changed(hashed, data)
+
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    _write_if_changed(hashed.with_name(hashed.name + '.gz'), gz)
+    entry = {
+        'path': '/' + hashed.relative_to(PUBLIC_DIR).as_posix(),
+        'sha256': digest,
+        'bytes': len(data),
+        'gzip_bytes': len(gz),
+    }
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        _write_if_changed(hashed.with_name(hashed.name + '.br'), br)
+        entry['br_bytes'] = len(br)
+
+    # drop hashed copies of earlier versions of this file
+    pattern = re.compile(re.escape(path.stem) + HASHED.pattern)
+    for old in path.parent.iterdir():
+        if pattern.fullmatch(old.name) and not old.name.startswith(hashed.name):
+            old.unlink()
+    return entry
+
+
+def main():
+    if brotli is None:
+        print('brotli not installed: writing .gz only (pip install brotli for .br files)')
+    manifest = {}
+    for path in source_files():
+        manifest[logical_name(path)] = publish(path)
+
+    with open(MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    raw = sum(e['bytes'] for e in manifest.values())
+    gz = sum(e['gzip_bytes'] for e in manifest.values())
+    print(f'Published {len(manifest)} assets ({raw / 1024:.0f} KB, {gz / 1024:.0f} KB gzipped)')
+    print('Wrote manifest to', MANIFEST)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Shared-arc topology, simplification and TopoJSON encoding for the district map.
+
+`build_topology()` cuts every polygon ring at its junctions (points where
+the set of neighbouring districts changes) and stores each boundary piece
+once, so the border between two districts is a single arc used by both.
+`simplify_arcs()` then runs Douglas-Peucker on each arc with its end points
+fixed: both districts see the same simplified border and no gaps or
+overlaps appear. `to_topojson()` quantises the arcs onto an integer grid and
+delta-encodes them (TopoJSON spec 1.0).
+
+Arc references follow TopoJSON: arc i read backwards is ~i (-i - 1).
+"""
+
+import numpy as np
+
+
+def _rings(geometry):
+    """Polygons of a (Multi)Polygon as lists of rings (lists of (x, y) tuples)."""
+    coords = geometry['coordinates']
+    polygons = coords if geometry['type'] == 'MultiPolygon' else [coords]
+    return [[[tuple(pt[:2]) for pt in ring] for ring in polygon] for polygon in polygons]
+
+
+def _open(ring):
+    return ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else ring
+
+
+def _junctions(rings):
+    """Points whose neighbours differ between the rings passing through them."""
+    neighbours = {}
+    for ring in rings:
+        pts = _open(ring)
+        n = len(pts)
+        for i, p in enumerate(pts):
+            pair = frozenset((pts[i - 1], pts[(i + 1) % n]))
+            neighbours.setdefault(p, set()).add(pair)
+    return {p for p, pairs in neighbours.items() if len(pairs) > 1}
+
+
+def _canonical_ring(pts):
+    """Rotate a junction-free ring to start at its smallest point (so shared rings match)."""
+    start = min(range(len(pts)), key=pts.__getitem__)
+    return pts[start:] + pts[:start]
+
+
+def build_topology(features):
+    """
+    Shared arcs of the features' polygons.
+
+    Returns (arcs, geometries): arcs is a list of point lists, geometries a
+    list (one per feature) of polygons -> rings -> arc references.
+    """
+    shapes = [_rings(f['geometry']) for f in features]
+    junctions = _junctions([ring for polygons in shapes for polygon in polygons for ring in polygon])
+
+    arcs, index = [], {}
+
+    def arc_ref(points):
+        key = tuple(points)
+        if key in index:
+            return index[key]
+        rev = key[::-1]
+        if rev in index:
+            return ~index[rev]
+        index[key] = len(arcs)
+        arcs.append(list(points))
+        return index[key]
+
+    geometries = []
+    for polygons in shapes:
+        geom = []
+        for polygon in polygons:
+            refs_polygon = []
+            for ring in polygon:
+                pts = _open(ring)
+                cuts = [i for i, p in enumerate(pts) if p in junctions]
+                if not cuts:
+                    pts = _canonical_ring(pts)
+                    refs_polygon.append([arc_ref(pts + [pts[0]])])
+                    continue
+                pts = pts[cuts[0]:] + pts[:cuts[0]]
+                cuts = [c - cuts[0] for c in cuts] + [len(pts)]
+                pts = pts + [pts[0]]
+                refs_polygon.append([arc_ref(pts[a:b + 1]) for a, b in zip(cuts, cuts[1:])])
+            geom.append(refs_polygon)
+        geometries.append(geom)
+    return arcs, geometries
+
+
+def douglas_peucker(points, tolerance):
+    """Indices of the points kept by Douglas-Peucker (end points always kept)."""
+    pts = np.asarray(points, dtype=float)
+    n = len(pts)
+    if n <= 2 or tolerance <= 0:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = pts[b] - pts[a]
+        rel = pts[a + 1:b] - pts[a]
+        length = np.hypot(*seg)
+        if length == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            m = a + 1 + i
+            keep[m] = True
+            stack += [(a, m), (m, b)]
+    return np.flatnonzero(keep)
+
+
+def simplify_arcs(arcs, geometries, tolerance):
+    """
+    Douglas-Peucker on every arc (`tolerance` in coordinate units).
+
+    Closed arcs (whole rings) keep at least four points, and a ring whose
+    arcs would collapse below four points keeps its arcs unsimplified.
+    """
+    out = []
+    for arc in arcs:
+        kept = douglas_peucker(arc, tolerance)
+        if arc[0] == arc[-1] and len(kept) < 4:
+            kept = np.unique(np.concatenate([kept, np.linspace(0, len(arc) - 1, 4).astype(int)]))
+        out.append([arc[i] for i in kept])
+
+    for geom in geometries:
+        for polygon in geom:
+            for ring in polygon:
+                size = sum(len(out[r if r >= 0 else ~r]) - 1 for r in ring)
+                if size < 3:
+                    for r in ring:
+                        j = r if r >= 0 else ~r
+                        out[j] = arcs[j]
+    return out
+
+
+def _drop_degenerate_rings(quantised, geometries):
+    """
+    Geometries without the rings that collapse on the quantisation grid.
+
+    A ring with fewer than 3 distinct grid points has no area. Dropping an
+    exterior ring drops its polygon (holes included). Returns the filtered
+    geometries and the sorted indices of the arcs they still use.
+    """
+    def distinct_points(ring):
+        pts = np.vstack([quantised[r] if r >= 0 else quantised[~r][::-1] for r in ring])
+        return len(np.unique(pts, axis=0))
+
+    out, used = [], set()
+    for geom in geometries:
+        polygons = []
+        for polygon in geom:
+            if distinct_points(polygon[0]) < 3:
+                continue
+            rings = [polygon[0]] + [ring for ring in polygon[1:] if distinct_points(ring) >= 3]
+            polygons.append(rings)
+            used.update(r if r >= 0 else ~r for ring in rings for r in ring)
+        out.append(polygons)
+    return out, sorted(used)
+
+
+def to_topojson(arcs, geometries, features, quantization=1e5, object_name='districts',
+                properties=None, feature_id=None):
+    """
+    TopoJSON Topology of the arcs, quantised to a `quantization` grid.
+
+    Rings that collapse to fewer than 3 distinct grid points are dropped,
+    with their polygon when the exterior ring collapses.
+
+    `properties(feature)` returns the properties written for a feature
+    (default: the feature's own properties); `feature_id(feature)`, when
+    given, sets each geometry's 'id'.
+    """
+    allpts = np.array([p for arc in arcs for p in arc], dtype=float)
+    x0, y0 = allpts.min(axis=0)
+    x1, y1 = allpts.max(axis=0)
+    kx = (x1 - x0) / (quantization - 1) if x1 > x0 else 1.0
+    ky = (y1 - y0) / (quantization - 1) if y1 > y0 else 1.0
+
+    quantised = []
+    for arc in arcs:
+        q = np.rint((np.asarray(arc, dtype=float) - (x0, y0)) / (kx, ky)).astype(np.int64)
+        # drop points that land on the same grid cell as the previous one
+        keep = np.ones(len(q), dtype=bool)
+        keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+        if not keep[-1]:
+            # keep the end point (shared with other arcs) instead of its twin
+            keep[np.flatnonzero(keep)[-1]] = len(np.flatnonzero(keep)) == 1
+            keep[-1] = True
+        q = q[keep]
+        if len(q) < 2:
+            q = np.vstack([q, q])
+        quantised.append(q)
+
+    geometries, used = _drop_degenerate_rings(quantised, geometries)
+    # arcs only referenced by dropped rings are not written; renumber the rest
+    renumber = {old: new for new, old in enumerate(used)}
+    geometries = [[[[renumber[r] if r >= 0 else ~renumber[~r] for r in ring] for ring in polygon]
+                   for polygon in geom] for geom in geometries]
+    encoded = [np.vstack([q[:1], np.diff(q, axis=0)]).tolist() for q in (quantised[i] for i in used)]
+
+    props = properties or (lambda f: f.get('properties', {}))
+    objects = []
+    for geom, f in zip(geometries, features):
+        obj = {'type': 'MultiPolygon', 'arcs': geom, 'properties': props(f)}
+        if feature_id is not None:
+            obj = {'id': feature_id(f), **obj}
+        objects.append(obj)
+    return {
+        'type': 'Topology',
+        'bbox': [float(x0), float(y0), float(x1), float(y1)],
+        'transform': {'scale': [float(kx), float(ky)], 'translate': [float(x0), float(y0)]},
+        'objects': {
+            object_name: {
+                'type': 'GeometryCollection',
+                'geometries': objects,
+            },
+        },
+        'arcs': encoded,
+    }